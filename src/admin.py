@@ -18,6 +18,6 @@ def criar_bd() -> None:
 
     ServicoBDImpl().criar_bd(LoginComSenha(login1, senha1))
 
-Raiz.register_sqlite("cofre.db")
+Raiz.register_url("sqlite:///cofre.db")
 CofreDeSenhasDAOImpl()
 criar_bd()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from cofre_de_senhas.controller import servir
+from cofre_de_senhas.service_impl import ServicoBDImpl
 from cofre_de_senhas.bd.raiz import Raiz
 from cofre_de_senhas.bd.bd_dao_impl import CofreDeSenhasDAOImpl
 from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
@@ -6,9 +7,10 @@ from cofre_de_senhas.usuario.usuario_dao_impl import UsuarioDAOImpl
 from cofre_de_senhas.segredo.segredo_dao_impl import SegredoDAOImpl
 
 if __name__ == "__main__":
-    Raiz.register_sqlite("cofre.db")
+    Raiz.register_url("sqlite:///cofre.db?profile=wal&pool=10&readers=10&retry=5")
     CategoriaDAOImpl()
     CofreDeSenhasDAOImpl()
     SegredoDAOImpl()
     UsuarioDAOImpl()
+    ServicoBDImpl().atualizar_bd()
     servir()
\ No newline at end of file
@@ -10,5 +10,13 @@ class CofreDeSenhasDAOImpl(CofreDeSenhasDAO):
         with open("src/create.sql", "r", encoding = "utf-8") as f:
             return f.read()
 
+    def sql_criar_fts(self) -> str:
+        with open("src/create_fts.sql", "r", encoding = "utf-8") as f:
+            return f.read()
+
     def criar_bd(self) -> None:
-        Raiz.instance().executescript(self.sql_criar_bd())
\ No newline at end of file
+        Raiz.instance().executescript(self.sql_criar_bd())
+        Raiz.instance().executescript(self.sql_criar_fts())
+
+    def atualizar_bd(self) -> None:
+        Raiz.instance().executescript(self.sql_criar_fts())
\ No newline at end of file
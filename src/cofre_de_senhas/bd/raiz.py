@@ -1,6 +1,5 @@
-import sqlite3
-from connection.trans import TransactedConnection
-from connection.sqlite3conn import ConnectionData
+from connection.trans import PoolConfig, RetryPolicy, TransactedConnection
+from connection.registry import connect
 from functools import wraps
 from decorators.tracer import Logger
 from decorators.single import Single
@@ -8,14 +7,26 @@ from typing import Any, Callable, cast, TypeVar
 
 _TRANS = TypeVar("_TRANS", bound = Callable[..., Any])
 
+_READ_ONLY: str = "_raiz_read_only"
+
 class Raiz:
 
     def __init__(self) -> None:
         raise Exception()
 
     @staticmethod
-    def register_sqlite(file: str) -> None:
-        Raiz.register(ConnectionData.create(file_name = file).connect())
+    def register_sqlite(file: str, pool: PoolConfig | None = None, profile: str = "default", readers: PoolConfig | None = None, retry: RetryPolicy | None = None) -> None:
+        # Importado aqui para que quem usa register_url com outro banco de dados não carregue o driver do SQLite.
+        from connection.sqlite3conn import ConnectionData
+        Raiz.register(ConnectionData.create(file_name = file, profile = profile).connect(pool, readers).with_retry(retry))
+
+    @staticmethod
+    def register_url(url: str) -> None:
+        """
+        Registra a conexão descrita pela URL, como sqlite:///cofre.db?profile=wal ou mariadb://usuario@host/banco?pool=20.
+        Apenas o driver do banco de dados escolhido é importado.
+        """
+        Raiz.register(connect(url))
 
     @staticmethod
     def register(instance: TransactedConnection) -> None:
@@ -27,9 +38,20 @@ class Raiz:
 
     @staticmethod
     def transact(operation: _TRANS) -> _TRANS:
+        # Métodos já marcados com read_only têm a sua própria transação.
+        if getattr(operation, _READ_ONLY, False): return operation
+
         @wraps(operation)
         def transacted_operation(*args: Any, **kwargs: Any) -> Any:
             return Raiz.instance().transact(operation)(*args, **kwargs)
         return cast(_TRANS, transacted_operation)
 
+    @staticmethod
+    def read_only(operation: _TRANS) -> _TRANS:
+        @wraps(operation)
+        def transacted_operation(*args: Any, **kwargs: Any) -> Any:
+            return Raiz.instance().transact_readonly(operation)(*args, **kwargs)
+        setattr(transacted_operation, _READ_ONLY, True)
+        return cast(_TRANS, transacted_operation)
+
 log = Logger.for_print_fn()
\ No newline at end of file
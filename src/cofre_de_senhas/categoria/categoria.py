@@ -2,8 +2,10 @@ from typing import Self, TypeGuard
 from validator import dataclass_validate
 from dataclasses import dataclass, replace
 from cofre_de_senhas.erro import *
-from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria as NomeCategoriaDAO
+from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria as NomeCategoriaDAO, Pagina
 from cofre_de_senhas.service import *
+from cofre_de_senhas.paginacao import pagina_dao, paginar
+from cofre_de_senhas.mapa_de_identidade import MapaDeIdentidade
 from cofre_de_senhas.usuario.usuario import Usuario, Permissao
 
 @dataclass_validate
@@ -12,17 +14,26 @@ class Categoria:
     pk_categoria: int
     nome: str
 
-    def __renomear(self, novo_nome: str) -> Self:
+    def _renomear(self, novo_nome: str) -> Self:
         Categoria.__nao_existente_por_nome(novo_nome)
+        self.__esquecer()
         return replace(self, nome = novo_nome).__salvar()
 
-    def __excluir(self) -> Self:
+    def _excluir(self) -> Self:
         CategoriaDAO.instance().deletar_por_pk(self.pk)
+        self.__esquecer()
         return self
 
     def __salvar(self) -> Self:
         CategoriaDAO.instance().salvar_com_pk(self.__down)
-        return self
+        return self.__registrar()
+
+    def __registrar(self) -> Self:
+        return MapaDeIdentidade.atual().guardar(self, ("pk", self.pk_categoria), ("nome", self.nome))
+
+    def __esquecer(self) -> None:
+        # Segredos já carregados nesta transação podem conter esta categoria com o nome antigo, então tudo é descartado.
+        MapaDeIdentidade.atual().limpar()
 
     @property
     def __chave(self) -> ChaveCategoria:
@@ -34,7 +45,7 @@ class Categoria:
         return CategoriaPK(self.pk_categoria)
 
     @property
-    def __up(self) -> CategoriaComChave:
+    def _up(self) -> CategoriaComChave:
         return CategoriaComChave(self.__chave, self.nome)
 
     @property
@@ -53,24 +64,28 @@ class Categoria:
 
     @staticmethod
     def __encontrar_por_chave(chave: ChaveCategoria) -> "Categoria | None":
+        carregada: Categoria | None = MapaDeIdentidade.atual().buscar(Categoria, ("pk", chave.valor))
+        if carregada is not None: return carregada
         dados: DadosCategoria | None = CategoriaDAO.instance().buscar_por_pk(CategoriaPK(chave.valor))
         if dados is None: return None
-        return Categoria.__promote(dados)
+        return Categoria.__promote(dados).__registrar()
 
     @staticmethod
-    def __encontrar_existente_por_chave(chave: ChaveCategoria) -> "Categoria":
+    def _encontrar_existente_por_chave(chave: ChaveCategoria) -> "Categoria":
         encontrado: Categoria | None = Categoria.__encontrar_por_chave(chave)
         if encontrado is None: raise CategoriaNaoExisteException()
         return encontrado
 
     @staticmethod
     def __encontrar_por_nome(nome: str) -> "Categoria | None":
+        carregada: Categoria | None = MapaDeIdentidade.atual().buscar(Categoria, ("nome", nome))
+        if carregada is not None: return carregada
         dados: DadosCategoria | None = CategoriaDAO.instance().buscar_por_nome(NomeCategoriaDAO(nome))
         if dados is None: return None
-        return Categoria.__promote(dados)
+        return Categoria.__promote(dados).__registrar()
 
     @staticmethod
-    def __encontrar_existente_por_nome(nome: str) -> "Categoria":
+    def _encontrar_existente_por_nome(nome: str) -> "Categoria":
         encontrado: Categoria | None = Categoria.__encontrar_por_nome(nome)
         if encontrado is None: raise CategoriaNaoExisteException()
         return encontrado
@@ -81,30 +96,41 @@ class Categoria:
         if talvez is not None: raise CategoriaJaExisteException()
 
     @staticmethod
-    def __criar(nome: str) -> "Categoria":
+    def _criar(nome: str) -> "Categoria":
         Categoria.__nao_existente_por_nome(nome)
         pk: CategoriaPK = CategoriaDAO.instance().criar(DadosCategoriaSemPK(nome))
         return Categoria(pk.pk_categoria, nome)
 
     @staticmethod
-    def __listar() -> list["Categoria"]:
-        return [Categoria.__promote(c) for c in CategoriaDAO.instance().listar()]
+    def _listar(pagina: Pagina) -> list["Categoria"]:
+        return [Categoria.__promote(c) for c in CategoriaDAO.instance().listar(pagina)]
 
     # Exportado para a classe Segredo.
     @staticmethod
     def listar_por_segredo(pk: SegredoPK) -> dict[str, "Categoria"]:
-        return {c.nome: Categoria.__promote(c) for c in CategoriaDAO.instance().listar_por_segredo(pk)}
+        return Categoria.mapear_todos(CategoriaDAO.instance().listar_por_segredo(pk))
 
+    # Exportado para a classe Segredo.
     @staticmethod
-    def __mapear_todos(dados: list[DadosCategoria]) -> dict[str, "Categoria"]:
-        return {c.nome: Categoria.__promote(c) for c in dados}
+    def mapear_todos(dados: list[DadosCategoria]) -> dict[str, "Categoria"]:
+        return {c.nome: Categoria.__promote(c).__registrar() for c in dados}
 
     # Exportado para a classe Segredo.
     @staticmethod
     def listar_por_nomes(nomes: set[str]) -> dict[str, "Categoria"]:
-        dl: list[NomeCategoriaDAO] = NomeCategoriaDAO.para_todos(nomes)
-        dados: list[DadosCategoria] = CategoriaDAO.instance().listar_por_nomes(dl)
-        r: dict[str, Categoria] = Categoria.__mapear_todos(dados)
+        mapa: MapaDeIdentidade = MapaDeIdentidade.atual()
+        r: dict[str, Categoria] = {}
+        faltando: set[str] = set()
+        for nome in nomes:
+            carregada: Categoria | None = mapa.buscar(Categoria, ("nome", nome))
+            if carregada is None:
+                faltando.add(nome)
+            else:
+                r[nome] = carregada
+
+        if len(faltando) > 0:
+            dl: list[NomeCategoriaDAO] = NomeCategoriaDAO.para_todos(faltando)
+            r.update(Categoria.mapear_todos(CategoriaDAO.instance().listar_por_nomes(dl)))
 
         if len(r) != len(nomes):
             for nome in nomes:
@@ -127,24 +153,25 @@ class Categoria:
 
         def buscar_por_nome(self, quem_faz: ChaveUsuario, dados: NomeCategoria) -> CategoriaComChave:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            return Categoria.__encontrar_existente_por_nome(dados.nome).__up
+            return Categoria._encontrar_existente_por_nome(dados.nome)._up
 
         def buscar_por_chave(self, quem_faz: ChaveUsuario, chave: ChaveCategoria) -> CategoriaComChave:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            return Categoria.__encontrar_existente_por_chave(chave).__up
+            return Categoria._encontrar_existente_por_chave(chave)._up
 
         def criar(self, quem_faz: ChaveUsuario, dados: NomeCategoria) -> CategoriaComChave:
             quem_eh: Usuario = Usuario.verificar_acesso_admin(quem_faz)
-            return Categoria.__criar(dados.nome).__up
+            return Categoria._criar(dados.nome)._up
 
         def renomear_por_nome(self, quem_faz: ChaveUsuario, dados: RenomeCategoria) -> None:
             quem_eh: Usuario = Usuario.verificar_acesso_admin(quem_faz)
-            Categoria.__encontrar_existente_por_nome(dados.antigo).__renomear(dados.novo)
+            Categoria._encontrar_existente_por_nome(dados.antigo)._renomear(dados.novo)
 
         def excluir_por_nome(self, quem_faz: ChaveUsuario, dados: NomeCategoria) -> None:
             quem_eh: Usuario = Usuario.verificar_acesso_admin(quem_faz)
-            Categoria.__encontrar_existente_por_nome(dados.nome).__excluir()
+            Categoria._encontrar_existente_por_nome(dados.nome)._excluir()
 
-        def listar(self, quem_faz: ChaveUsuario) -> ResultadoListaDeCategorias:
+        def listar(self, quem_faz: ChaveUsuario, paginacao: Paginacao) -> ResultadoListaDeCategorias:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            return ResultadoListaDeCategorias([x.__up for x in Categoria.__listar()])
\ No newline at end of file
+            categorias, continuacao = paginar(Categoria._listar(pagina_dao(paginacao)), paginacao, lambda c: c.pk_categoria) # Pode lançar ValorIncorretoException
+            return ResultadoListaDeCategorias([x._up for x in categorias], continuacao)
\ No newline at end of file
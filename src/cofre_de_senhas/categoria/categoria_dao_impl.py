@@ -1,5 +1,6 @@
+from connection.conn import InList
 from cofre_de_senhas.bd.raiz import Raiz
-from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria
+from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria, Pagina
 
 class CategoriaDAOImpl(CategoriaDAO):
 
@@ -14,22 +15,24 @@ class CategoriaDAOImpl(CategoriaDAO):
         return Raiz.instance().fetchone_class(DadosCategoria)
 
     def listar_por_pks(self, pks: list[CategoriaPK]) -> list[DadosCategoria]:
-        wildcards: str = ", ".join(["?" for pk in pks])
-        ns: list[int] = [pk.pk_categoria for pk in pks]
-        sql = f"SELECT pk_categoria, nome FROM categoria WHERE pk_categoria IN ({wildcards}) ORDER BY pk_categoria"
-        Raiz.instance().execute(sql, ns)
+        wildcards: InList = Raiz.instance().in_list([pk.pk_categoria for pk in pks])
+        sql = f"SELECT pk_categoria, nome FROM categoria WHERE pk_categoria IN {wildcards.sql} ORDER BY pk_categoria"
+        Raiz.instance().execute(sql, wildcards.parameters)
         return Raiz.instance().fetchall_class(DadosCategoria)
 
-    def listar(self) -> list[DadosCategoria]:
-        sql: str = "SELECT c.pk_categoria, c.nome FROM categoria c ORDER BY pk_categoria"
-        Raiz.instance().execute(sql)
+    def listar(self, pagina: Pagina | None = None) -> list[DadosCategoria]:
+        if pagina is None:
+            sql: str = "SELECT c.pk_categoria, c.nome FROM categoria c ORDER BY pk_categoria"
+            Raiz.instance().execute(sql)
+        else:
+            sql = "SELECT c.pk_categoria, c.nome FROM categoria c WHERE c.pk_categoria > ? ORDER BY pk_categoria LIMIT ?"
+            Raiz.instance().execute(sql, [pagina.apos, pagina.limite])
         return Raiz.instance().fetchall_class(DadosCategoria)
 
     def listar_por_nomes(self, nomes: list[NomeCategoria]) -> list[DadosCategoria]:
-        wildcards: str = ", ".join(["?" for nome in nomes])
-        ns: list[str] = [nome.valor for nome in nomes]
-        sql: str = f"SELECT pk_categoria, nome FROM categoria WHERE nome IN ({wildcards}) ORDER BY pk_categoria"
-        Raiz.instance().execute(sql, ns)
+        wildcards: InList = Raiz.instance().in_list([nome.valor for nome in nomes])
+        sql: str = f"SELECT pk_categoria, nome FROM categoria WHERE nome IN {wildcards.sql} ORDER BY pk_categoria"
+        Raiz.instance().execute(sql, wildcards.parameters)
         return Raiz.instance().fetchall_class(DadosCategoria)
 
     def criar(self, dados: DadosCategoriaSemPK) -> CategoriaPK:
@@ -27,6 +27,9 @@ class GerenciadorLoginImpl(GerenciadorLogin):
         if "chave" not in session: raise UsuarioNaoLogadoException()
         return cast(ChaveUsuario, session["chave"])
 
+def ler_paginacao() -> Paginacao:
+    return Paginacao(request.args.get("continuacao"), query_int("tamanho", 20))
+
 gl: GerenciadorLogin = GerenciadorLoginImpl()
 su: ServicoUsuario = ServicoUsuarioImpl(gl)
 sc: ServicoCategoria = ServicoCategoriaImpl(gl)
@@ -50,7 +53,7 @@ def logout() -> None:
 @jsoner
 def listar_usuarios() -> ResultadoListaDeUsuarios:
     bodyless()
-    return su.listar()
+    return su.listar(ler_paginacao())
 
 @app.route("/usuarios/<int:pk_usuario>")
 @jsoner
@@ -142,7 +145,7 @@ def renomear_categoria(nome: str) -> None:
 @jsoner
 def listar_categorias() -> ResultadoListaDeCategorias:
     bodyless()
-    return sc.listar()
+    return sc.listar(ler_paginacao())
 
 @app.route("/categorias/<nome>", methods = ["DELETE"])
 @empty_json
@@ -182,7 +185,19 @@ def buscar_segredo_por_chave(pk_segredo: int) -> SegredoComChave:
 @jsoner
 def listar_segredos() -> ResultadoPesquisaDeSegredos:
     bodyless()
-    return ss.listar()
+    return ss.listar(ler_paginacao())
+
+@app.route("/segredos/pesquisa")
+@jsoner
+def pesquisar_segredos() -> ResultadoPesquisaDeSegredos:
+    bodyless()
+    dados: PesquisaSegredos = PesquisaSegredos( \
+        request.args.get("q", ""), \
+        request.args.getlist("categoria"), \
+        query_int("pagina", 1), \
+        query_int("tamanho", 20) \
+    )
+    return ss.pesquisar(dados)
 
 #### Front-end
 
@@ -4,6 +4,17 @@ from dataclasses import asdict, dataclass, is_dataclass
 from validator import dataclass_validate
 from decorators.single import Single
 
+@dataclass_validate
+@dataclass(frozen = True)
+class Pagina:
+    apos: int
+    limite: int
+
+    @staticmethod
+    def primeira(limite: int) -> "Pagina":
+        # O menor INTEGER do SQLite e o menor BIGINT do MySQL e do MariaDB. Nenhuma chave primária fica antes dele.
+        return Pagina(-2 ** 63, limite)
+
 @dataclass_validate
 @dataclass(frozen = True)
 class UsuarioPK:
@@ -117,12 +128,39 @@ class BuscaPermissaoPorLogin:
     pfk_segredo: int
     login: str
 
+@dataclass_validate
+@dataclass(frozen = True)
+class AcessoSegredo:
+    existe: bool
+    permitido: bool
+
+@dataclass_validate
+@dataclass(frozen = True)
+class BuscaSegredos:
+    texto: str
+    categorias: list[str]
+    limite: int
+    deslocamento: int
+
+@dataclass_validate
+@dataclass(frozen = True)
+class DadosSegredoCompleto:
+    cabecalho: DadosSegredo
+    campos: list[CampoDeSegredo]
+    usuarios: list[DadosUsuarioComPermissao]
+    categorias: list[DadosCategoria]
+
 class CofreDeSenhasDAO(ABC):
 
     @abstractmethod
     def criar_bd(self) -> None:
         pass
 
+    # Cria o que foi acrescentado ao esquema depois que o banco de dados foi criado. Pode ser chamado a cada inicialização.
+    @abstractmethod
+    def atualizar_bd(self) -> None:
+        pass
+
     @staticmethod
     def register(instance: "CofreDeSenhasDAO") -> None:
         Single.register("CofreDeSenhasDAO", lambda: instance)
@@ -144,7 +182,11 @@ class SegredoDAO(ABC):
         pass
 
     @abstractmethod
-    def listar(self) -> list[DadosSegredo]:
+    def buscar_completo_por_pk(self, pk: SegredoPK) -> DadosSegredoCompleto | None:
+        pass
+
+    @abstractmethod
+    def listar(self, pagina: Pagina | None = None) -> list[DadosSegredo]:
         pass
 
     @abstractmethod
@@ -162,11 +204,15 @@ class SegredoDAO(ABC):
     # Métodos auxiliares.
 
     @abstractmethod
-    def listar_visiveis(self, login: LoginUsuario) -> list[DadosSegredo]:
+    def listar_visiveis(self, login: LoginUsuario, pagina: Pagina | None = None) -> list[DadosSegredo]:
         pass
 
     @abstractmethod
-    def limpar_segredo(self, pk: SegredoPK) -> None:
+    def pesquisar(self, busca: BuscaSegredos) -> list[DadosSegredo]:
+        pass
+
+    @abstractmethod
+    def pesquisar_visiveis(self, login: LoginUsuario, busca: BuscaSegredos) -> list[DadosSegredo]:
         pass
 
     # Categoria de segredo
@@ -175,12 +221,32 @@ class SegredoDAO(ABC):
     def criar_categoria_segredo(self, c: CategoriaDeSegredo) -> None:
         pass
 
+    @abstractmethod
+    def criar_categorias_segredo(self, cs: list[CategoriaDeSegredo]) -> None:
+        pass
+
+    @abstractmethod
+    def deletar_categorias_segredo(self, cs: list[CategoriaDeSegredo]) -> None:
+        pass
+
     # Campos
 
     @abstractmethod
     def criar_campo_segredo(self, campo: CampoDeSegredo) -> None:
         pass
 
+    @abstractmethod
+    def criar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        pass
+
+    @abstractmethod
+    def alterar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        pass
+
+    @abstractmethod
+    def deletar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        pass
+
     @abstractmethod
     def ler_campos_segredo(self, pk: SegredoPK) -> list[CampoDeSegredo]:
         pass
@@ -191,10 +257,31 @@ class SegredoDAO(ABC):
     def criar_permissao(self, permissao: PermissaoDeSegredo) -> None:
         pass
 
+    @abstractmethod
+    def criar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        pass
+
+    @abstractmethod
+    def alterar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        pass
+
+    @abstractmethod
+    def deletar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        pass
+
+    # Os serviços verificam o acesso com verificar_leitura e verificar_escrita. Este continua sendo o jeito de ler uma permissão isolada, como fazem os testes do DAO.
     @abstractmethod
     def buscar_permissao(self, busca: BuscaPermissaoPorLogin) -> PermissaoDeSegredo | None:
         pass
 
+    @abstractmethod
+    def verificar_leitura(self, busca: BuscaPermissaoPorLogin) -> AcessoSegredo:
+        pass
+
+    @abstractmethod
+    def verificar_escrita(self, busca: BuscaPermissaoPorLogin) -> AcessoSegredo:
+        pass
+
     @staticmethod
     def register(instance: "SegredoDAO") -> None:
         return Single.register("SegredoDAO", lambda: instance)
@@ -216,7 +303,7 @@ class CategoriaDAO:
         pass
 
     @abstractmethod
-    def listar(self) -> list[DadosCategoria]:
+    def listar(self, pagina: Pagina | None = None) -> list[DadosCategoria]:
         pass
 
     @abstractmethod
@@ -274,7 +361,7 @@ class UsuarioDAO:
         pass
 
     @abstractmethod
-    def listar(self) -> list[DadosUsuario]:
+    def listar(self, pagina: Pagina | None = None) -> list[DadosUsuario]:
         pass
 
     @abstractmethod
@@ -49,4 +49,9 @@ class CategoriaNaoExisteException(Exception, Status):
 class SegredoNaoExisteException(Exception, Status):
     @property
     def status(self) -> int:
-        return 404
\ No newline at end of file
+        return 404
+
+class ValorIncorretoException(Exception, Status):
+    @property
+    def status(self) -> int:
+        return 422
\ No newline at end of file
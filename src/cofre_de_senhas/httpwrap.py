@@ -151,6 +151,18 @@ def bodyless() -> None:
     content_type: str | None = request.headers.get("Content-Type")
     if content_type is not None: raise RequisicaoMalFormadaException()
 
+def query_int(name: str, default: int) -> int:
+    """
+    Lê um parâmetro inteiro da query string, usando o valor padrão se ele não tiver sido informado.
+    Caso o valor não seja um número inteiro, uma exceção que causará um erro 400 será lançada.
+    """
+    value: str | None = request.args.get(name)
+    if value is None: return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RequisicaoMalFormadaException()
+
 def move() -> tuple[str, bool]:
     dest: str | None = request.headers.get("Destination")
     if dest is None: raise RequisicaoMalFormadaException()
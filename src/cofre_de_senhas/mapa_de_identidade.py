@@ -0,0 +1,41 @@
+from typing import Any, cast, Hashable, TypeVar
+from connection.trans import TransactedConnection
+from cofre_de_senhas.bd.raiz import Raiz
+
+_T = TypeVar("_T")
+
+_NOME: str = "mapa_de_identidade"
+
+class MapaDeIdentidade:
+    """
+    Guarda os objetos de domínio já carregados na transação corrente, por tipo e chave, para que não sejam lidos de novo do banco de dados.
+    Vive apenas enquanto a transação estiver ativa, e por isso nunca devolve algo que outra transação possa ter alterado.
+    """
+
+    def __init__(self) -> None:
+        self.__objetos: dict[tuple[type, Hashable], Any] = {}
+
+    def buscar(self, tipo: type[_T], chave: Hashable) -> _T | None:
+        return cast(_T | None, self.__objetos.get((tipo, chave)))
+
+    def guardar(self, objeto: _T, *chaves: Hashable) -> _T:
+        for chave in chaves:
+            self.__objetos[(type(objeto), chave)] = objeto
+        return objeto
+
+    def remover(self, tipo: type, *chaves: Hashable) -> None:
+        for chave in chaves:
+            self.__objetos.pop((tipo, chave), None)
+
+    def limpar(self) -> None:
+        self.__objetos.clear()
+
+    def __len__(self) -> int:
+        return len(self.__objetos)
+
+    @staticmethod
+    def atual() -> "MapaDeIdentidade":
+        conn: TransactedConnection = Raiz.instance()
+        # Fora de uma transação não há o que reaproveitar: o mapa devolvido é descartado logo depois de usado.
+        if not conn.is_active: return MapaDeIdentidade()
+        return conn.transaction_local(_NOME, MapaDeIdentidade)
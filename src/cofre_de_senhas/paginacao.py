@@ -0,0 +1,40 @@
+from typing import Callable, TypeVar
+from cofre_de_senhas.dao import Pagina
+from cofre_de_senhas.erro import ValorIncorretoException
+from cofre_de_senhas.service import Paginacao
+import base64
+
+_T = TypeVar("_T")
+
+TAMANHO_MAXIMO_PAGINA: int = 100
+
+# A continuação é a chave primária do último item da página, em base64 para que o cliente a trate como um valor opaco.
+
+def _codificar(pk: int) -> str:
+    return base64.urlsafe_b64encode(str(pk).encode("ascii")).decode("ascii").rstrip("=")
+
+def _decodificar(continuacao: str) -> int:
+    try:
+        pk: int = int(base64.urlsafe_b64decode(continuacao + "=" * (-len(continuacao) % 4)).decode("ascii"))
+    except ValueError:
+        raise ValorIncorretoException()
+    # As chaves primárias são inteiros de 64 bits. Um valor maior nem chegaria a ser aceito pelo banco de dados.
+    if not -2 ** 63 <= pk < 2 ** 63: raise ValorIncorretoException()
+    return pk
+
+def pagina_dao(paginacao: Paginacao) -> Pagina:
+    """
+    Converte a paginação pedida pelo cliente na do DAO. Pede um item a mais do que cabe na página, para saber se há uma próxima.
+    Pode lançar ValorIncorretoException se o tamanho estiver fora dos limites ou se a continuação não for reconhecida.
+    """
+    if not 1 <= paginacao.tamanho <= TAMANHO_MAXIMO_PAGINA: raise ValorIncorretoException()
+    if paginacao.continuacao is None: return Pagina.primeira(paginacao.tamanho + 1)
+    return Pagina(_decodificar(paginacao.continuacao), paginacao.tamanho + 1)
+
+def paginar(itens: list[_T], paginacao: Paginacao, pk: Callable[[_T], int]) -> tuple[list[_T], str | None]:
+    """
+    Corta o item a mais trazido por causa de pagina_dao e devolve a página junto com a continuação, que é None na última página.
+    """
+    if len(itens) <= paginacao.tamanho: return itens, None
+    pagina: list[_T] = itens[:paginacao.tamanho]
+    return pagina, _codificar(pk(pagina[-1]))
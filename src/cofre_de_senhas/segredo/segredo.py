@@ -1,10 +1,23 @@
-from typing import Self, TypeGuard
+from typing import Self, TypeGuard, TypeVar
 from validator import dataclass_validate
 from dataclasses import dataclass, replace
-from cofre_de_senhas.dao import SegredoDAO, SegredoPK, DadosSegredo, DadosSegredoSemPK, LoginUsuario as LoginUsuarioDAO, CategoriaDeSegredo, CampoDeSegredo, PermissaoDeSegredo, BuscaPermissaoPorLogin
+from cofre_de_senhas.dao import SegredoDAO, SegredoPK, DadosSegredo, DadosSegredoCompleto, DadosSegredoSemPK, LoginUsuario as LoginUsuarioDAO, CategoriaDeSegredo, CampoDeSegredo, PermissaoDeSegredo, BuscaPermissaoPorLogin, AcessoSegredo, BuscaSegredos, Pagina
 from cofre_de_senhas.service import *
 from cofre_de_senhas.usuario.usuario import Usuario, Permissao
 from cofre_de_senhas.categoria.categoria import Categoria
+from cofre_de_senhas.paginacao import pagina_dao, paginar, TAMANHO_MAXIMO_PAGINA
+from cofre_de_senhas.mapa_de_identidade import MapaDeIdentidade
+
+_T = TypeVar("_T")
+
+def _diferenca(antes: dict[str, _T], depois: dict[str, _T]) -> tuple[list[_T], list[_T], list[_T]]:
+    """
+    Compara os dois dicionários pelas chaves e devolve os itens removidos (de antes), os incluídos (de depois) e os alterados (de depois).
+    """
+    removidos: list[_T] = [v for k, v in antes.items() if k not in depois]
+    incluidos: list[_T] = [v for k, v in depois.items() if k not in antes]
+    alterados: list[_T] = [v for k, v in depois.items() if k in antes and antes[k] != v]
+    return removidos, incluidos, alterados
 
 @dataclass_validate
 @dataclass(frozen = True)
@@ -22,10 +35,6 @@ class Segredo:
         descricao: str
         tipo_segredo: TipoSegredo
 
-        def _excluir(self) -> Self:
-            SegredoDAO.instance().deletar_por_pk(self.pk)
-            return self
-
         # Exportado para a classe Usuario.
         @property
         def pk(self) -> SegredoPK:
@@ -43,36 +52,54 @@ class Segredo:
         def _promote(dados: DadosSegredo) -> "Segredo.Cabecalho":
             return Segredo.Cabecalho(dados.pk_segredo, dados.nome, dados.descricao, TipoSegredo(dados.fk_tipo_segredo))
 
-    def __salvar(self) -> Self:
-        SegredoDAO.instance().salvar_com_pk(self.__down)
-        return self.__salvar_dados_internos()
+    def __salvar_alteracoes(self, antes: "Segredo") -> Self:
+        # Apenas as linhas que mudaram são gravadas, em um lote por tabela, para não reescrever tudo a cada alteração.
+        dao: SegredoDAO = SegredoDAO.instance()
+        spk: int = self.__pk.pk_segredo
+        if self.cabecalho != antes.cabecalho: dao.salvar_com_pk(self.__down)
+
+        campos_antes: dict[str, CampoDeSegredo] = {n: CampoDeSegredo(spk, n, v) for n, v in antes.campos.items()}
+        campos_depois: dict[str, CampoDeSegredo] = {n: CampoDeSegredo(spk, n, v) for n, v in self.campos.items()}
+        removidos_c, incluidos_c, alterados_c = _diferenca(campos_antes, campos_depois)
+        dao.deletar_campos_segredo(removidos_c)
+        dao.alterar_campos_segredo(alterados_c)
+        dao.criar_campos_segredo(incluidos_c)
+
+        permissoes_antes: dict[str, PermissaoDeSegredo] = {k: PermissaoDeSegredo(p.usuario.pk_usuario, spk, p.tipo.value) for k, p in antes.usuarios.items()}
+        permissoes_depois: dict[str, PermissaoDeSegredo] = {k: PermissaoDeSegredo(p.usuario.pk_usuario, spk, p.tipo.value) for k, p in self.usuarios.items()}
+        removidos_p, incluidos_p, alterados_p = _diferenca(permissoes_antes, permissoes_depois)
+        dao.deletar_permissoes(removidos_p)
+        dao.alterar_permissoes(alterados_p)
+        dao.criar_permissoes(incluidos_p)
+
+        categorias_antes: dict[str, CategoriaDeSegredo] = {k: CategoriaDeSegredo(spk, c.pk_categoria) for k, c in antes.categorias.items()}
+        categorias_depois: dict[str, CategoriaDeSegredo] = {k: CategoriaDeSegredo(spk, c.pk_categoria) for k, c in self.categorias.items()}
+        removidos_k, incluidos_k, alterados_k = _diferenca(categorias_antes, categorias_depois)
+        dao.deletar_categorias_segredo(removidos_k + alterados_k)
+        dao.criar_categorias_segredo(incluidos_k + alterados_k)
 
-    def __limpar(self) -> None:
-        spk: SegredoPK = self.__pk
-        SegredoDAO.instance().limpar_segredo(spk)
+        return self
 
     def __criar_campos(self) -> None:
         spk: SegredoPK = self.__pk
-        for descricao in self.campos.keys():
-            valor: str = self.campos[descricao]
-            SegredoDAO.instance().criar_campo_segredo(CampoDeSegredo(spk.pk_segredo, descricao, valor))
+        campos: list[CampoDeSegredo] = [CampoDeSegredo(spk.pk_segredo, descricao, valor) for descricao, valor in self.campos.items()]
+        SegredoDAO.instance().criar_campos_segredo(campos)
 
     def __criar_permissoes(self) -> None:
         spk: SegredoPK = self.__pk
-        for permissao in self.usuarios.values():
-            SegredoDAO.instance().criar_permissao(PermissaoDeSegredo(permissao.usuario.pk.pk_usuario, spk.pk_segredo, permissao.tipo.value))
+        permissoes: list[PermissaoDeSegredo] = [PermissaoDeSegredo(p.usuario.pk.pk_usuario, spk.pk_segredo, p.tipo.value) for p in self.usuarios.values()]
+        SegredoDAO.instance().criar_permissoes(permissoes)
 
     def __criar_categorias(self) -> None:
         spk: SegredoPK = self.__pk
-        for categoria in self.categorias.values():
-            SegredoDAO.instance().criar_categoria_segredo(CategoriaDeSegredo(spk.pk_segredo, categoria.pk.pk_categoria))
+        cs: list[CategoriaDeSegredo] = [CategoriaDeSegredo(spk.pk_segredo, c.pk.pk_categoria) for c in self.categorias.values()]
+        SegredoDAO.instance().criar_categorias_segredo(cs)
 
     def __salvar_dados_internos(self) -> Self:
         assert self.usuarios is not None
         assert self.categorias is not None
         assert self.campos is not None
 
-        self.__limpar()
         self.__criar_campos()
         self.__criar_permissoes()
         self.__criar_categorias()
@@ -83,7 +110,10 @@ class Segredo:
         permissoes: dict[str, Permissao] = Segredo.__mapear_permissoes(dados.usuarios)
         categorias: dict[str, Categoria] = Categoria.listar_por_nomes(dados.categorias)
         c: Segredo.Cabecalho = replace(self.cabecalho, nome = dados.nome, descricao = dados.descricao, tipo_segredo = dados.tipo)
-        return replace(self, cabecalho = c, campos = dados.campos, categorias = categorias, usuarios = permissoes).__salvar()
+        return replace(self, cabecalho = c, campos = dados.campos, categorias = categorias, usuarios = permissoes).__salvar_alteracoes(self).__registrar()
+
+    def __registrar(self) -> Self:
+        return MapaDeIdentidade.atual().guardar(self, ("pk", self.cabecalho.pk_segredo))
 
     #@property
     #def __chave(self) -> ChaveSegredo:
@@ -106,14 +136,6 @@ class Segredo:
     def __down(self) -> DadosSegredo:
         return  self.cabecalho._down
 
-    def _permitir_escrita_para(self, acesso: Usuario) -> None:
-        if acesso.is_admin: return
-        busca: BuscaPermissaoPorLogin = BuscaPermissaoPorLogin(self.__pk.pk_segredo, acesso.login)
-        permissao_encontrada: PermissaoDeSegredo | None = SegredoDAO.instance().buscar_permissao(busca)
-        if permissao_encontrada is None: raise PermissaoNegadaException()
-        permissao: TipoPermissao = TipoPermissao(permissao_encontrada.fk_tipo_permissao)
-        if permissao not in [TipoPermissao.LEITURA_E_ESCRITA, TipoPermissao.PROPRIETARIO]: raise PermissaoNegadaException()
-
     # Métodos internos
 
     @staticmethod
@@ -132,14 +154,15 @@ class Segredo:
 
     @staticmethod
     def __encontrar_por_chave(chave: ChaveSegredo) -> "Segredo | None":
-        dados: DadosSegredo | None = SegredoDAO.instance().buscar_por_pk(SegredoPK(chave.valor))
+        carregado: Segredo | None = MapaDeIdentidade.atual().buscar(Segredo, ("pk", chave.valor))
+        if carregado is not None: return carregado
+        dados: DadosSegredoCompleto | None = SegredoDAO.instance().buscar_completo_por_pk(SegredoPK(chave.valor))
         if dados is None: return None
-        cabecalho: Segredo.Cabecalho = Segredo.Cabecalho._promote(dados)
-        spk: SegredoPK = cabecalho.pk
-        campos: dict[str, str] = {c.pk_nome: c.valor for c in SegredoDAO.instance().ler_campos_segredo(spk)}
-        usuarios: dict[str, Permissao] = Usuario.listar_por_permissao(cabecalho)
-        categorias: dict[str, Categoria] = Categoria.listar_por_segredo(spk)
-        return Segredo(cabecalho, usuarios, categorias, campos)
+        cabecalho: Segredo.Cabecalho = Segredo.Cabecalho._promote(dados.cabecalho)
+        campos: dict[str, str] = {c.pk_nome: c.valor for c in dados.campos}
+        usuarios: dict[str, Permissao] = Usuario.mapear_permissoes(dados.usuarios)
+        categorias: dict[str, Categoria] = Categoria.mapear_todos(dados.categorias)
+        return Segredo(cabecalho, usuarios, categorias, campos).__registrar()
 
     @staticmethod
     def _encontrar_existente_por_chave(chave: ChaveSegredo) -> "Segredo":
@@ -147,6 +170,20 @@ class Segredo:
         if encontrado is None: raise SegredoNaoExisteException()
         return encontrado
 
+    # As verificações de acesso são feitas antes de carregar o segredo, para que pedidos negados ou de segredos inexistentes custem uma única consulta barata.
+
+    @staticmethod
+    def _verificar_leitura(acesso: Usuario, chave: ChaveSegredo) -> None:
+        if acesso.is_admin: return
+        a: AcessoSegredo = SegredoDAO.instance().verificar_leitura(BuscaPermissaoPorLogin(chave.valor, acesso.login))
+        if not a.permitido: raise SegredoNaoExisteException()
+
+    @staticmethod
+    def _verificar_escrita(acesso: Usuario, chave: ChaveSegredo) -> None:
+        a: AcessoSegredo = SegredoDAO.instance().verificar_escrita(BuscaPermissaoPorLogin(chave.valor, acesso.login))
+        if not a.existe: raise SegredoNaoExisteException()
+        if not acesso.is_admin and not a.permitido: raise PermissaoNegadaException()
+
     # Métodos estáticos de fábrica.
 
     @staticmethod
@@ -162,20 +199,28 @@ class Segredo:
         categorias: dict[str, Categoria] = Categoria.listar_por_nomes(dados.categorias)
 
         rowid: SegredoPK = SegredoDAO.instance().criar(DadosSegredoSemPK(dados.nome, dados.descricao, dados.tipo.value))
-        return Segredo(Segredo.Cabecalho(rowid.pk_segredo, dados.nome, dados.descricao, dados.tipo), permissoes, categorias, dados.campos).__salvar_dados_internos()
+        return Segredo(Segredo.Cabecalho(rowid.pk_segredo, dados.nome, dados.descricao, dados.tipo), permissoes, categorias, dados.campos).__salvar_dados_internos().__registrar()
+
+    @staticmethod
+    def __listar_todos(pagina: Pagina) -> list["Segredo.Cabecalho"]:
+        return [Segredo.Cabecalho._promote(s) for s in SegredoDAO.instance().listar(pagina)]
 
     @staticmethod
-    def __listar_todos() -> list["Segredo.Cabecalho"]:
-        return [Segredo.Cabecalho._promote(s) for s in SegredoDAO.instance().listar()]
+    def __listar_visiveis(quem_faz: Usuario, pagina: Pagina) -> list["Segredo.Cabecalho"]:
+        return [Segredo.Cabecalho._promote(s) for s in SegredoDAO.instance().listar_visiveis(LoginUsuarioDAO(quem_faz.login), pagina)]
 
     @staticmethod
-    def __listar_visiveis(quem_faz: Usuario) -> list["Segredo.Cabecalho"]:
-        return [Segredo.Cabecalho._promote(s) for s in SegredoDAO.instance().listar_visiveis(LoginUsuarioDAO(quem_faz.login))]
+    def _listar(quem_faz: Usuario, pagina: Pagina) -> list["Segredo.Cabecalho"]:
+        if quem_faz.is_admin: return Segredo.__listar_todos(pagina)
+        return Segredo.__listar_visiveis(quem_faz, pagina)
 
     @staticmethod
-    def _listar(quem_faz: Usuario) -> list["Segredo.Cabecalho"]:
-        if quem_faz.is_admin: return Segredo.__listar_todos()
-        return Segredo.__listar_visiveis(quem_faz)
+    def _pesquisar(quem_faz: Usuario, dados: PesquisaSegredos) -> list["Segredo.Cabecalho"]:
+        if dados.pagina < 1 or not 1 <= dados.tamanho_pagina <= TAMANHO_MAXIMO_PAGINA: raise ValorIncorretoException()
+        busca: BuscaSegredos = BuscaSegredos(dados.nome, dados.categorias, dados.tamanho_pagina, (dados.pagina - 1) * dados.tamanho_pagina)
+        encontrados: list[DadosSegredo] = SegredoDAO.instance().pesquisar(busca) if quem_faz.is_admin \
+                else SegredoDAO.instance().pesquisar_visiveis(LoginUsuarioDAO(quem_faz.login), busca)
+        return [Segredo.Cabecalho._promote(s) for s in encontrados]
 
     class Servico:
 
@@ -196,28 +241,28 @@ class Segredo:
         @staticmethod
         def alterar_por_chave(quem_faz: ChaveUsuario, dados: SegredoComChave) -> None:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            segredo: Segredo = Segredo._encontrar_existente_por_chave(dados.chave) # Pode lançar SegredoNaoExisteException
-            segredo._permitir_escrita_para(quem_eh)
+            Segredo._verificar_escrita(quem_eh, dados.chave) # Pode lançar SegredoNaoExisteException ou PermissaoNegadaException
+            segredo: Segredo = Segredo._encontrar_existente_por_chave(dados.chave)
             segredo._alterar(dados.sem_chave)
 
         @staticmethod
         def excluir_por_chave(quem_faz: ChaveUsuario, dados: ChaveSegredo) -> None:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            segredo: Segredo = Segredo._encontrar_existente_por_chave(dados) # Pode lançar SegredoNaoExisteException
-            segredo._permitir_escrita_para(quem_eh)
-            segredo.cabecalho._excluir()
+            Segredo._verificar_escrita(quem_eh, dados) # Pode lançar SegredoNaoExisteException ou PermissaoNegadaException
+            SegredoDAO.instance().deletar_por_pk(SegredoPK(dados.valor))
+            MapaDeIdentidade.atual().remover(Segredo, ("pk", dados.valor))
 
         @staticmethod
-        def listar(quem_faz: ChaveUsuario) -> ResultadoPesquisaDeSegredos:
+        def listar(quem_faz: ChaveUsuario, paginacao: Paginacao) -> ResultadoPesquisaDeSegredos:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            return ResultadoPesquisaDeSegredos([x._up for x in Segredo._listar(quem_eh)])
+            segredos, continuacao = paginar(Segredo._listar(quem_eh, pagina_dao(paginacao)), paginacao, lambda s: s.pk_segredo) # Pode lançar ValorIncorretoException
+            return ResultadoPesquisaDeSegredos([x._up for x in segredos], continuacao)
 
         @staticmethod
         def buscar(quem_faz: ChaveUsuario, chave: ChaveSegredo) -> SegredoComChave:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            segredo: Segredo = Segredo._encontrar_existente_por_chave(chave) # Pode lançar SegredoNaoExisteException
-            if not quem_eh.is_admin and quem_eh.login not in segredo.usuarios.keys(): raise SegredoNaoExisteException()
-            return segredo._up_eager
+            Segredo._verificar_leitura(quem_eh, chave) # Pode lançar SegredoNaoExisteException
+            return Segredo._encontrar_existente_por_chave(chave)._up_eager # Pode lançar SegredoNaoExisteException
 
         @staticmethod
         def buscar_sem_logar(chave: ChaveSegredo) -> SegredoComChave:
@@ -226,4 +271,4 @@ class Segredo:
         @staticmethod
         def pesquisar(quem_faz: ChaveUsuario, dados: PesquisaSegredos) -> ResultadoPesquisaDeSegredos:
             quem_eh: Usuario = Usuario.verificar_acesso(quem_faz)
-            raise NotImplementedError()
\ No newline at end of file
+            return ResultadoPesquisaDeSegredos([x._up for x in Segredo._pesquisar(quem_eh, dados)]) # Pode lançar ValorIncorretoException
\ No newline at end of file
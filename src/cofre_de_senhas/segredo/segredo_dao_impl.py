@@ -1,7 +1,13 @@
+from typing import Any
+from connection.conn import InList
 from cofre_de_senhas.bd.raiz import Raiz
 from cofre_de_senhas.dao import \
     SegredoDAO, SegredoPK, UsuarioPK, CategoriaPK, DadosSegredo, DadosSegredoSemPK, CampoDeSegredo, \
-    LoginUsuario, CategoriaDeSegredo, PermissaoDeSegredo, BuscaPermissaoPorLogin
+    LoginUsuario, CategoriaDeSegredo, PermissaoDeSegredo, BuscaPermissaoPorLogin, \
+    DadosSegredoCompleto, DadosUsuarioComPermissao, DadosCategoria, AcessoSegredo, BuscaSegredos, Pagina
+from cofre_de_senhas.service import TipoPermissao
+import json
+import re
 
 class SegredoDAOImpl(SegredoDAO):
 
@@ -15,9 +21,43 @@ class SegredoDAOImpl(SegredoDAO):
         Raiz.instance().execute(sql, [pk.pk_segredo])
         return Raiz.instance().fetchone_class(DadosSegredo)
 
-    def listar(self) -> list[DadosSegredo]:
-        sql: str = "SELECT pk_segredo, nome, descricao, fk_tipo_segredo FROM segredo ORDER BY pk_segredo"
-        Raiz.instance().execute(sql)
+    def buscar_completo_por_pk(self, pk: SegredoPK) -> DadosSegredoCompleto | None:
+        # Os campos, as permissões e as categorias vêm agregados em arrays JSON de arrays, em uma única consulta.
+        sql: str = "" \
+            + "SELECT s.pk_segredo, s.nome, s.descricao, s.fk_tipo_segredo, " \
+            + "(SELECT json_group_array(json_array(c.pk_nome, c.valor)) FROM (" \
+            +     "SELECT pk_nome, valor FROM campo_segredo WHERE pfk_segredo = s.pk_segredo ORDER BY pk_nome" \
+            + ") c) AS campos, " \
+            + "(SELECT json_group_array(json_array(u.pk_usuario, u.login, u.fk_nivel_acesso, u.hash_com_sal, u.fk_tipo_permissao)) FROM (" \
+            +     "SELECT u.pk_usuario, u.login, u.fk_nivel_acesso, u.hash_com_sal, p.fk_tipo_permissao " \
+            +     "FROM usuario u INNER JOIN permissao p ON u.pk_usuario = p.pfk_usuario " \
+            +     "WHERE p.pfk_segredo = s.pk_segredo ORDER BY u.pk_usuario" \
+            + ") u) AS usuarios, " \
+            + "(SELECT json_group_array(json_array(c.pk_categoria, c.nome)) FROM (" \
+            +     "SELECT c.pk_categoria, c.nome " \
+            +     "FROM categoria c INNER JOIN categoria_segredo cs ON c.pk_categoria = cs.pfk_categoria " \
+            +     "WHERE cs.pfk_segredo = s.pk_segredo ORDER BY c.pk_categoria" \
+            + ") c) AS categorias " \
+            + "FROM segredo s " \
+            + "WHERE s.pk_segredo = ?"
+        Raiz.instance().execute(sql, [pk.pk_segredo])
+        row: tuple[Any, ...] | None = Raiz.instance().fetchone()
+        if row is None: return None
+        cabecalho: DadosSegredo = DadosSegredo(row[0], row[1], row[2], row[3])
+        return DadosSegredoCompleto( \
+            cabecalho, \
+            [CampoDeSegredo(cabecalho.pk_segredo, *c) for c in json.loads(row[4])], \
+            [DadosUsuarioComPermissao(*u) for u in json.loads(row[5])], \
+            [DadosCategoria(*c) for c in json.loads(row[6])] \
+        )
+
+    def listar(self, pagina: Pagina | None = None) -> list[DadosSegredo]:
+        if pagina is None:
+            sql: str = "SELECT pk_segredo, nome, descricao, fk_tipo_segredo FROM segredo ORDER BY pk_segredo"
+            Raiz.instance().execute(sql)
+        else:
+            sql = "SELECT pk_segredo, nome, descricao, fk_tipo_segredo FROM segredo WHERE pk_segredo > ? ORDER BY pk_segredo LIMIT ?"
+            Raiz.instance().execute(sql, [pagina.apos, pagina.limite])
         return Raiz.instance().fetchall_class(DadosSegredo)
 
     def criar(self, dados: DadosSegredoSemPK) -> SegredoPK:
@@ -30,40 +70,85 @@ class SegredoDAOImpl(SegredoDAO):
         Raiz.instance().execute(sql, [dados.pk_segredo, dados.nome, dados.descricao, dados.fk_tipo_segredo, dados.pk_segredo])
 
     def deletar_por_pk(self, pk: SegredoPK) -> None:
-        # self.limpar_segredo(pk) # Desnecessário, pois deleta nas outras tabelas graças ao ON DELETE CASCADE.
+        # Os campos, as permissões e as categorias do segredo são deletados graças ao ON DELETE CASCADE.
         sql: str = "DELETE FROM segredo WHERE pk_segredo = ?"
         Raiz.instance().execute(sql, [pk.pk_segredo])
 
     # Métodos auxiliares.
 
-    def listar_visiveis(self, login: LoginUsuario) -> list[DadosSegredo]:
+    def listar_visiveis(self, login: LoginUsuario, pagina: Pagina | None = None) -> list[DadosSegredo]:
+        # Percorre os segredos na ordem da chave primária e para assim que a página estiver cheia, em vez de montar a união inteira antes.
         sql: str = "" \
             + "SELECT s.pk_segredo, s.nome, s.descricao, s.fk_tipo_segredo " \
             + "FROM segredo s " \
-            + "INNER JOIN permissao p ON p.pfk_segredo = s.pk_segredo " \
-            + "INNER JOIN usuario u ON p.pfk_usuario = u.pk_usuario " \
-            + "WHERE u.login = ? AND u.fk_nivel_acesso IN (1, 2)" \
-            + "UNION " \
-            + "SELECT p.pk_segredo, p.nome, p.descricao, p.fk_tipo_segredo " \
-            + "FROM segredo p " \
-            + "WHERE p.fk_tipo_segredo IN (1, 2) " \
-            + "ORDER BY pk_segredo"
-        Raiz.instance().execute(sql, [login.valor])
+            + "WHERE (s.fk_tipo_segredo IN (1, 2) OR EXISTS (" \
+            +     "SELECT 1 FROM permissao p " \
+            +     "INNER JOIN usuario u ON p.pfk_usuario = u.pk_usuario " \
+            +     "WHERE p.pfk_segredo = s.pk_segredo AND u.login = ? AND u.fk_nivel_acesso IN (1, 2)" \
+            + ")) "
+        if pagina is None:
+            Raiz.instance().execute(sql + "ORDER BY s.pk_segredo", [login.valor])
+        else:
+            Raiz.instance().execute(sql + "AND s.pk_segredo > ? ORDER BY s.pk_segredo LIMIT ?", [login.valor, pagina.apos, pagina.limite])
         return Raiz.instance().fetchall_class(DadosSegredo)
 
-    # TESTAR
-    def limpar_segredo(self, pk: SegredoPK) -> None:
-        sql1: str = "DELETE FROM campo_segredo WHERE pfk_segredo = ?"
-        sql2: str = "DELETE FROM permissao WHERE pfk_segredo = ?"
-        sql3: str = "DELETE FROM categoria_segredo WHERE pfk_segredo = ?"
-        Raiz.instance().execute(sql1, [pk.pk_segredo])
-        Raiz.instance().execute(sql2, [pk.pk_segredo])
-        Raiz.instance().execute(sql3, [pk.pk_segredo])
+    def pesquisar(self, busca: BuscaSegredos) -> list[DadosSegredo]:
+        return self.__pesquisar(None, busca)
+
+    def pesquisar_visiveis(self, login: LoginUsuario, busca: BuscaSegredos) -> list[DadosSegredo]:
+        return self.__pesquisar(login, busca)
+
+    @staticmethod
+    def __consulta_fts(texto: str) -> str:
+        # Cada palavra vira um prefixo entre aspas, e assim os operadores do FTS5 digitados pelo usuário não são interpretados.
+        return " ".join(f'"{palavra}"*' for palavra in re.findall(r"\w+", texto))
+
+    def __pesquisar(self, login: LoginUsuario | None, busca: BuscaSegredos) -> list[DadosSegredo]:
+        # Sem login, não há filtro de visibilidade. Com login, aplica as mesmas regras de listar_visiveis.
+        # Sem texto, o índice de texto completo não é usado e os segredos saem na ordem das chaves.
+        consulta: str = SegredoDAOImpl.__consulta_fts(busca.texto)
+        parametros: list[Any] = []
+        sql: str = "SELECT s.pk_segredo, s.nome, s.descricao, s.fk_tipo_segredo "
+        if consulta == "":
+            sql += "FROM segredo s WHERE 1 = 1 "
+        else:
+            sql += "FROM segredo_fts INNER JOIN segredo s ON s.pk_segredo = segredo_fts.rowid WHERE segredo_fts MATCH ? "
+            parametros.append(consulta)
+
+        if login is not None:
+            sql += "" \
+                + "AND (s.fk_tipo_segredo IN (1, 2) OR EXISTS (" \
+                +     "SELECT 1 FROM permissao p " \
+                +     "INNER JOIN usuario u ON p.pfk_usuario = u.pk_usuario " \
+                +     "WHERE p.pfk_segredo = s.pk_segredo AND u.login = ? AND u.fk_nivel_acesso IN (1, 2)" \
+                + ")) "
+            parametros.append(login.valor)
+
+        categorias: list[str] = sorted(set(busca.categorias))
+        if len(categorias) > 0:
+            # O segredo tem que estar em todas as categorias pedidas.
+            wildcards: InList = Raiz.instance().in_list(categorias)
+            sql += "" \
+                + "AND s.pk_segredo IN (" \
+                +     "SELECT cs.pfk_segredo FROM categoria_segredo cs " \
+                +     "INNER JOIN categoria c ON c.pk_categoria = cs.pfk_categoria " \
+                +     f"WHERE c.nome IN {wildcards.sql} " \
+                +     "GROUP BY cs.pfk_segredo HAVING COUNT(*) = ?" \
+                + ") "
+            parametros.extend(wildcards.parameters)
+            parametros.append(len(categorias))
+
+        # Pesos do bm25, na ordem das colunas do índice: nome, descricao, campos e categorias.
+        sql += "ORDER BY s.pk_segredo " if consulta == "" else "ORDER BY bm25(segredo_fts, 10.0, 4.0, 2.0, 1.0), s.pk_segredo "
+        sql += "LIMIT ? OFFSET ?"
+        parametros.extend([busca.limite, busca.deslocamento])
+        Raiz.instance().execute(sql, parametros)
+        return Raiz.instance().fetchall_class(DadosSegredo)
 
     def listar_por_pks(self, pks: list[SegredoPK]) -> list[DadosSegredo]:
-        wildcards: str = ", ".join(["?" for pk in pks])
-        sql: str = f"SELECT pk_segredo, nome, descricao, fk_tipo_segredo FROM segredo WHERE pk_segredo IN ({wildcards}) ORDER BY pk_segredo"
-        Raiz.instance().execute(sql, [pk.pk_segredo for pk in pks])
+        wildcards: InList = Raiz.instance().in_list([pk.pk_segredo for pk in pks])
+        sql: str = f"SELECT pk_segredo, nome, descricao, fk_tipo_segredo FROM segredo WHERE pk_segredo IN {wildcards.sql} ORDER BY pk_segredo"
+        Raiz.instance().execute(sql, wildcards.parameters)
         return Raiz.instance().fetchall_class(DadosSegredo)
 
     #def buscar_por_nomes(self, nomes: list[nome]) -> list[DadosSegredo]:
@@ -83,12 +168,37 @@ class SegredoDAOImpl(SegredoDAO):
         sql: str = "INSERT INTO categoria_segredo (pfk_segredo, pfk_categoria) VALUES (?, ?)"
         Raiz.instance().execute(sql, [c.pk_segredo, c.pk_categoria])
 
+    def criar_categorias_segredo(self, cs: list[CategoriaDeSegredo]) -> None:
+        if len(cs) == 0: return
+        sql: str = "INSERT INTO categoria_segredo (pfk_segredo, pfk_categoria) VALUES (?, ?)"
+        Raiz.instance().executemany(sql, [[c.pk_segredo, c.pk_categoria] for c in cs])
+
+    def deletar_categorias_segredo(self, cs: list[CategoriaDeSegredo]) -> None:
+        if len(cs) == 0: return
+        sql: str = "DELETE FROM categoria_segredo WHERE pfk_segredo = ? AND pfk_categoria = ?"
+        Raiz.instance().executemany(sql, [[c.pk_segredo, c.pk_categoria] for c in cs])
+
     # Campos
 
     def criar_campo_segredo(self, campo: CampoDeSegredo) -> None:
         sql: str = "INSERT INTO campo_segredo (pfk_segredo, pk_nome, valor) VALUES (?, ?, ?)"
         Raiz.instance().execute(sql, [campo.pfk_segredo, campo.pk_nome, campo.valor])
 
+    def criar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        if len(campos) == 0: return
+        sql: str = "INSERT INTO campo_segredo (pfk_segredo, pk_nome, valor) VALUES (?, ?, ?)"
+        Raiz.instance().executemany(sql, [[campo.pfk_segredo, campo.pk_nome, campo.valor] for campo in campos])
+
+    def alterar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        if len(campos) == 0: return
+        sql: str = "UPDATE campo_segredo SET valor = ? WHERE pfk_segredo = ? AND pk_nome = ?"
+        Raiz.instance().executemany(sql, [[campo.valor, campo.pfk_segredo, campo.pk_nome] for campo in campos])
+
+    def deletar_campos_segredo(self, campos: list[CampoDeSegredo]) -> None:
+        if len(campos) == 0: return
+        sql: str = "DELETE FROM campo_segredo WHERE pfk_segredo = ? AND pk_nome = ?"
+        Raiz.instance().executemany(sql, [[campo.pfk_segredo, campo.pk_nome] for campo in campos])
+
     def ler_campos_segredo(self, pk: SegredoPK) -> list[CampoDeSegredo]:
         sql: str = "SELECT pfk_segredo, pk_nome, valor FROM campo_segredo WHERE pfk_segredo = ? ORDER BY pk_nome"
         Raiz.instance().execute(sql, [pk.pk_segredo])
@@ -100,6 +210,21 @@ class SegredoDAOImpl(SegredoDAO):
         sql: str = "INSERT INTO permissao (pfk_usuario, pfk_segredo, fk_tipo_permissao) VALUES (?, ?, ?)"
         Raiz.instance().execute(sql, [permissao.pfk_usuario, permissao.pfk_segredo, permissao.fk_tipo_permissao])
 
+    def criar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        if len(permissoes) == 0: return
+        sql: str = "INSERT INTO permissao (pfk_usuario, pfk_segredo, fk_tipo_permissao) VALUES (?, ?, ?)"
+        Raiz.instance().executemany(sql, [[p.pfk_usuario, p.pfk_segredo, p.fk_tipo_permissao] for p in permissoes])
+
+    def alterar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        if len(permissoes) == 0: return
+        sql: str = "UPDATE permissao SET fk_tipo_permissao = ? WHERE pfk_usuario = ? AND pfk_segredo = ?"
+        Raiz.instance().executemany(sql, [[p.fk_tipo_permissao, p.pfk_usuario, p.pfk_segredo] for p in permissoes])
+
+    def deletar_permissoes(self, permissoes: list[PermissaoDeSegredo]) -> None:
+        if len(permissoes) == 0: return
+        sql: str = "DELETE FROM permissao WHERE pfk_usuario = ? AND pfk_segredo = ?"
+        Raiz.instance().executemany(sql, [[p.pfk_usuario, p.pfk_segredo] for p in permissoes])
+
     def buscar_permissao(self, busca: BuscaPermissaoPorLogin) -> PermissaoDeSegredo | None:
         sql: str = "" \
             + "SELECT p.pfk_usuario, p.pfk_segredo, p.fk_tipo_permissao " \
@@ -107,4 +232,26 @@ class SegredoDAOImpl(SegredoDAO):
             + "INNER JOIN usuario u ON u.pk_usuario = p.pfk_usuario " \
             + "WHERE p.pfk_segredo = ? AND u.login = ?"
         Raiz.instance().execute(sql, [busca.pfk_segredo, busca.login])
-        return Raiz.instance().fetchone_class(PermissaoDeSegredo)
\ No newline at end of file
+        return Raiz.instance().fetchone_class(PermissaoDeSegredo)
+
+    def verificar_leitura(self, busca: BuscaPermissaoPorLogin) -> AcessoSegredo:
+        return self.__verificar_acesso(busca, [t.value for t in TipoPermissao])
+
+    def verificar_escrita(self, busca: BuscaPermissaoPorLogin) -> AcessoSegredo:
+        return self.__verificar_acesso(busca, [TipoPermissao.LEITURA_E_ESCRITA.value, TipoPermissao.PROPRIETARIO.value])
+
+    def __verificar_acesso(self, busca: BuscaPermissaoPorLogin, tipos: list[int]) -> AcessoSegredo:
+        # Usa apenas os índices da chave primária de segredo, do login de usuario e da chave primária de permissao, sem carregar o segredo.
+        wildcards: InList = Raiz.instance().in_list(tipos)
+        sql: str = "" \
+            + "SELECT " \
+            + "EXISTS (SELECT 1 FROM segredo WHERE pk_segredo = ?) AS existe, " \
+            + "EXISTS (" \
+            +     "SELECT 1 FROM usuario u " \
+            +     "INNER JOIN permissao p ON p.pfk_usuario = u.pk_usuario " \
+            +     f"WHERE u.login = ? AND p.pfk_segredo = ? AND p.fk_tipo_permissao IN {wildcards.sql}" \
+            + ") AS permitido"
+        Raiz.instance().execute(sql, [busca.pfk_segredo, busca.login, busca.pfk_segredo, *wildcards.parameters])
+        row: tuple[Any, ...] | None = Raiz.instance().fetchone()
+        assert row is not None
+        return AcessoSegredo(row[0] == 1, row[1] == 1)
\ No newline at end of file
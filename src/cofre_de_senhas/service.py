@@ -140,6 +140,7 @@ class CabecalhoSegredoComChave:
 @dataclass(frozen = True)
 class ResultadoPesquisaDeSegredos:
     segredos: list[CabecalhoSegredoComChave]
+    continuacao: str | None = None
 
 @dataclass_validate
 @dataclass(frozen = True)
@@ -151,17 +152,27 @@ class CategoriaComChave:
 @dataclass(frozen = True)
 class ResultadoListaDeCategorias:
     lista: list[CategoriaComChave]
+    continuacao: str | None = None
 
 @dataclass_validate
 @dataclass(frozen = True)
 class ResultadoListaDeUsuarios:
     lista: list[UsuarioComChave]
+    continuacao: str | None = None
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Paginacao:
+    continuacao: str | None = None
+    tamanho: int = 20
 
 @dataclass_validate
 @dataclass(frozen = True)
 class PesquisaSegredos:
     nome: str
     categorias: list[str]
+    pagina: int = 1
+    tamanho_pagina: int = 20
 
 class GerenciadorLogin(ABC):
 
@@ -186,6 +197,10 @@ class ServicoBD(ABC):
     def criar_bd(self, dados: LoginComSenha) -> None:
         pass
 
+    @abstractmethod
+    def atualizar_bd(self) -> None:
+        pass
+
 # Todos os métodos (exceto logout) podem lançar UsuarioNaoLogadoException ou UsuarioBanidoException.
 class ServicoUsuario(ABC):
 
@@ -227,9 +242,9 @@ class ServicoUsuario(ABC):
     def buscar_por_chave(self, chave: ChaveUsuario) -> UsuarioComChave:
         pass
 
-    # Pode lançar PermissaoNegadaException, UsuarioNaoExisteException
+    # Pode lançar PermissaoNegadaException, UsuarioNaoExisteException, ValorIncorretoException
     @abstractmethod
-    def listar(self) -> ResultadoListaDeUsuarios:
+    def listar(self, paginacao: Paginacao) -> ResultadoListaDeUsuarios:
         pass
 
 class ServicoSegredo(ABC):
@@ -249,8 +264,9 @@ class ServicoSegredo(ABC):
     def excluir_por_chave(self, dados: ChaveSegredo) -> None:
         pass
 
+    # Pode lançar ValorIncorretoException
     @abstractmethod
-    def listar(self) -> ResultadoPesquisaDeSegredos:
+    def listar(self, paginacao: Paginacao) -> ResultadoPesquisaDeSegredos:
         pass
 
     # Pode lançar SegredoNaoExisteException
@@ -263,7 +279,7 @@ class ServicoSegredo(ABC):
     def buscar_por_chave_sem_logar(self, chave: ChaveSegredo) -> SegredoComChave:
         pass
 
-    # Pode lançar SegredoNaoExisteException
+    # Pode lançar ValorIncorretoException
     @abstractmethod
     def pesquisar(self, dados: PesquisaSegredos) -> ResultadoPesquisaDeSegredos:
         pass
@@ -295,6 +311,7 @@ class ServicoCategoria(ABC):
     def excluir_por_nome(self, dados: NomeCategoria) -> None:
         pass
 
+    # Pode lançar ValorIncorretoException
     @abstractmethod
-    def listar(self) -> ResultadoListaDeCategorias:
+    def listar(self, paginacao: Paginacao) -> ResultadoListaDeCategorias:
         pass
\ No newline at end of file
@@ -26,6 +26,9 @@ class ServicoBDImpl(ServicoBD):
         CofreDeSenhasDAO.instance().criar_bd()
         Usuario.servicos().criar_admin(dados)
 
+    def atualizar_bd(self) -> None:
+        CofreDeSenhasDAO.instance().atualizar_bd()
+
 # Todos os métodos (exceto logout) podem lançar UsuarioNaoLogadoException ou UsuarioBanidoException.
 @for_all_methods(log.trace)
 @for_all_methods(Raiz.transact)
@@ -36,6 +39,7 @@ class ServicoUsuarioImpl(ServicoUsuario):
         self.__gl: GerenciadorLogin = gl
 
     # Pode lançar SenhaErradaException
+    @Raiz.read_only
     def login(self, quem_faz: LoginComSenha) -> UsuarioComChave:
         u: UsuarioComChave = Usuario.servicos().login(quem_faz)
         self.__gl.login(u)
@@ -60,16 +64,19 @@ class ServicoUsuarioImpl(ServicoUsuario):
         Usuario.servicos().alterar_nivel_por_login(self.__login.logado, dados)
 
     # Pode lançar UsuarioNaoExisteException
+    @Raiz.read_only
     def buscar_por_login(self, dados: LoginUsuario) -> UsuarioComChave:
         return Usuario.servicos().buscar_por_login(self.__login.logado, dados)
 
     # Pode lançar UsuarioNaoExisteException
+    @Raiz.read_only
     def buscar_por_chave(self, chave: ChaveUsuario) -> UsuarioComChave:
         return Usuario.servicos().buscar_por_chave(self.__login.logado, chave)
 
     # Pode lançar PermissaoNegadaException, UsuarioNaoExisteException
-    def listar(self) -> ResultadoListaDeUsuarios:
-        return Usuario.servicos().listar(self.__login.logado)
+    @Raiz.read_only
+    def listar(self, paginacao: Paginacao) -> ResultadoListaDeUsuarios:
+        return Usuario.servicos().listar(self.__login.logado, paginacao)
 
 # Todos os métodos podem lançar UsuarioNaoLogadoException ou UsuarioBanidoException.
 @for_all_methods(log.trace)
@@ -91,18 +98,22 @@ class ServicoSegredoImpl(ServicoSegredo):
     def excluir_por_chave(self, dados: ChaveSegredo) -> None:
         Segredo.servicos().excluir_por_chave(self.__login.logado, dados)
 
-    def listar(self) -> ResultadoPesquisaDeSegredos:
-        return Segredo.servicos().listar(self.__login.logado)
+    @Raiz.read_only
+    def listar(self, paginacao: Paginacao) -> ResultadoPesquisaDeSegredos:
+        return Segredo.servicos().listar(self.__login.logado, paginacao)
 
     # Pode lançar SegredoNaoExisteException
+    @Raiz.read_only
     def buscar_por_chave(self, chave: ChaveSegredo) -> SegredoComChave:
         return Segredo.servicos().buscar(self.__login.logado, chave)
 
     # Pode lançar SegredoNaoExisteException
+    @Raiz.read_only
     def buscar_por_chave_sem_logar(self, chave: ChaveSegredo) -> SegredoComChave:
         return Segredo.servicos().buscar_sem_logar(chave)
 
-    # Pode lançar SegredoNaoExisteException
+    # Pode lançar ValorIncorretoException
+    @Raiz.read_only
     def pesquisar(self, dados: PesquisaSegredos) -> ResultadoPesquisaDeSegredos:
         return Segredo.servicos().pesquisar(self.__login.logado, dados)
 
@@ -115,10 +126,12 @@ class ServicoCategoriaImpl(ServicoCategoria):
         self.__login: ServicoLogin = ServicoLogin(gl)
 
     # Pode lançar CategoriaNaoExisteException
+    @Raiz.read_only
     def buscar_por_nome(self, dados: NomeCategoria) -> CategoriaComChave:
         return Categoria.servicos().buscar_por_nome(self.__login.logado, dados)
 
     # Pode lançar CategoriaNaoExisteException
+    @Raiz.read_only
     def buscar_por_chave(self, chave: ChaveCategoria) -> CategoriaComChave:
         return Categoria.servicos().buscar_por_chave(self.__login.logado, chave)
 
@@ -134,5 +147,6 @@ class ServicoCategoriaImpl(ServicoCategoria):
     def excluir_por_nome(self, dados: NomeCategoria) -> None:
         Categoria.servicos().excluir_por_nome(self.__login.logado, dados)
 
-    def listar(self) -> ResultadoListaDeCategorias:
-        return Categoria.servicos().listar(self.__login.logado)
\ No newline at end of file
+    @Raiz.read_only
+    def listar(self, paginacao: Paginacao) -> ResultadoListaDeCategorias:
+        return Categoria.servicos().listar(self.__login.logado, paginacao)
\ No newline at end of file
@@ -0,0 +1,64 @@
+from typing import Callable, Generic, Hashable, TypeVar
+import threading
+import time
+
+_K = TypeVar("_K", bound = Hashable)
+_V = TypeVar("_V")
+
+class CacheDeAcesso(Generic[_K, _V]):
+    """
+    Guarda por ttl segundos quem já foi carregado do banco de dados, para que a verificação de acesso de cada requisição não precise consultá-lo.
+    Quem for ler do banco de dados deve pegar a versão antes. Se houver alguma invalidação no meio tempo, o valor lido não é guardado.
+    Entre invalidar e liberar, a chave não é guardada, para que ninguém guarde um valor que uma transação ainda não terminada está alterando.
+    """
+
+    def __init__(self, ttl: float, tamanho_maximo: int = 10_000, relogio: Callable[[], float] = time.monotonic) -> None:
+        self.__ttl: float = ttl
+        self.__tamanho_maximo: int = tamanho_maximo
+        self.__relogio: Callable[[], float] = relogio
+        self.__entradas: dict[_K, tuple[_V, float]] = {}
+        self.__em_alteracao: dict[_K, int] = {}
+        self.__versao: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+
+    @property
+    def versao(self) -> int:
+        with self.__lock:
+            return self.__versao
+
+    def buscar(self, chave: _K) -> _V | None:
+        with self.__lock:
+            entrada: tuple[_V, float] | None = self.__entradas.get(chave)
+            if entrada is None: return None
+            if entrada[1] <= self.__relogio():
+                del self.__entradas[chave]
+                return None
+            return entrada[0]
+
+    def guardar(self, chave: _K, valor: _V, versao: int) -> None:
+        with self.__lock:
+            if versao != self.__versao or chave in self.__em_alteracao: return
+            self.__entradas.pop(chave, None)
+            if len(self.__entradas) >= self.__tamanho_maximo: del self.__entradas[next(iter(self.__entradas))] # A entrada mais antiga.
+            self.__entradas[chave] = (valor, self.__relogio() + self.__ttl)
+
+    def invalidar(self, chave: _K) -> None:
+        with self.__lock:
+            self.__versao += 1
+            self.__entradas.pop(chave, None)
+            self.__em_alteracao[chave] = self.__em_alteracao.get(chave, 0) + 1
+
+    def liberar(self, chave: _K) -> None:
+        with self.__lock:
+            self.__versao += 1
+            self.__entradas.pop(chave, None)
+            restantes: int = self.__em_alteracao.get(chave, 0) - 1
+            if restantes > 0:
+                self.__em_alteracao[chave] = restantes
+            else:
+                self.__em_alteracao.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self.__lock:
+            self.__versao += 1
+            self.__entradas.clear()
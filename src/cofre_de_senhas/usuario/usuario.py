@@ -3,13 +3,20 @@ from typing import Self
 from validator import dataclass_validate
 from dataclasses import dataclass, replace
 from cofre_de_senhas.erro import *
-from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioComPermissao, DadosUsuarioSemPK, LoginUsuario as LoginUsuarioDAO
+from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioComPermissao, DadosUsuarioSemPK, LoginUsuario as LoginUsuarioDAO, Pagina
 from cofre_de_senhas.service import *
+from cofre_de_senhas.paginacao import pagina_dao, paginar
+from cofre_de_senhas.bd.raiz import Raiz
+from cofre_de_senhas.mapa_de_identidade import MapaDeIdentidade
+from cofre_de_senhas.usuario.cache_de_acesso import CacheDeAcesso
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from cofre_de_senhas.segredo.segredo import Segredo
 
+# Por quanto tempo, em segundos, quem fez uma requisição fica guardado sem que o banco de dados seja consultado novamente.
+TTL_CACHE_DE_ACESSO: float = 30.0
+
 @dataclass_validate
 @dataclass(frozen = True)
 class Permissao:
@@ -26,21 +33,21 @@ class Usuario:
 
     # Propriedades e métodos de instância.
 
-    def __validar_senha(self, senha: str) -> None:
+    def _validar_senha(self, senha: str) -> None:
         if not hasher.comparar_hash(self.hash_com_sal, senha): raise SenhaErradaException()
 
     def __redefinir_senha(self, nova_senha: str) -> "Usuario":
         return replace(self, hash_com_sal = hasher.criar_hash(nova_senha)).__salvar()
 
-    def __trocar_senha(self, dados: TrocaSenha) -> "Usuario":
-        self.__validar_senha(dados.antiga)
+    def _trocar_senha(self, dados: TrocaSenha) -> "Usuario":
+        self._validar_senha(dados.antiga)
         return self.__redefinir_senha(dados.nova)
 
-    def __resetar_senha(self) -> tuple["Usuario", str]:
+    def _resetar_senha(self) -> tuple["Usuario", str]:
         nova_senha: str = hasher.string_random(20)
         return self.__redefinir_senha(nova_senha), nova_senha
 
-    def __alterar_nivel_de_acesso(self, novo_nivel_acesso: NivelAcesso) -> "Usuario":
+    def _alterar_nivel_de_acesso(self, novo_nivel_acesso: NivelAcesso) -> "Usuario":
         return replace(self, nivel_acesso = novo_nivel_acesso).__salvar()
 
     #def __excluir(self) -> Self:
@@ -60,16 +67,26 @@ class Usuario:
         if not self.is_admin: raise PermissaoNegadaException()
         return self
 
-    def __permitir_acesso(self) -> Self:
+    def _permitir_acesso(self) -> Self:
         if not self.__is_permitido: raise PermissaoNegadaException()
         return self
 
     def __salvar(self) -> Self:
+        # Trocar a senha, resetar a senha e alterar o nível de acesso passam por aqui, e assim um banimento vale já na próxima requisição.
         UsuarioDAO.instance().salvar_com_pk(self.__down)
-        return self
+        self.__invalidar_acesso()
+        return self.__registrar()
+
+    def __registrar(self) -> Self:
+        return MapaDeIdentidade.atual().guardar(self, ("pk", self.pk_usuario), ("login", self.login))
+
+    def __invalidar_acesso(self) -> None:
+        chave: ChaveUsuario = self._chave
+        _cache_de_acesso.invalidar(chave)
+        Raiz.instance().after_transaction(lambda: _cache_de_acesso.liberar(chave))
 
     @property
-    def __chave(self) -> ChaveUsuario:
+    def _chave(self) -> ChaveUsuario:
         return ChaveUsuario(self.pk_usuario)
 
     # Exportado para a classe Segredo.
@@ -78,8 +95,8 @@ class Usuario:
         return UsuarioPK(self.pk_usuario)
 
     @property
-    def __up(self) -> UsuarioComChave:
-        return UsuarioComChave(self.__chave, self.login, self.nivel_acesso)
+    def _up(self) -> UsuarioComChave:
+        return UsuarioComChave(self._chave, self.login, self.nivel_acesso)
 
     @property
     def __down(self) -> DadosUsuario:
@@ -92,62 +109,94 @@ class Usuario:
         return Usuario.Servico.instance()
 
     @staticmethod
-    def __promote(dados: DadosUsuario) -> "Usuario":
+    def _promote(dados: DadosUsuario) -> "Usuario":
         return Usuario(dados.pk_usuario, dados.login, NivelAcesso(dados.fk_nivel_acesso), dados.hash_com_sal)
 
     @staticmethod
     def __encontrar_por_chave(chave: ChaveUsuario) -> "Usuario | None":
+        carregado: Usuario | None = MapaDeIdentidade.atual().buscar(Usuario, ("pk", chave.valor))
+        if carregado is not None: return carregado
         dados: DadosUsuario | None = UsuarioDAO.instance().buscar_por_pk(UsuarioPK(chave.valor))
         if dados is None: return None
-        return Usuario.__promote(dados)
+        return Usuario._promote(dados).__registrar()
 
     @staticmethod
-    def __encontrar_existente_por_chave(chave: ChaveUsuario) -> "Usuario":
+    def _encontrar_existente_por_chave(chave: ChaveUsuario) -> "Usuario":
         encontrado: Usuario | None = Usuario.__encontrar_por_chave(chave)
         if encontrado is None: raise UsuarioNaoExisteException()
         return encontrado
 
+    @staticmethod
+    def __encontrar_para_acesso(chave: ChaveUsuario) -> "Usuario":
+        # Quem já foi carregado ou alterado nesta transação vem do mapa de identidade, que nunca está desatualizado.
+        carregado: Usuario | None = MapaDeIdentidade.atual().buscar(Usuario, ("pk", chave.valor))
+        if carregado is not None: return carregado
+        # O que vem do cache de acesso pode ter sido lido por outra requisição e não vai para o mapa de identidade, que só guarda o que foi lido nesta transação.
+        guardado: Usuario | None = _cache_de_acesso.buscar(chave)
+        if guardado is not None: return guardado
+        versao: int = _cache_de_acesso.versao
+        encontrado: Usuario = Usuario._encontrar_existente_por_chave(chave)
+        _cache_de_acesso.guardar(chave, encontrado, versao)
+        return encontrado
+
+    @staticmethod
+    def cache_de_acesso() -> CacheDeAcesso[ChaveUsuario, "Usuario"]:
+        return _cache_de_acesso
+
     # Exportado para a classe Segredo.
     @staticmethod
     def verificar_acesso(chave: ChaveUsuario) -> "Usuario":
-        return Usuario.__encontrar_existente_por_chave(chave).__permitir_acesso()
+        return Usuario.__encontrar_para_acesso(chave)._permitir_acesso()
 
     # Exportado para a classe Categoria.
     @staticmethod
     def verificar_acesso_admin(chave: ChaveUsuario) -> "Usuario":
-        return Usuario.__encontrar_existente_por_chave(chave).__permitir_admin()
+        return Usuario.__encontrar_para_acesso(chave).__permitir_admin()
 
     @staticmethod
     def __encontrar_por_login(login: str) -> "Usuario | None":
+        carregado: Usuario | None = MapaDeIdentidade.atual().buscar(Usuario, ("login", login))
+        if carregado is not None: return carregado
         dados: DadosUsuario | None = UsuarioDAO.instance().buscar_por_login(LoginUsuarioDAO(login))
         if dados is None: return None
-        return Usuario.__promote(dados)
+        return Usuario._promote(dados).__registrar()
 
     @staticmethod
-    def __encontrar_existente_por_login(login: str) -> "Usuario":
+    def _encontrar_existente_por_login(login: str) -> "Usuario":
         encontrado: Usuario | None = Usuario.__encontrar_por_login(login)
         if encontrado is None: raise UsuarioNaoExisteException()
         return encontrado
 
     @staticmethod
-    def __nao_existente_por_login(login: str) -> None:
+    def _nao_existente_por_login(login: str) -> None:
         talvez: Usuario | None = Usuario.__encontrar_por_login(login)
         if talvez is not None: raise UsuarioJaExisteException()
 
     @staticmethod
-    def __listar() -> list["Usuario"]:
-        return [Usuario.__promote(u) for u in UsuarioDAO.instance().listar()]
+    def _listar(pagina: Pagina) -> list["Usuario"]:
+        return [Usuario._promote(u) for u in UsuarioDAO.instance().listar(pagina)]
 
     @staticmethod
     def __mapear_todos(dados: list[DadosUsuario]) -> dict[str, "Usuario"]:
-        return {u.login: Usuario.__promote(u) for u in dados}
+        return {u.login: Usuario._promote(u).__registrar() for u in dados}
 
     # Exportado para a classe Segredo.
     @staticmethod
     def listar_por_logins(logins: set[str]) -> dict[str, "Usuario"]:
-        dl: list[LoginUsuarioDAO] = LoginUsuarioDAO.para_todos(logins)
-        dados: list[DadosUsuario] = UsuarioDAO.instance().listar_por_logins(dl)
-        r: dict[str, Usuario] = Usuario.__mapear_todos(dados)
+        # Só vai ao banco de dados quem ainda não foi carregado nesta transação, como quem faz a requisição.
+        mapa: MapaDeIdentidade = MapaDeIdentidade.atual()
+        r: dict[str, Usuario] = {}
+        faltando: set[str] = set()
+        for login in logins:
+            carregado: Usuario | None = mapa.buscar(Usuario, ("login", login))
+            if carregado is None:
+                faltando.add(login)
+            else:
+                r[login] = carregado
+
+        if len(faltando) > 0:
+            dl: list[LoginUsuarioDAO] = LoginUsuarioDAO.para_todos(faltando)
+            r.update(Usuario.__mapear_todos(UsuarioDAO.instance().listar_por_logins(dl)))
 
         if len(r) != len(logins):
             for login in logins:
@@ -159,9 +208,13 @@ class Usuario:
     # Exportado para a classe Segredo.
     @staticmethod
     def listar_por_permissao(segredo: "Segredo.Cabecalho") -> dict[str, "Permissao"]:
-        lista1: list[DadosUsuarioComPermissao] = UsuarioDAO.instance().listar_por_permissao(segredo.pk)
-        lista2: list[Permissao] = [Permissao(Usuario.__promote(dados.sem_permissoes), TipoPermissao(dados.fk_tipo_permissao)) for dados in lista1]
-        return {permissao.usuario.login: permissao for permissao in lista2}
+        return Usuario.mapear_permissoes(UsuarioDAO.instance().listar_por_permissao(segredo.pk))
+
+    # Exportado para a classe Segredo.
+    @staticmethod
+    def mapear_permissoes(dados: list[DadosUsuarioComPermissao]) -> dict[str, "Permissao"]:
+        lista: list[Permissao] = [Permissao(Usuario._promote(d.sem_permissoes).__registrar(), TipoPermissao(d.fk_tipo_permissao)) for d in dados]
+        return {permissao.usuario.login: permissao for permissao in lista}
 
     class Servico:
 
@@ -177,31 +230,33 @@ class Usuario:
             return Usuario.Servico.__me
 
         def trocar_senha_por_chave(self, quem_faz: ChaveUsuario, dados: TrocaSenha) -> None:
-            Usuario.verificar_acesso(quem_faz).__trocar_senha(dados)
+            Usuario.verificar_acesso(quem_faz)
+            # O que vem do cache de acesso serve só para a verificação. Quem vai ser gravado é lido de novo, ou um banimento recente seria desfeito.
+            Usuario._encontrar_existente_por_chave(quem_faz)._permitir_acesso()._trocar_senha(dados)
 
         def alterar_nivel_por_login(self, quem_faz: ChaveUsuario, dados: UsuarioComNivel) -> None:
             Usuario.verificar_acesso_admin(quem_faz)
-            Usuario.__encontrar_existente_por_login(dados.login).__alterar_nivel_de_acesso(dados.nivel_acesso)
+            Usuario._encontrar_existente_por_login(dados.login)._alterar_nivel_de_acesso(dados.nivel_acesso)
 
         def login(self, quem_faz: LoginComSenha) -> UsuarioComChave:
             dados: DadosUsuario | None = UsuarioDAO.instance().buscar_por_login(LoginUsuarioDAO(quem_faz.login))
             if dados is None: raise SenhaErradaException()
-            cadastrado: Usuario = Usuario.__promote(dados)
-            cadastrado.__validar_senha(quem_faz.senha)
-            return cadastrado.__permitir_acesso().__up
+            cadastrado: Usuario = Usuario._promote(dados)
+            cadastrado._validar_senha(quem_faz.senha)
+            return cadastrado._permitir_acesso()._up
 
         def buscar_por_chave(self, quem_faz: ChaveUsuario, chave: ChaveUsuario) -> UsuarioComChave:
             Usuario.verificar_acesso(quem_faz)
-            return Usuario.__encontrar_existente_por_chave(chave).__up
+            return Usuario._encontrar_existente_por_chave(chave)._up
 
         def resetar_senha_por_login(self, quem_faz: ChaveUsuario, dados: ResetLoginUsuario) -> SenhaAlterada:
             Usuario.verificar_acesso_admin(quem_faz)
-            t: tuple[Usuario, str] = Usuario.__encontrar_existente_por_login(dados.login).__resetar_senha()
-            return SenhaAlterada(t[0].__chave, t[0].login, t[1])
+            t: tuple[Usuario, str] = Usuario._encontrar_existente_por_login(dados.login)._resetar_senha()
+            return SenhaAlterada(t[0]._chave, t[0].login, t[1])
 
         def buscar_por_login(self, quem_faz: ChaveUsuario, dados: LoginUsuario) -> UsuarioComChave:
             Usuario.verificar_acesso(quem_faz)
-            return Usuario.__encontrar_existente_por_login(dados.login).__up
+            return Usuario._encontrar_existente_por_login(dados.login)._up
 
         def criar_admin(self, dados: LoginComSenha) -> UsuarioComChave:
             return self.__criar_interno(dados.com_nivel(NivelAcesso.CHAVEIRO_DEUS_SUPREMO))
@@ -211,11 +266,14 @@ class Usuario:
             return self.__criar_interno(dados)
 
         def __criar_interno(self, dados: UsuarioNovo) -> UsuarioComChave:
-            Usuario.__nao_existente_por_login(dados.login)
+            Usuario._nao_existente_por_login(dados.login)
             hash_com_sal: str = hasher.criar_hash(dados.senha)
             pk: UsuarioPK = UsuarioDAO.instance().criar(DadosUsuarioSemPK(dados.login, dados.nivel_acesso.value, hash_com_sal))
-            return Usuario(pk.pk_usuario, dados.login, dados.nivel_acesso, hash_com_sal).__up
+            return Usuario(pk.pk_usuario, dados.login, dados.nivel_acesso, hash_com_sal)._up
 
-        def listar(self, quem_faz: ChaveUsuario) -> ResultadoListaDeUsuarios:
+        def listar(self, quem_faz: ChaveUsuario, paginacao: Paginacao) -> ResultadoListaDeUsuarios:
             Usuario.verificar_acesso_admin(quem_faz)
-            return ResultadoListaDeUsuarios([x.__up for x in Usuario.__listar()])
\ No newline at end of file
+            usuarios, continuacao = paginar(Usuario._listar(pagina_dao(paginacao)), paginacao, lambda u: u.pk_usuario) # Pode lançar ValorIncorretoException
+            return ResultadoListaDeUsuarios([x._up for x in usuarios], continuacao)
+
+_cache_de_acesso: CacheDeAcesso[ChaveUsuario, Usuario] = CacheDeAcesso(TTL_CACHE_DE_ACESSO)
\ No newline at end of file
@@ -1,5 +1,6 @@
+from connection.conn import InList
 from cofre_de_senhas.bd.raiz import Raiz
-from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioSemPK, SegredoPK, DadosUsuarioComPermissao, LoginUsuario
+from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioSemPK, SegredoPK, DadosUsuarioComPermissao, LoginUsuario, Pagina
 
 class UsuarioDAOImpl(UsuarioDAO):
 
@@ -14,20 +15,24 @@ class UsuarioDAOImpl(UsuarioDAO):
         return Raiz.instance().fetchone_class(DadosUsuario)
 
     def listar_por_pks(self, pks: list[UsuarioPK]) -> list[DadosUsuario]:
-        wildcards: str = ", ".join(["?" for pk in pks])
-        sql: str = f"SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario WHERE pk_usuario IN ({wildcards}) ORDER BY pk_usuario"
-        Raiz.instance().execute(sql, [pk.pk_usuario for pk in pks])
+        wildcards: InList = Raiz.instance().in_list([pk.pk_usuario for pk in pks])
+        sql: str = f"SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario WHERE pk_usuario IN {wildcards.sql} ORDER BY pk_usuario"
+        Raiz.instance().execute(sql, wildcards.parameters)
         return Raiz.instance().fetchall_class(DadosUsuario)
 
-    def listar(self) -> list[DadosUsuario]:
-        sql: str = "SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario ORDER BY pk_usuario"
-        Raiz.instance().execute(sql)
+    def listar(self, pagina: Pagina | None = None) -> list[DadosUsuario]:
+        if pagina is None:
+            sql: str = "SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario ORDER BY pk_usuario"
+            Raiz.instance().execute(sql)
+        else:
+            sql = "SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario WHERE pk_usuario > ? ORDER BY pk_usuario LIMIT ?"
+            Raiz.instance().execute(sql, [pagina.apos, pagina.limite])
         return Raiz.instance().fetchall_class(DadosUsuario)
 
     def listar_por_logins(self, logins: list[LoginUsuario]) -> list[DadosUsuario]:
-        wildcards: str = ", ".join(["?" for login in logins])
-        sql: str = f"SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario WHERE login IN ({wildcards}) ORDER BY pk_usuario"
-        Raiz.instance().execute(sql, [login.valor for login in logins])
+        wildcards: InList = Raiz.instance().in_list([login.valor for login in logins])
+        sql: str = f"SELECT pk_usuario, login, fk_nivel_acesso, hash_com_sal FROM usuario WHERE login IN {wildcards.sql} ORDER BY pk_usuario"
+        Raiz.instance().execute(sql, wildcards.parameters)
         return Raiz.instance().fetchall_class(DadosUsuario)
 
     def criar(self, dados: DadosUsuarioSemPK) -> UsuarioPK:
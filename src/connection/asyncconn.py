@@ -0,0 +1,456 @@
+from typing import Any, AsyncIterator, Awaitable, Callable, cast, Literal, Self, Sequence, TypeVar
+from .conn import BATCH_STATEMENT, ColumnNames, Descriptor, MIN_STREAMING_BATCH, RAW_DATA, ResultSet, SimpleConnection, TransactionNotActiveException
+from .inflater import row_mapper, row_to_class_lambda, row_to_dict, RowMapper
+from .trans import ConnectionPool
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextvars import ContextVar, Token
+from types import TracebackType
+from functools import partial, wraps
+import asyncio
+
+_T = TypeVar("_T")
+_ATRANS = TypeVar("_ATRANS", bound = Callable[..., Awaitable[Any]])
+
+class TransactionOwnedByAnotherTaskException(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+class AsyncSimpleConnection:
+    """
+    Versão assíncrona de uma SimpleConnection.
+    Cada operação é executada em um Executor, de forma que o laço de eventos nunca fica bloqueado esperando pelo banco de dados.
+    """
+
+    def __init__(self, conn: SimpleConnection, executor: Executor) -> None:
+        self.__conn: SimpleConnection = conn
+        self.__executor: Executor = executor
+
+    async def __run(self, what: Callable[..., _T], *args: Any) -> _T:
+        return await asyncio.get_running_loop().run_in_executor(self.__executor, partial(what, *args))
+
+    @property
+    def wrapped(self) -> SimpleConnection:
+        return self.__conn
+
+    async def commit(self) -> None:
+        await self.__run(self.__conn.commit)
+
+    async def rollback(self) -> None:
+        await self.__run(self.__conn.rollback)
+
+    async def close(self) -> None:
+        await self.__run(self.__conn.close)
+
+    async def savepoint(self, name: str) -> None:
+        await self.__run(self.__conn.savepoint, name)
+
+    async def release_savepoint(self, name: str) -> None:
+        await self.__run(self.__conn.release_savepoint, name)
+
+    async def rollback_to_savepoint(self, name: str) -> None:
+        await self.__run(self.__conn.rollback_to_savepoint, name)
+
+    async def fetchone(self) -> tuple[RAW_DATA, ...] | None:
+        return await self.__run(self.__conn.fetchone)
+
+    async def fetchall(self) -> Sequence[tuple[RAW_DATA, ...]]:
+        return await self.__run(self.__conn.fetchall)
+
+    async def fetchmany(self, size: int = 0) -> Sequence[tuple[RAW_DATA, ...]]:
+        return await self.__run(self.__conn.fetchmany, size)
+
+    async def fetchone_dict(self) -> dict[str, Any] | None:
+        return await self.__run(self.__conn.fetchone_dict)
+
+    async def fetchall_dict(self) -> list[dict[str, Any]]:
+        return await self.__run(self.__conn.fetchall_dict)
+
+    async def fetchmany_dict(self, size: int = 0) -> list[dict[str, Any]]:
+        return await self.__run(self.__conn.fetchmany_dict, size)
+
+    async def fetchone_class(self, klass: type[_T]) -> _T | None:
+        return await self.__run(self.__conn.fetchone_class, klass)
+
+    async def fetchall_class(self, klass: type[_T]) -> list[_T]:
+        return await self.__run(self.__conn.fetchall_class, klass)
+
+    async def fetchmany_class(self, klass: type[_T], size: int = 0) -> list[_T]:
+        return await self.__run(self.__conn.fetchmany_class, klass, size)
+
+    async def fetchone_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> _T | None:
+        return await self.__run(self.__conn.fetchone_class_lambda, ctor)
+
+    async def fetchall_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> list[_T]:
+        return await self.__run(self.__conn.fetchall_class_lambda, ctor)
+
+    async def fetchmany_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> list[_T]:
+        return await self.__run(self.__conn.fetchmany_class_lambda, ctor, size)
+
+    async def fetchall_columns(self, use_numpy: bool = False) -> dict[str, Any]:
+        return await self.__run(self.__conn.fetchall_columns, use_numpy)
+
+    async def fetchmany_columns(self, size: int = 0, use_numpy: bool = False) -> dict[str, Any]:
+        return await self.__run(self.__conn.fetchmany_columns, size, use_numpy)
+
+    def __batch_size(self, size: int) -> int:
+        if size > 0: return size
+        return max(self.__conn.arraysize, MIN_STREAMING_BATCH)
+
+    async def iter_rows(self, size: int = 0) -> AsyncIterator[tuple[RAW_DATA, ...]]:
+        """
+        Percorre o resultado da última instrução executada sem carregá-lo inteiramente na memória, tal como SimpleConnection.iter_rows.
+        Cada lote é buscado no Executor.
+        """
+        batch: int = self.__batch_size(size)
+        while True:
+            rows: Sequence[tuple[RAW_DATA, ...]] = await self.fetchmany(batch)
+            if len(rows) == 0: return
+            for row in rows:
+                yield row
+
+    async def iter_dicts(self, size: int = 0) -> AsyncIterator[dict[str, Any]]:
+        columns: ColumnNames = self.column_names
+        async for row in self.iter_rows(size):
+            yield row_to_dict(columns, row)
+
+    async def iter_class(self, klass: type[_T], size: int = 0) -> AsyncIterator[_T]:
+        columns: ColumnNames = self.column_names
+        mapper: RowMapper[_T] | None = None
+        async for row in self.iter_rows(size):
+            if mapper is None: mapper = row_mapper(klass, columns)
+            yield mapper(row)
+
+    async def iter_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> AsyncIterator[_T]:
+        columns: ColumnNames = self.column_names
+        async for row in self.iter_rows(size):
+            yield row_to_class_lambda(ctor, columns, row)
+
+    def __aiter__(self) -> AsyncIterator[tuple[RAW_DATA, ...]]:
+        return self.iter_rows()
+
+    async def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__run(self.__conn.callproc, sql, parameters)
+        return self
+
+    async def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__run(self.__conn.execute, sql, parameters)
+        return self
+
+    async def execute_streaming(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__run(self.__conn.execute_streaming, sql, parameters)
+        return self
+
+    async def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ()) -> Self:
+        await self.__run(self.__conn.executemany, sql, parameters)
+        return self
+
+    async def execute_batch(self, statements: Sequence[BATCH_STATEMENT]) -> list[ResultSet]:
+        return await self.__run(self.__conn.execute_batch, statements)
+
+    async def executescript(self, sql: str) -> Self:
+        await self.__run(self.__conn.executescript, sql)
+        return self
+
+    @property
+    def rowcount(self) -> int:
+        return self.__conn.rowcount
+
+    @property
+    def description(self) -> Descriptor:
+        return self.__conn.description
+
+    @property
+    def column_names(self) -> ColumnNames:
+        return self.__conn.column_names
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self.__conn.lastrowid
+
+    @property
+    def asserted_lastrowid(self) -> int:
+        return self.__conn.asserted_lastrowid
+
+    @property
+    def raw_connection(self) -> object:
+        return self.__conn.raw_connection
+
+class _AsyncTransaction:
+
+    def __init__(self, conn: AsyncSimpleConnection) -> None:
+        self.conn: AsyncSimpleConnection = conn
+        self.count: int = 0
+        self.owner: asyncio.Task[Any] | None = asyncio.current_task()
+        self.token: Token[_AsyncTransaction | None] | None = None
+
+class AsyncTransactedConnection:
+    """
+    Versão assíncrona de uma TransactedConnection.
+    A transação corrente é acompanhada por meio de contextvars em vez de threading.local, e portanto pertence a cada tarefa do asyncio.
+    Tarefas criadas de dentro de uma transação herdam o contexto, mas não podem usar a transação, pois as suas instruções se misturariam às da tarefa dona no mesmo cursor.
+    """
+
+    def __init__( \
+            self, \
+            activate: Callable[[], Awaitable[AsyncSimpleConnection]], \
+            deactivate: Callable[[AsyncSimpleConnection], Awaitable[None]], \
+            executor: Executor | None = None \
+    ) -> None:
+        self.__activate: Callable[[], Awaitable[AsyncSimpleConnection]] = activate
+        self.__deactivate: Callable[[AsyncSimpleConnection], Awaitable[None]] = deactivate
+        self.__executor: Executor | None = executor
+        self.__current: ContextVar[_AsyncTransaction | None] = ContextVar(f"transaction_{id(self)}", default = None)
+
+    @staticmethod
+    def dedicated(activate: Callable[[], SimpleConnection]) -> "AsyncTransactedConnection":
+        """
+        Cria conexões que executam todas as suas operações em uma única thread dedicada, como é conveniente para o SQLite.
+        As conexões são criadas na própria thread onde serão usadas.
+        Apenas uma transação fica aberta por vez: se uma segunda esperasse pelo bloqueio de escrita do SQLite, ocuparia a única thread e a primeira nunca terminaria.
+        """
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "async-db")
+        lock: asyncio.Lock = asyncio.Lock()
+
+        def close_abandoned(future: "asyncio.Future[SimpleConnection]") -> None:
+            if not future.cancelled() and future.exception() is None:
+                executor.submit(future.result().close)
+
+        async def open() -> AsyncSimpleConnection:
+            await lock.acquire()
+            try:
+                future: asyncio.Future[SimpleConnection] = asyncio.get_running_loop().run_in_executor(executor, activate)
+                try:
+                    conn: SimpleConnection = await asyncio.shield(future)
+                except asyncio.CancelledError as x:
+                    # A thread termina de abrir a conexão mesmo que a tarefa seja cancelada. Ninguém mais a usará, então ela é fechada assim que ficar pronta.
+                    future.add_done_callback(close_abandoned)
+                    raise x
+            except BaseException as x:
+                lock.release()
+                raise x
+            return AsyncSimpleConnection(conn, executor)
+
+        async def close(conn: AsyncSimpleConnection) -> None:
+            try:
+                await conn.close()
+            finally:
+                lock.release()
+
+        return AsyncTransactedConnection(open, close, executor)
+
+    @staticmethod
+    def pooled(pool: ConnectionPool) -> "AsyncTransactedConnection":
+        """
+        Obtém as conexões de um ConnectionPool. Há uma thread para cada conexão que o pool pode abrir.
+        A espera por uma conexão livre ocorre no Executor padrão do laço de eventos, para não ocupar as threads de quem já tem uma conexão.
+        """
+        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers = pool.config.max_size, thread_name_prefix = "async-db")
+
+        async def open() -> AsyncSimpleConnection:
+            conn: SimpleConnection = await asyncio.get_running_loop().run_in_executor(None, pool.acquire)
+            return AsyncSimpleConnection(conn, executor)
+
+        async def close(conn: AsyncSimpleConnection) -> None:
+            await asyncio.get_running_loop().run_in_executor(None, pool.release, conn.wrapped)
+
+        return AsyncTransactedConnection(open, close, executor)
+
+    def shutdown(self) -> None:
+        """
+        Encerra as threads usadas pelas conexões. As transações em andamento devem ter terminado antes.
+        """
+        if self.__executor is not None: self.__executor.shutdown()
+
+    def __transaction(self) -> _AsyncTransaction | None:
+        t: _AsyncTransaction | None = self.__current.get()
+        if t is not None and t.owner is not asyncio.current_task():
+            raise TransactionOwnedByAnotherTaskException("The active transaction belongs to the task that started it.")
+        return t
+
+    async def __aenter__(self) -> Self:
+        t: _AsyncTransaction | None = self.__transaction()
+        if t is None:
+            t = _AsyncTransaction(await self.__activate())
+            t.token = self.__current.set(t)
+        t.count += 1
+        return self
+
+    async def close(self) -> None:
+        t: _AsyncTransaction | None = self.__transaction()
+        if t is None: raise TransactionNotActiveException()
+        t.count -= 1
+        if t.count == 0:
+            assert t.token is not None
+            self.__current.reset(t.token)
+            await self.__deactivate(t.conn)
+
+    async def __aexit__( \
+            self, \
+            exc_type: type[BaseException] | None, \
+            exc_val : BaseException       | None, \
+            exc_tb  : TracebackType       | None  \
+    ) -> Literal[False]:
+        await self.close()
+        return False
+
+    @property
+    def reenter_count(self) -> int:
+        t: _AsyncTransaction | None = self.__transaction()
+        return 0 if t is None else t.count
+
+    @property
+    def is_active(self) -> bool:
+        return self.reenter_count > 0
+
+    def transact(self, operation: _ATRANS) -> _ATRANS:
+        @wraps(operation)
+        async def transacted_operation(*args: Any, **kwargs: Any) -> Any:
+            if self.is_active: return await self.__transact_nested(operation, args, kwargs)
+            async with self as xxx:
+                ok: bool = True
+                try:
+                    return await operation(*args, **kwargs)
+                except BaseException as x:
+                    ok = False
+                    raise x
+                finally:
+                    if ok:
+                        await self.commit()
+                    else:
+                        await self.rollback()
+        return cast(_ATRANS, transacted_operation)
+
+    async def __transact_nested(self, operation: Callable[..., Awaitable[_T]], args: tuple[Any, ...], kwargs: dict[str, Any]) -> _T:
+        async with self as xxx:
+            name: str = f"savepoint_{self.reenter_count}"
+            await self.__wrapped.savepoint(name)
+            try:
+                result: _T = await operation(*args, **kwargs)
+            except BaseException as x:
+                await self.__rollback_nested(name)
+                raise x
+            await self.__wrapped.release_savepoint(name)
+            return result
+
+    async def __rollback_nested(self, name: str) -> None:
+        try:
+            await self.__wrapped.rollback_to_savepoint(name)
+        except BaseException:
+            # Tal como em TransactedConnection, o erro original é o que importa se o ponto de salvamento já não existir mais.
+            pass
+
+    @property
+    def __wrapped(self) -> AsyncSimpleConnection:
+        t: _AsyncTransaction | None = self.__transaction()
+        if t is None: raise TransactionNotActiveException()
+        return t.conn
+
+    async def commit(self) -> None:
+        await self.__wrapped.commit()
+
+    async def rollback(self) -> None:
+        await self.__wrapped.rollback()
+
+    async def fetchone(self) -> tuple[RAW_DATA, ...] | None:
+        return await self.__wrapped.fetchone()
+
+    async def fetchall(self) -> Sequence[tuple[RAW_DATA, ...]]:
+        return await self.__wrapped.fetchall()
+
+    async def fetchmany(self, size: int = 0) -> Sequence[tuple[RAW_DATA, ...]]:
+        return await self.__wrapped.fetchmany(size)
+
+    async def fetchone_dict(self) -> dict[str, Any] | None:
+        return await self.__wrapped.fetchone_dict()
+
+    async def fetchall_dict(self) -> list[dict[str, Any]]:
+        return await self.__wrapped.fetchall_dict()
+
+    async def fetchmany_dict(self, size: int = 0) -> list[dict[str, Any]]:
+        return await self.__wrapped.fetchmany_dict(size)
+
+    async def fetchone_class(self, klass: type[_T]) -> _T | None:
+        return await self.__wrapped.fetchone_class(klass)
+
+    async def fetchall_class(self, klass: type[_T]) -> list[_T]:
+        return await self.__wrapped.fetchall_class(klass)
+
+    async def fetchmany_class(self, klass: type[_T], size: int = 0) -> list[_T]:
+        return await self.__wrapped.fetchmany_class(klass, size)
+
+    async def fetchone_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> _T | None:
+        return await self.__wrapped.fetchone_class_lambda(ctor)
+
+    async def fetchall_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> list[_T]:
+        return await self.__wrapped.fetchall_class_lambda(ctor)
+
+    async def fetchmany_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> list[_T]:
+        return await self.__wrapped.fetchmany_class_lambda(ctor, size)
+
+    async def fetchall_columns(self, use_numpy: bool = False) -> dict[str, Any]:
+        return await self.__wrapped.fetchall_columns(use_numpy)
+
+    async def fetchmany_columns(self, size: int = 0, use_numpy: bool = False) -> dict[str, Any]:
+        return await self.__wrapped.fetchmany_columns(size, use_numpy)
+
+    def iter_rows(self, size: int = 0) -> AsyncIterator[tuple[RAW_DATA, ...]]:
+        return self.__wrapped.iter_rows(size)
+
+    def iter_dicts(self, size: int = 0) -> AsyncIterator[dict[str, Any]]:
+        return self.__wrapped.iter_dicts(size)
+
+    def iter_class(self, klass: type[_T], size: int = 0) -> AsyncIterator[_T]:
+        return self.__wrapped.iter_class(klass, size)
+
+    def iter_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> AsyncIterator[_T]:
+        return self.__wrapped.iter_class_lambda(ctor, size)
+
+    def __aiter__(self) -> AsyncIterator[tuple[RAW_DATA, ...]]:
+        return self.__wrapped.iter_rows()
+
+    async def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__wrapped.callproc(sql, parameters)
+        return self
+
+    async def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__wrapped.execute(sql, parameters)
+        return self
+
+    async def execute_streaming(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        await self.__wrapped.execute_streaming(sql, parameters)
+        return self
+
+    async def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ()) -> Self:
+        await self.__wrapped.executemany(sql, parameters)
+        return self
+
+    async def execute_batch(self, statements: Sequence[BATCH_STATEMENT]) -> list[ResultSet]:
+        return await self.__wrapped.execute_batch(statements)
+
+    async def executescript(self, sql: str) -> Self:
+        await self.__wrapped.executescript(sql)
+        return self
+
+    @property
+    def rowcount(self) -> int:
+        return self.__wrapped.rowcount
+
+    @property
+    def description(self) -> Descriptor:
+        return self.__wrapped.description
+
+    @property
+    def column_names(self) -> ColumnNames:
+        return self.__wrapped.column_names
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self.__wrapped.lastrowid
+
+    @property
+    def asserted_lastrowid(self) -> int:
+        return self.__wrapped.asserted_lastrowid
+
+    @property
+    def raw_connection(self) -> object:
+        return self.__wrapped.raw_connection
\ No newline at end of file
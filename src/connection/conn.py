@@ -4,12 +4,17 @@ from dataclasses import dataclass
 from validator import dataclass_validate
 from enum import Enum
 from .inflater import *
+import array
+import importlib
 
 _T = TypeVar("_T")
 _TRANS = TypeVar("_TRANS", bound = Callable[..., Any])
 
 RAW_DATA = str | int | float
 
+# Tamanho mínimo dos lotes buscados pelos métodos iter_*, já que o arraysize padrão da DB-API é 1.
+MIN_STREAMING_BATCH: int = 100
+
 class NotImplementedError(Exception):
     def __init__(self, message: str) -> None:
         super().__init__(message)
@@ -18,6 +23,13 @@ class IntegrityViolationException(Exception):
     def __init__(self, message: str) -> None:
         super().__init__(message)
 
+class RetryableException(Exception):
+    """
+    Falha passageira do banco de dados, tal como um bloqueio ocupado ou um deadlock, após a qual a transação inteira pode ser tentada novamente.
+    """
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
 class TypeCode(Enum):
     STRING = "STRING"
     BINARY = "BINARY"
@@ -96,11 +108,11 @@ class ColumnSet:
     def __init__(self, items: list[ColumnDescriptor]) -> None:
         self.__items: list[ColumnDescriptor] = items[:]
 
-        x: list[str] = []
+        x: set[str] = set()
         for c in items:
             if c.name in x:
                 raise ValueError(f"Repeated column name {c.name}.")
-            x.append(c.name)
+            x.add(c.name)
 
     def __len__(self) -> int:
         return len(self.__items)
@@ -122,6 +134,126 @@ class Descriptor:
     def column_names(self) -> ColumnNames:
         return self.__column_names
 
+@dataclass_validate
+@dataclass(frozen = True)
+class InList:
+    """
+    Trecho de SQL a ser usado à direita de um operador IN, acompanhado dos parâmetros que ele consome.
+    """
+    sql: str
+    parameters: list[RAW_DATA]
+
+# Acima deste tamanho, as listas são completadas até o próximo múltiplo dele ao invés da próxima potência de dois.
+MAX_IN_LIST_BUCKET: int = 1024
+
+__placeholders: dict[int, str] = {}
+
+def _in_list_bucket(size: int) -> int:
+    if size > MAX_IN_LIST_BUCKET: return -(-size // MAX_IN_LIST_BUCKET) * MAX_IN_LIST_BUCKET
+    bucket: int = 1
+    while bucket < size: bucket *= 2
+    return bucket
+
+def padded_in_list(values: Sequence[RAW_DATA]) -> InList:
+    """
+    Monta uma lista de placeholders para o operador IN cujo tamanho é arredondado para cima até uma potência de dois.
+    As posições excedentes repetem o último valor, o que não altera o resultado do IN.
+    Desse modo, listas de tamanhos diferentes produzem poucas formas distintas de instrução, que podem ser mantidas preparadas pelo banco de dados.
+    """
+    if len(values) == 0: return InList("(NULL)", [])
+    bucket: int = _in_list_bucket(len(values))
+    sql: str | None = __placeholders.get(bucket)
+    if sql is None:
+        sql = "(" + ", ".join(["?"] * bucket) + ")"
+        __placeholders[bucket] = sql
+    parameters: list[RAW_DATA] = list(values)
+    parameters.extend([values[-1]] * (bucket - len(values)))
+    return InList(sql, parameters)
+
+# Tipos do módulo array usados para as colunas numéricas em rows_to_columns.
+_ARRAY_TYPES: dict[TypeCode, str] = {TypeCode.INTEGER: "q", TypeCode.FLOAT: "d"}
+
+def _numpy() -> Any:
+    # O NumPy é opcional e só é carregado quando pedido.
+    return importlib.import_module("numpy")
+
+def _guess_array_type(values: tuple[Any, ...]) -> str | None:
+    if all(type(v) is int for v in values): return "q"
+    if all(type(v) is float or type(v) is int for v in values): return "d"
+    return None
+
+def _compact_column(type_code: TypeCode, values: tuple[Any, ...], use_numpy: bool) -> Any:
+    kind: str | None = _ARRAY_TYPES.get(type_code)
+    if kind is None and type_code == TypeCode.UNSPECIFIED and len(values) > 0: kind = _guess_array_type(values)
+    column: array.array[Any] | None = None
+    if kind is not None:
+        try:
+            column = array.array(kind, values)
+        except (TypeError, OverflowError):
+            # Há NULLs, decimais ou inteiros grandes demais na coluna.
+            column = None
+    if not use_numpy: return list(values) if column is None else column
+    if column is None: return _numpy().array(values, dtype = object)
+    return _numpy().frombuffer(column, dtype = "int64" if kind == "q" else "float64")
+
+def rows_to_columns(descriptor: Descriptor, rows: Sequence[tuple[RAW_DATA, ...]], use_numpy: bool = False) -> dict[str, Any]:
+    """
+    Transpõe as linhas em colunas, indexadas pelo nome da coluna.
+    As colunas numéricas segundo o TypeCode (ou, se ele não for especificado, segundo os próprios valores) tornam-se array.array, e as demais, listas.
+    Colunas numéricas que contenham NULL também tornam-se listas.
+    Se use_numpy for True, as colunas são arrays do NumPy, que precisa estar instalado.
+    """
+    columns: ColumnSet = descriptor.columns
+    values: list[tuple[Any, ...]] = list(zip(*rows)) if len(rows) > 0 else [()] * len(columns)
+    return {columns[i].name: _compact_column(columns[i].type_code, values[i], use_numpy) for i in range(0, len(columns))}
+
+# Uma instrução de um lote, com os seus parâmetros.
+BATCH_STATEMENT = tuple[str, Sequence[RAW_DATA]]
+
+# Não é validada pelo dataclass_validate porque pode conter muitas linhas.
+@dataclass(frozen = True)
+class ResultSet:
+    """
+    O resultado, já inteiramente lido, de uma instrução. Instruções que não produzem linhas têm um descritor sem colunas.
+    Os métodos fetchone_* usam a primeira linha, se houver.
+    """
+    description: Descriptor
+    rows: Sequence[tuple[RAW_DATA, ...]]
+    rowcount: int
+    lastrowid: int | None
+
+    @property
+    def column_names(self) -> ColumnNames:
+        return self.description.column_names
+
+    def __first(self) -> tuple[RAW_DATA, ...] | None:
+        return self.rows[0] if len(self.rows) > 0 else None
+
+    def fetchone_dict(self) -> dict[str, Any] | None:
+        return row_to_dict_opt(self.column_names, self.__first())
+
+    def fetchall_dict(self) -> list[dict[str, Any]]:
+        return rows_to_dicts(self.column_names, self.rows)
+
+    def fetchone_class(self, klass: type[_T]) -> _T | None:
+        return row_to_class_opt(klass, self.column_names, self.__first())
+
+    def fetchall_class(self, klass: type[_T]) -> list[_T]:
+        return rows_to_classes(klass, self.column_names, self.rows)
+
+    def fetchone_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> _T | None:
+        return row_to_class_lambda_opt(ctor, self.column_names, self.__first())
+
+    def fetchall_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T]) -> list[_T]:
+        return rows_to_classes_lambda(ctor, self.column_names, self.rows)
+
+def batch_sql(statements: Sequence[BATCH_STATEMENT]) -> tuple[str, list[RAW_DATA]]:
+    """
+    Junta as instruções de um lote em um único texto SQL com vários comandos, acompanhado de todos os parâmetros na ordem em que são consumidos.
+    """
+    sql: str = ";\n".join(s.strip().rstrip(";") for s, p in statements)
+    return sql, [x for s, p in statements for x in p]
+
 class SimpleConnection(ABC):
 
     @abstractmethod
@@ -175,6 +307,44 @@ class SimpleConnection(ABC):
     def fetchmany_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> list[_T]:
         return rows_to_classes_lambda(ctor, self.column_names, self.fetchmany(size))
 
+    def fetchall_columns(self, use_numpy: bool = False) -> dict[str, Any]:
+        return rows_to_columns(self.description, self.fetchall(), use_numpy)
+
+    def fetchmany_columns(self, size: int = 0, use_numpy: bool = False) -> dict[str, Any]:
+        return rows_to_columns(self.description, self.fetchmany(size), use_numpy)
+
+    def __batch_size(self, size: int) -> int:
+        if size > 0: return size
+        return max(self.arraysize, MIN_STREAMING_BATCH)
+
+    def iter_rows(self, size: int = 0) -> Iterator[tuple[RAW_DATA, ...]]:
+        """
+        Percorre o resultado da última instrução executada sem carregá-lo inteiramente na memória.
+        As linhas são buscadas sob demanda em lotes de size linhas. Se size não for informado, usa o arraysize do cursor (ou MIN_STREAMING_BATCH, se for maior).
+        """
+        batch: int = self.__batch_size(size)
+        while True:
+            rows: Sequence[tuple[RAW_DATA, ...]] = self.fetchmany(batch)
+            if len(rows) == 0: return
+            yield from rows
+
+    def iter_dicts(self, size: int = 0) -> Iterator[dict[str, Any]]:
+        columns: ColumnNames = self.column_names
+        for row in self.iter_rows(size):
+            yield row_to_dict(columns, row)
+
+    def iter_class(self, klass: type[_T], size: int = 0) -> Iterator[_T]:
+        columns: ColumnNames = self.column_names
+        mapper: RowMapper[_T] | None = None
+        for row in self.iter_rows(size):
+            if mapper is None: mapper = row_mapper(klass, columns)
+            yield mapper(row)
+
+    def iter_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> Iterator[_T]:
+        columns: ColumnNames = self.column_names
+        for row in self.iter_rows(size):
+            yield row_to_class_lambda(ctor, columns, row)
+
     @abstractmethod
     def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ...) -> Self:
         ...
@@ -183,10 +353,38 @@ class SimpleConnection(ABC):
     def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ...) -> Self:
         ...
 
+    def execute_streaming(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        """
+        Executa a instrução de forma que o resultado seja trazido do servidor aos poucos, à medida que for lido com fetchmany ou iter_*, ao invés de ser todo carregado na memória de uma vez.
+        O resultado deve ser lido antes da próxima instrução, pois o que não tiver sido lido até lá é descartado.
+        Por padrão, é o mesmo que execute, o que basta para o SQLite, cujos cursores já são lidos sob demanda.
+        """
+        return self.execute(sql, parameters)
+
     @abstractmethod
     def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ...) -> Self:
         ...
 
+    def execute_batch(self, statements: Sequence[BATCH_STATEMENT]) -> list[ResultSet]:
+        """
+        Executa várias instruções parametrizadas e devolve um ResultSet para cada uma, na mesma ordem.
+        Os bancos de dados acessados pela rede enviam todas as instruções em uma única requisição, economizando as idas e vindas ao servidor.
+        Por padrão, as instruções são executadas uma após a outra, o que basta para o SQLite.
+        """
+        results: list[ResultSet] = []
+        for sql, parameters in statements:
+            self.execute(sql, parameters)
+            results.append(self.fetch_result_set())
+        return results
+
+    def fetch_result_set(self) -> ResultSet:
+        """
+        Lê todo o resultado da última instrução executada.
+        """
+        description: Descriptor = self.description
+        rows: Sequence[tuple[RAW_DATA, ...]] = self.fetchall() if len(description.columns) > 0 else []
+        return ResultSet(description, rows, self.rowcount, self.lastrowid)
+
     @abstractmethod
     def executescript(self, sql: str) -> Self:
         ...
@@ -226,14 +424,52 @@ class SimpleConnection(ABC):
         assert last is not None
         return last
 
+    def in_list(self, values: Sequence[RAW_DATA]) -> InList:
+        return padded_in_list(values)
+
+    def ping(self) -> None:
+        self.execute("SELECT 1")
+        self.fetchall()
+
+    def begin_read_only(self) -> None:
+        """
+        Inicia uma transação somente leitura. Por padrão, não faz nada e a transação segue como uma transação comum.
+        """
+        pass
+
+    def end_read_only(self) -> None:
+        """
+        Encerra a transação iniciada por begin_read_only, desfazendo-a.
+        """
+        self.rollback()
+
+    def savepoint(self, name: str) -> None:
+        """
+        Cria um ponto de salvamento dentro da transação corrente.
+        """
+        self.execute(f"SAVEPOINT {name}")
+
+    def release_savepoint(self, name: str) -> None:
+        """
+        Descarta o ponto de salvamento, mantendo o que foi feito depois dele como parte da transação corrente.
+        """
+        self.execute(f"RELEASE SAVEPOINT {name}")
+
+    def rollback_to_savepoint(self, name: str) -> None:
+        """
+        Desfaz o que foi feito desde o ponto de salvamento e o descarta. O que foi feito antes dele continua na transação corrente.
+        """
+        self.execute(f"ROLLBACK TO SAVEPOINT {name}")
+        self.execute(f"RELEASE SAVEPOINT {name}")
+
     def next(self) -> tuple[RAW_DATA, ...] | None:
         return self.fetchone()
 
     def __next__(self) -> tuple[RAW_DATA, ...] | None:
         return self.fetchone()
 
-    def __iter__(self) -> Iterator[tuple[RAW_DATA, ...] | None]:
-        yield self.fetchone()
+    def __iter__(self) -> Iterator[tuple[RAW_DATA, ...]]:
+        return self.iter_rows()
 
     @property
     @abstractmethod
@@ -1,6 +1,9 @@
-from typing import Any, Callable, cast, Iterator, Literal, Self, Sequence, TypeVar
+from typing import Any, Callable, cast, Generic, get_args, get_origin, get_type_hints, Iterator, Literal, Self, Sequence, TypeVar, Union
+from types import NoneType, UnionType
 from enum import Enum
+from dataclasses import Field, fields, is_dataclass, MISSING
 from dacite import Config, from_dict
+from dacite.exceptions import MissingValueError, UnexpectedDataError, WrongTypeError
 
 _T = TypeVar("_T")
 
@@ -8,11 +11,13 @@ class ColumnNames:
     def __init__(self, items: list[str]) -> None:
         self.__items: list[str] = items[:]
 
-        x: list[str] = []
+        x: set[str] = set()
         for c in items:
             if c in x:
                 raise ValueError(f"Repeated column name {c}.")
-            x.append(c)
+            x.add(c)
+
+        self.__hash: int = hash(tuple(items))
 
     def __len__(self) -> int:
         return len(self.__items)
@@ -20,6 +25,12 @@ class ColumnNames:
     def __getitem__(self, key: int) -> str:
         return self.__items[key]
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ColumnNames) and self.__items == other.__items
+
+    def __hash__(self) -> int:
+        return self.__hash
+
 def row_to_dict(columns: ColumnNames, row: tuple[Any, ...]) -> dict[str, Any]:
     if len(columns) != len(row):
         raise ValueError("Column descriptions and rows do not have the same length.")
@@ -41,9 +52,124 @@ def rows_to_dicts(columns: ColumnNames, rows: Sequence[tuple[Any, ...]]) -> list
 def row_to_class_lambda(ctor: Callable[[dict[str, Any]], _T], columns: ColumnNames, row: tuple[Any, ...]) -> _T:
     return ctor(row_to_dict(columns, row))
 
-def row_to_class(klass: type[_T], columns: ColumnNames, row: tuple[Any, ...]) -> _T:
+def row_to_class_dacite(klass: type[_T], columns: ColumnNames, row: tuple[Any, ...]) -> _T:
     return row_to_class_lambda(lambda d: from_dict(data_class = klass, data = d, config = Config(cast = [Enum], strict = True)), columns, row)
 
+_Converter = Callable[[Any], Any]
+
+def _make_instance_converter(name: str, expected: type[Any], nullable: bool) -> _Converter:
+    def convert(value: Any) -> Any:
+        if isinstance(value, expected) or (nullable and value is None): return value
+        raise WrongTypeError(expected, value, name)
+    return convert
+
+def _make_enum_converter(name: str, expected: type[Enum], nullable: bool) -> _Converter:
+    def convert(value: Any) -> Any:
+        if nullable and value is None: return None
+        try:
+            return expected(value)
+        except ValueError:
+            raise WrongTypeError(expected, value, name)
+    return convert
+
+def _no_conversion(value: Any) -> Any:
+    return value
+
+def _make_converter(name: str, expected: Any) -> _Converter | None:
+    """
+    Cria uma função que verifica e converte um valor para o tipo do campo da dataclass.
+    Somente tipos simples (classes, enums, Any e as suas versões opcionais) são suportados. Para os demais, retorna None.
+    """
+    if expected is Any: return _no_conversion
+    nullable: bool = False
+    if get_origin(expected) in [Union, UnionType]:
+        args: list[Any] = [a for a in get_args(expected) if a is not NoneType]
+        if len(args) != 1: return None
+        nullable = True
+        expected = args[0]
+    if not isinstance(expected, type) or get_origin(expected) is not None or is_dataclass(expected): return None
+    if issubclass(expected, Enum): return _make_enum_converter(name, expected, nullable)
+    return _make_instance_converter(name, expected, nullable)
+
+def _skip_validation(klass: type[Any]) -> Callable[..., None] | None:
+    """
+    Se a classe foi decorada com @dataclass_validate e não possui nenhum __post_init__ ou __post_type_validate__,
+    devolve o __init__ original gerado pelo @dataclass, que não repete a validação de tipos já feita pelo mapeador.
+    """
+    if hasattr(klass, "__post_init__") or hasattr(klass, "__post_type_validate__"): return None
+    return cast(Callable[..., None] | None, getattr(klass.__init__, "__wrapped__", None))
+
+class RowMapper(Generic[_T]):
+    """
+    Converte linhas com um determinado conjunto de colunas em instâncias de uma dataclass.
+    A correspondência entre as colunas e os campos da dataclass é verificada uma única vez, na criação do mapeador.
+    As instâncias são então construídas posicionalmente, com uma verificação de tipos simples por campo.
+    Para dataclasses com campos de tipos complexos, recorre ao dacite.
+    """
+
+    def __init__(self, klass: type[_T], columns: ColumnNames) -> None:
+        self.__klass: type[_T] = klass
+        self.__columns: ColumnNames = columns
+        self.__width: int = len(columns)
+        self.__fallback: bool = True
+        self.__order: list[tuple[int, _Converter]] = []
+        self.__init: Callable[..., None] | None = None
+
+        if not is_dataclass(klass):
+            return
+
+        all_fields: tuple[Field[Any], ...] = fields(klass)
+        names: list[str] = [columns[i] for i in range(0, len(columns))]
+        field_names: set[str] = {f.name for f in all_fields}
+
+        extra: set[str] = set(names) - field_names
+        if len(extra) > 0: raise UnexpectedDataError(extra)
+
+        for f in all_fields:
+            if f.name not in names and f.default is MISSING and f.default_factory is MISSING:
+                raise MissingValueError(f.name)
+
+        hints: dict[str, Any] = get_type_hints(klass)
+        order: list[tuple[int, _Converter]] = []
+        for f in all_fields:
+            if not f.init or f.name not in names: return
+            converter: _Converter | None = _make_converter(f.name, hints[f.name])
+            if converter is None: return
+            order.append((names.index(f.name), converter))
+
+        self.__order = order
+        self.__init = _skip_validation(klass)
+        self.__fallback = False
+
+    def __call__(self, row: tuple[Any, ...]) -> _T:
+        if len(row) != self.__width:
+            raise ValueError("Column descriptions and rows do not have the same length.")
+        if self.__fallback:
+            return row_to_class_dacite(self.__klass, self.__columns, row)
+        args: list[Any] = [converter(row[index]) for index, converter in self.__order]
+        init: Callable[..., None] | None = self.__init
+        if init is None:
+            return self.__klass(*args)
+        instance: _T = self.__klass.__new__(self.__klass)
+        init(instance, *args)
+        return instance
+
+    def all(self, rows: Sequence[tuple[Any, ...]]) -> list[_T]:
+        return [self(row) for row in rows]
+
+__mappers: dict[tuple[type[Any], ColumnNames], RowMapper[Any]] = {}
+
+def row_mapper(klass: type[_T], columns: ColumnNames) -> RowMapper[_T]:
+    key: tuple[type[Any], ColumnNames] = (klass, columns)
+    found: RowMapper[Any] | None = __mappers.get(key)
+    if found is not None: return cast(RowMapper[_T], found)
+    mapper: RowMapper[_T] = RowMapper(klass, columns)
+    __mappers[key] = mapper
+    return mapper
+
+def row_to_class(klass: type[_T], columns: ColumnNames, row: tuple[Any, ...]) -> _T:
+    return row_mapper(klass, columns)(row)
+
 def row_to_class_lambda_opt(ctor: Callable[[dict[str, Any]], _T], columns: ColumnNames, row: tuple[Any, ...] | None) -> _T | None:
     if row is None: return None
     return row_to_class_lambda(ctor, columns, row)
@@ -59,7 +185,5 @@ def rows_to_classes_lambda(ctor: Callable[[dict[str, Any]], _T], columns: Column
     return result
 
 def rows_to_classes(klass: type[_T], columns: ColumnNames, rows: Sequence[tuple[Any, ...]]) -> list[_T]:
-    result = []
-    for row in rows:
-        result.append(row_to_class(klass, columns, row))
-    return result
\ No newline at end of file
+    if len(rows) == 0: return []
+    return row_mapper(klass, columns).all(rows)
\ No newline at end of file
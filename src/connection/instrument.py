@@ -0,0 +1,257 @@
+from typing import Any, Callable, Self, Sequence, TypeVar
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from validator import dataclass_validate
+from .conn import BATCH_STATEMENT, batch_sql, Descriptor, InList, RAW_DATA, ResultSet, SimpleConnection
+import threading
+import time
+
+_T = TypeVar("_T")
+
+# Não é validada pelo dataclass_validate porque é criada a cada instrução executada.
+@dataclass(frozen = True)
+class QueryEvent:
+    operation: str
+    sql: str
+    parameter_count: int
+    elapsed_ns: int
+    rows: int
+    error: BaseException | None
+
+    @property
+    def is_fetch(self) -> bool:
+        return self.operation.startswith("fetch")
+
+class QueryObserver(ABC):
+
+    @abstractmethod
+    def observe(self, event: QueryEvent) -> None:
+        ...
+
+class InstrumentedConnection(SimpleConnection):
+    """
+    Envolve uma SimpleConnection e avisa os observadores a cada execute, execute_streaming, executemany, execute_batch, executescript, callproc e fetch*.
+    Os demais métodos fetch*, iter_* e afins são construídos a partir destes e por isso também são observados.
+    """
+
+    def __init__(self, conn: SimpleConnection, observers: Sequence[QueryObserver]) -> None:
+        self.__conn: SimpleConnection = conn
+        self.__observers: Sequence[QueryObserver] = observers
+        self.__sql: str = ""
+
+    @property
+    def wrapped(self) -> SimpleConnection:
+        return self.__conn
+
+    def __notify(self, operation: str, sql: str, parameter_count: int, start: int, rows: int, error: BaseException | None) -> None:
+        event: QueryEvent = QueryEvent(operation, sql, parameter_count, time.perf_counter_ns() - start, rows, error)
+        for observer in self.__observers:
+            observer.observe(event)
+
+    def __run(self, operation: str, sql: str, parameter_count: int, what: Callable[[], Any]) -> None:
+        self.__sql = sql
+        start: int = time.perf_counter_ns()
+        try:
+            what()
+        except BaseException as x:
+            self.__notify(operation, sql, parameter_count, start, 0, x)
+            raise x
+        self.__notify(operation, sql, parameter_count, start, self.__conn.rowcount, None)
+
+    def __fetch(self, operation: str, what: Callable[[], _T], count: Callable[[_T], int]) -> _T:
+        start: int = time.perf_counter_ns()
+        try:
+            result: _T = what()
+        except BaseException as x:
+            self.__notify(operation, self.__sql, 0, start, 0, x)
+            raise x
+        self.__notify(operation, self.__sql, 0, start, count(result), None)
+        return result
+
+    def commit(self) -> None:
+        self.__conn.commit()
+
+    def rollback(self) -> None:
+        self.__conn.rollback()
+
+    def close(self) -> None:
+        self.__conn.close()
+
+    def ping(self) -> None:
+        self.__conn.ping()
+
+    def in_list(self, values: Sequence[RAW_DATA]) -> InList:
+        return self.__conn.in_list(values)
+
+    def begin_read_only(self) -> None:
+        self.__conn.begin_read_only()
+
+    def end_read_only(self) -> None:
+        self.__conn.end_read_only()
+
+    def savepoint(self, name: str) -> None:
+        self.__conn.savepoint(name)
+
+    def release_savepoint(self, name: str) -> None:
+        self.__conn.release_savepoint(name)
+
+    def rollback_to_savepoint(self, name: str) -> None:
+        self.__conn.rollback_to_savepoint(name)
+
+    def fetchone(self) -> tuple[RAW_DATA, ...] | None:
+        return self.__fetch("fetchone", self.__conn.fetchone, lambda r: 0 if r is None else 1)
+
+    def fetchall(self) -> Sequence[tuple[RAW_DATA, ...]]:
+        return self.__fetch("fetchall", self.__conn.fetchall, len)
+
+    def fetchmany(self, size: int = 0) -> Sequence[tuple[RAW_DATA, ...]]:
+        return self.__fetch("fetchmany", lambda: self.__conn.fetchmany(size), len)
+
+    def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__run("callproc", sql, len(parameters), lambda: self.__conn.callproc(sql, parameters))
+        return self
+
+    def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__run("execute", sql, len(parameters), lambda: self.__conn.execute(sql, parameters))
+        return self
+
+    def execute_streaming(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__run("execute_streaming", sql, len(parameters), lambda: self.__conn.execute_streaming(sql, parameters))
+        return self
+
+    def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ()) -> Self:
+        self.__run("executemany", sql, sum(len(p) for p in parameters), lambda: self.__conn.executemany(sql, parameters))
+        return self
+
+    def execute_batch(self, statements: Sequence[BATCH_STATEMENT]) -> list[ResultSet]:
+        sql, parameters = batch_sql(statements)
+        results: list[list[ResultSet]] = []
+        self.__run("execute_batch", sql, len(parameters), lambda: results.append(self.__conn.execute_batch(statements)))
+        return results[0]
+
+    def executescript(self, sql: str) -> Self:
+        self.__run("executescript", sql, 0, lambda: self.__conn.executescript(sql))
+        return self
+
+    @property
+    def arraysize(self) -> int:
+        return self.__conn.arraysize
+
+    @arraysize.setter
+    def arraysize(self, size: int) -> None:
+        self.__conn.arraysize = size
+
+    @property
+    def rowcount(self) -> int:
+        return self.__conn.rowcount
+
+    @property
+    def description(self) -> Descriptor:
+        return self.__conn.description
+
+    @property
+    def lastrowid(self) -> int | None:
+        return self.__conn.lastrowid
+
+    @property
+    def raw_connection(self) -> object:
+        return self.__conn.raw_connection
+
+    @property
+    def raw_cursor(self) -> object:
+        return self.__conn.raw_cursor
+
+class SlowQueryLog(QueryObserver):
+    """
+    Registra as operações que demorarem pelo menos threshold_ms milissegundos.
+    """
+
+    def __init__(self, threshold_ms: float, printer: Callable[[str], None] = print) -> None:
+        self.__threshold_ns: int = int(threshold_ms * 1_000_000)
+        self.__printer: Callable[[str], None] = printer
+
+    def observe(self, event: QueryEvent) -> None:
+        if event.elapsed_ns < self.__threshold_ns: return
+        status: str = "ok" if event.error is None else f"raised {event.error!r}"
+        self.__printer(f"Slow {event.operation} ({event.elapsed_ns / 1_000_000:.3f} ms, {event.parameter_count} parameters, {event.rows} rows, {status}): {event.sql}")
+
+# Limites superiores, em milissegundos, de cada faixa dos histogramas. A última faixa não tem limite.
+LATENCY_BUCKETS_MS: list[float] = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+class LatencyHistogram(QueryObserver):
+    """
+    Conta, para cada instrução SQL, quantas execuções caíram em cada faixa de LATENCY_BUCKETS_MS.
+    O tempo dos fetch* não é contado, apenas o das execuções.
+    """
+
+    def __init__(self) -> None:
+        self.__bounds: list[int] = [int(b * 1_000_000) for b in LATENCY_BUCKETS_MS]
+        self.__counts: dict[str, list[int]] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def observe(self, event: QueryEvent) -> None:
+        if event.is_fetch: return
+        bucket: int = len(self.__bounds)
+        for i, bound in enumerate(self.__bounds):
+            if event.elapsed_ns <= bound:
+                bucket = i
+                break
+        with self.__lock:
+            counts: list[int] | None = self.__counts.get(event.sql)
+            if counts is None:
+                counts = [0] * (len(self.__bounds) + 1)
+                self.__counts[event.sql] = counts
+            counts[bucket] += 1
+
+    @property
+    def statements(self) -> list[str]:
+        with self.__lock:
+            return list(self.__counts.keys())
+
+    def histogram(self, sql: str) -> list[tuple[float | None, int]]:
+        with self.__lock:
+            counts: list[int] = list(self.__counts.get(sql, [0] * (len(self.__bounds) + 1)))
+        bounds: list[float | None] = [*LATENCY_BUCKETS_MS, None]
+        return list(zip(bounds, counts))
+
+@dataclass_validate
+@dataclass(frozen = True)
+class QueryStats:
+    sql: str
+    executions: int
+    total_ns: int
+    max_ns: int
+    rows: int
+    errors: int
+
+class TopQueries(QueryObserver):
+    """
+    Acumula o tempo gasto com cada instrução SQL, incluindo os fetch* que a seguem, e informa as mais custosas.
+    """
+
+    def __init__(self, size: int = 10) -> None:
+        self.__size: int = size
+        self.__stats: dict[str, list[int]] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def observe(self, event: QueryEvent) -> None:
+        with self.__lock:
+            s: list[int] | None = self.__stats.get(event.sql)
+            if s is None:
+                s = [0, 0, 0, 0, 0]
+                self.__stats[event.sql] = s
+            if not event.is_fetch: s[0] += 1
+            s[1] += event.elapsed_ns
+            s[2] = max(s[2], event.elapsed_ns)
+            if event.is_fetch: s[3] += event.rows
+            if event.error is not None: s[4] += 1
+
+    def report(self) -> list[QueryStats]:
+        with self.__lock:
+            all: list[QueryStats] = [QueryStats(sql, *s) for sql, s in self.__stats.items()]
+        all.sort(key = lambda q: q.total_ns, reverse = True)
+        return all[:self.__size]
+
+    def print_report(self, printer: Callable[[str], None] = print) -> None:
+        for q in self.report():
+            printer(f"{q.total_ns / 1_000_000:10.3f} ms total - {q.executions:6} executions - {q.max_ns / 1_000_000:9.3f} ms max - {q.rows:8} rows - {q.errors} errors: {q.sql}")
\ No newline at end of file
@@ -1,31 +1,168 @@
-from typing import Any, Callable, cast, Self, Sequence, TypeVar
+from typing import Any, Callable, cast, Self, Sequence, TYPE_CHECKING, TypeVar
 from decorators.for_all import for_all_methods
 from functools import wraps
-from .conn import ColumnDescriptor, Descriptor, IntegrityViolationException, NotImplementedError, NullStatus, RAW_DATA, SimpleConnection, TypeCode
-from .trans import TransactedConnection
-from sqlite3 import Connection, connect as db_connect, Cursor, IntegrityError
-from dataclasses import dataclass
+from .conn import ColumnDescriptor, Descriptor, InList, IntegrityViolationException, NotImplementedError, NullStatus, RAW_DATA, RetryableException, SimpleConnection, TypeCode
+from .trans import ConnectionPool, PoolConfig, TransactedConnection
+from .registry import ConnectionUrl
+from sqlite3 import Connection, connect as db_connect, Cursor, IntegrityError, OperationalError
+from dataclasses import dataclass, replace
 from validator import dataclass_validate
+from enum import Enum
+from urllib.parse import quote
+import json
+
+if TYPE_CHECKING:
+    from .asyncconn import AsyncTransactedConnection
+
+class JournalMode(Enum):
+    DELETE = "DELETE"
+    TRUNCATE = "TRUNCATE"
+    PERSIST = "PERSIST"
+    MEMORY = "MEMORY"
+    WAL = "WAL"
+    OFF = "OFF"
+
+class Synchronous(Enum):
+    OFF = "OFF"
+    NORMAL = "NORMAL"
+    FULL = "FULL"
+    EXTRA = "EXTRA"
+
+class TempStore(Enum):
+    DEFAULT = "DEFAULT"
+    FILE = "FILE"
+    MEMORY = "MEMORY"
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Profile:
+    """
+    Ajustes aplicados a cada conexão no momento em que ela é aberta. Os campos None mantêm o padrão do SQLite.
+    cache_size segue a semântica do PRAGMA de mesmo nome (valores negativos são em KiB), mmap_size é em bytes e busy_timeout é em milissegundos.
+    """
+    journal_mode: JournalMode | None
+    synchronous : Synchronous | None
+    cache_size  : int | None
+    mmap_size   : int | None
+    temp_store  : TempStore | None
+    busy_timeout: int
+    foreign_keys: bool
+
+    @property
+    def pragmas(self) -> list[str]:
+        p: list[str] = [f"PRAGMA foreign_keys = {'ON' if self.foreign_keys else 'OFF'}"]
+        if self.journal_mode is not None: p.append(f"PRAGMA journal_mode = {self.journal_mode.value}")
+        if self.synchronous  is not None: p.append(f"PRAGMA synchronous = {self.synchronous.value}")
+        if self.cache_size   is not None: p.append(f"PRAGMA cache_size = {self.cache_size}")
+        if self.mmap_size    is not None: p.append(f"PRAGMA mmap_size = {self.mmap_size}")
+        if self.temp_store   is not None: p.append(f"PRAGMA temp_store = {self.temp_store.value}")
+        return p
+
+PROFILES: dict[str, Profile] = {
+    # O comportamento padrão do SQLite, apenas com as chaves estrangeiras ligadas.
+    "default": Profile(None, None, None, None, None, 5000, True),
+
+    # Leitores concorrentes não são bloqueados pelos escritores. Indicado para servir a aplicação.
+    "wal": Profile(JournalMode.WAL, Synchronous.NORMAL, -20000, 268435456, TempStore.MEMORY, 5000, True),
+
+    # Para cargas em massa, trocando a durabilidade em caso de queda por velocidade.
+    "bulk": Profile(JournalMode.MEMORY, Synchronous.OFF, -100000, 268435456, TempStore.MEMORY, 30000, True),
+}
 
 @dataclass_validate
 @dataclass(frozen = True)
 class ConnectionData:
     file_name: str
+    cached_statements: int
+    profile: Profile
+    read_only: bool
 
     @staticmethod
     def create( \
             *, \
             file_name: str, \
+            cached_statements: int = 256, \
+            profile: str = "default", \
+            read_only: bool = False, \
+            journal_mode: JournalMode | None = None, \
+            synchronous: Synchronous | None = None, \
+            cache_size: int | None = None, \
+            mmap_size: int | None = None, \
+            temp_store: TempStore | None = None, \
+            busy_timeout: int | None = None, \
+            foreign_keys: bool | None = None \
     ) -> "ConnectionData":
-        return ConnectionData(file_name)
+        if profile not in PROFILES: raise ValueError(f"Unknown SQLite profile {profile}.")
+        p: Profile = PROFILES[profile]
+        if journal_mode is not None: p = replace(p, journal_mode = journal_mode)
+        if synchronous  is not None: p = replace(p, synchronous  = synchronous )
+        if cache_size   is not None: p = replace(p, cache_size   = cache_size  )
+        if mmap_size    is not None: p = replace(p, mmap_size    = mmap_size   )
+        if temp_store   is not None: p = replace(p, temp_store   = temp_store  )
+        if busy_timeout is not None: p = replace(p, busy_timeout = busy_timeout)
+        if foreign_keys is not None: p = replace(p, foreign_keys = foreign_keys)
+        return ConnectionData(file_name, cached_statements, p, read_only)
+
+    @property
+    def __database(self) -> str:
+        if not self.read_only: return self.file_name
+        return f"file:{quote(self.file_name)}?mode=ro"
+
+    @property
+    def __pragmas(self) -> list[str]:
+        # O modo de journal fica gravado no arquivo e não pode ser alterado por uma conexão somente leitura.
+        if not self.read_only: return self.profile.pragmas
+        return [p for p in self.profile.pragmas if not p.startswith("PRAGMA journal_mode")] + ["PRAGMA query_only = ON"]
+
+    def __open(self, same_thread: bool) -> Connection:
+        conn: Connection = db_connect( \
+                self.__database, \
+                timeout = self.profile.busy_timeout / 1000, \
+                check_same_thread = same_thread, \
+                cached_statements = self.cached_statements, \
+                uri = self.read_only \
+        )
+        for pragma in self.__pragmas:
+            conn.execute(pragma).close()
+        return conn
+
+    def connect(self, pool: PoolConfig | None = None, readers: PoolConfig | None = None) -> TransactedConnection:
+        # Conexões de um pool podem ser usadas por uma thread diferente daquela que as criou, mas nunca por duas ao mesmo tempo.
+        def make_connection() -> _Sqlite3ConnectionWrapper:
+            return _Sqlite3ConnectionWrapper(self.__open(pool is None), self.read_only)
+        t: TransactedConnection = TransactedConnection.create(make_connection, pool)
+        if readers is None: return t
+
+        reader_data: ConnectionData = replace(self, read_only = True)
+        def make_reader() -> _Sqlite3ConnectionWrapper:
+            return _Sqlite3ConnectionWrapper(reader_data.__open(False), True)
+        return t.with_readers(ConnectionPool(make_reader, readers))
 
-    def connect(self) -> TransactedConnection:
+    def connect_async(self) -> "AsyncTransactedConnection":
+        from .asyncconn import AsyncTransactedConnection
+        # O SQLite serializa as escritas de qualquer forma, então basta uma única thread, que é a mesma onde as conexões são abertas.
         def make_connection() -> _Sqlite3ConnectionWrapper:
-            return _Sqlite3ConnectionWrapper(db_connect(self.file_name))
-        return TransactedConnection(make_connection)
+            return _Sqlite3ConnectionWrapper(self.__open(True), self.read_only)
+        return AsyncTransactedConnection.dedicated(make_connection)
+
+def connect_url(url: ConnectionUrl) -> TransactedConnection:
+    """
+    Atende às URLs sqlite:///arquivo.db, aceitando as opções profile, cached_statements e read_only.
+    """
+    url.check_options({"profile", "cached_statements", "read_only"})
+    cached: int | None = url.int_option("cached_statements")
+    return ConnectionData.create( \
+        file_name = url.database, \
+        cached_statements = 256 if cached is None else cached, \
+        profile = url.option("profile", "default"), \
+        read_only = url.bool_option("read_only", False) \
+    ).connect(url.pool, url.readers)
 
 _TRANS = TypeVar("_TRANS", bound = Callable[..., Any])
 
+# SQLITE_BUSY e SQLITE_LOCKED.
+_RETRYABLE: frozenset[int] = frozenset([5, 6])
+
 def _wrap_exceptions(operation: _TRANS) -> _TRANS:
 
     @wraps(operation)
@@ -34,16 +171,21 @@ def _wrap_exceptions(operation: _TRANS) -> _TRANS:
             return operation(*args, **kwargs)
         except IntegrityError as x:
             raise IntegrityViolationException(str(x))
+        except OperationalError as x:
+            # O código primário fica nos 8 bits mais baixos do código estendido.
+            if x.sqlite_errorcode & 0xFF in _RETRYABLE: raise RetryableException(str(x))
+            raise x
 
     return cast(_TRANS, inner)
 
 @for_all_methods(_wrap_exceptions)
 class _Sqlite3ConnectionWrapper(SimpleConnection):
 
-    def __init__(self, conn: Connection) -> None:
+    def __init__(self, conn: Connection, read_only: bool = False) -> None:
         self.__conn: Connection = conn
         self.__curr: Cursor = conn.cursor()
-        self.execute("PRAGMA foreign_keys = ON;")
+        self.__descriptor: Descriptor | None = None
+        self.__read_only: bool = read_only
 
     def commit(self) -> None:
         self.__conn.commit()
@@ -55,6 +197,34 @@ class _Sqlite3ConnectionWrapper(SimpleConnection):
         self.__curr.close()
         self.__conn.close()
 
+    def begin_read_only(self) -> None:
+        # O BEGIN explícito garante que todas as leituras vejam o mesmo retrato do banco de dados.
+        if not self.__read_only: self.__conn.execute("PRAGMA query_only = ON").close()
+        try:
+            self.__conn.execute("BEGIN DEFERRED").close()
+        except BaseException as x:
+            # Sem o BEGIN, o end_read_only não é chamado, e a conexão não pode voltar ao pool ainda proibida de escrever.
+            if not self.__read_only: self.__conn.execute("PRAGMA query_only = OFF").close()
+            raise x
+
+    def end_read_only(self) -> None:
+        self.__conn.rollback()
+        if not self.__read_only: self.__conn.execute("PRAGMA query_only = OFF").close()
+
+    # Os pontos de salvamento usam um cursor à parte para não descartar o resultado pendente no cursor principal.
+
+    def savepoint(self, name: str) -> None:
+        # Fora de uma transação, o SAVEPOINT abriria uma que seria efetivada pelo RELEASE. O módulo sqlite3 só inicia transações antes de INSERT, UPDATE e DELETE.
+        if not self.__conn.in_transaction: self.__conn.execute("BEGIN").close()
+        self.__conn.execute(f"SAVEPOINT {name}").close()
+
+    def release_savepoint(self, name: str) -> None:
+        self.__conn.execute(f"RELEASE SAVEPOINT {name}").close()
+
+    def rollback_to_savepoint(self, name: str) -> None:
+        self.__conn.execute(f"ROLLBACK TO SAVEPOINT {name}").close()
+        self.__conn.execute(f"RELEASE SAVEPOINT {name}").close()
+
     def fetchone(self) -> tuple[Any, ...] | None:
         return cast(tuple[Any, ...], self.__curr.fetchone())
 
@@ -67,15 +237,22 @@ class _Sqlite3ConnectionWrapper(SimpleConnection):
     def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
         raise NotImplementedError("Sorry. The callproc method was not implemented yet.")
 
+    # Uma única forma de instrução para listas de qualquer tamanho, sem esbarrar no limite de parâmetros do SQLite.
+    def in_list(self, values: Sequence[RAW_DATA]) -> InList:
+        return InList("(SELECT value FROM json_each(?))", [json.dumps(list(values))])
+
     def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__descriptor = None
         self.__curr.execute(sql, parameters)
         return self
 
     def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ()) -> Self:
+        self.__descriptor = None
         self.__curr.executemany(sql, parameters)
         return self
 
     def executescript(self, sql: str) -> Self:
+        self.__descriptor = None
         self.__curr.executescript(sql)
         return self
 
@@ -94,11 +271,16 @@ class _Sqlite3ConnectionWrapper(SimpleConnection):
     def __make_descriptor(self, k: tuple[str, None, None, None, None, None, None]) -> ColumnDescriptor:
         return ColumnDescriptor.create(name = k[0])
 
-    @property
-    def description(self) -> Descriptor:
+    def __make_description(self) -> Descriptor:
         if self.__curr.description is None: return Descriptor([])
         return Descriptor([self.__make_descriptor(k) for k in self.__curr.description])
 
+    # O descritor é construído uma única vez por instrução executada.
+    @property
+    def description(self) -> Descriptor:
+        if self.__descriptor is None: self.__descriptor = self.__make_description()
+        return self.__descriptor
+
     @property
     def lastrowid(self) -> int | None:
         return self.__curr.lastrowid
@@ -1,30 +1,558 @@
-from typing import Any, Callable, cast, Literal, Self, Sequence, TypeVar
-from .conn import ColumnNames, Descriptor, RAW_DATA, SimpleConnection, TransactionNotActiveException
+from typing import Any, Callable, cast, Iterator, Literal, Self, Sequence, TypeVar
+from .conn import BATCH_STATEMENT, ColumnNames, Descriptor, InList, RAW_DATA, ResultSet, RetryableException, SimpleConnection, TransactionNotActiveException
+from .instrument import InstrumentedConnection, QueryObserver
+from contextvars import ContextVar
 from types import TracebackType
 from functools import wraps
+from dataclasses import dataclass
+from validator import dataclass_validate
+from enum import Enum
+import random
 import threading
+import time
 
 _T = TypeVar("_T")
 _TRANS = TypeVar("_TRANS", bound = Callable[..., Any])
 
+# Instruções que começam assim não alteram nada. Qualquer outra conta como escrita, o que no pior caso só mantém as leituras no primário por mais tempo.
+_READ_STATEMENTS: tuple[str, ...] = ("SELECT", "SHOW", "EXPLAIN", "DESCRIBE")
+
+def _is_write(sql: str) -> bool:
+    return not sql.lstrip().upper().startswith(_READ_STATEMENTS)
+
+class PoolTimeoutException(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+class PoolClosedException(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+class NoReplicaAvailableException(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+@dataclass_validate
+@dataclass(frozen = True)
+class PoolConfig:
+    min_size        : int
+    max_size        : int
+    max_idle        : float | None
+    max_lifetime    : float | None
+    checkout_timeout: float | None
+    ping_on_checkout: bool
+
+    @staticmethod
+    def create( \
+            *, \
+            min_size        : int = 0, \
+            max_size        : int = 10, \
+            max_idle        : float | None = 300.0, \
+            max_lifetime    : float | None = 3600.0, \
+            checkout_timeout: float | None = 30.0, \
+            ping_on_checkout: bool = True \
+    ) -> "PoolConfig":
+        if min_size < 0: raise ValueError("The pool min_size can't be negative.")
+        if max_size < 1: raise ValueError("The pool max_size should be at least 1.")
+        if min_size > max_size: raise ValueError("The pool min_size can't be greater than max_size.")
+        return PoolConfig(min_size, max_size, max_idle, max_lifetime, checkout_timeout, ping_on_checkout)
+
+@dataclass_validate
+@dataclass(frozen = True)
+class PoolStats:
+    created      : int
+    destroyed    : int
+    checkouts    : int
+    waits        : int
+    timeouts     : int
+    failed_pings : int
+    idle         : int
+    in_use       : int
+
+@dataclass_validate
+@dataclass(frozen = True)
+class RetryPolicy:
+    """
+    Define como uma transação que falhou com RetryableException é tentada novamente.
+    As esperas crescem exponencialmente a partir de base_delay, limitadas a max_delay, e são sorteadas entre zero e esse valor.
+    Nenhuma nova tentativa é feita se com a espera o tempo total passar de deadline segundos.
+    """
+    max_attempts: int
+    base_delay  : float
+    max_delay   : float
+    deadline    : float | None
+
+    @staticmethod
+    def create( \
+            *, \
+            max_attempts: int = 5, \
+            base_delay  : float = 0.01, \
+            max_delay   : float = 1.0, \
+            deadline    : float | None = 5.0 \
+    ) -> "RetryPolicy":
+        if max_attempts < 1: raise ValueError("The retry max_attempts should be at least 1.")
+        return RetryPolicy(max_attempts, base_delay, max_delay, deadline)
+
+    def delay(self, attempt: int, jitter: float) -> float:
+        return min(self.max_delay, self.base_delay * 2.0 ** (attempt - 1)) * jitter
+
+    def run( \
+            self, \
+            attempt: Callable[[], _T], \
+            *, \
+            sleep : Callable[[float], None] = time.sleep, \
+            clock : Callable[[], float] = time.monotonic, \
+            jitter: Callable[[], float] = random.random \
+    ) -> _T:
+        start: float = clock()
+        n: int = 1
+        while True:
+            try:
+                return attempt()
+            except RetryableException as x:
+                if n >= self.max_attempts: raise x
+                wait: float = self.delay(n, jitter())
+                if self.deadline is not None and clock() + wait - start > self.deadline: raise x
+                sleep(wait)
+                n += 1
+
+class _PoolEntry:
+
+    def __init__(self, conn: SimpleConnection, now: float) -> None:
+        self.conn: SimpleConnection = conn
+        self.created_at: float = now
+        self.last_used: float = now
+
+class ConnectionPool:
+    """
+    Mantém um conjunto de conexões abertas para que sejam reaproveitadas entre as transações ao invés de serem abertas e fechadas a cada uso.
+    As conexões ociosas por mais de max_idle segundos ou abertas há mais de max_lifetime segundos são descartadas preguiçosamente, no momento em que a conexão é obtida ou devolvida.
+    """
+
+    def __init__(self, factory: Callable[[], SimpleConnection], config: PoolConfig = PoolConfig.create(), *, clock: Callable[[], float] = time.monotonic) -> None:
+        self.__factory: Callable[[], SimpleConnection] = factory
+        self.__config: PoolConfig = config
+        self.__clock: Callable[[], float] = clock
+        self.__cond: threading.Condition = threading.Condition()
+        self.__idle: list[_PoolEntry] = []
+        self.__in_use: dict[int, _PoolEntry] = {}
+        self.__size: int = 0
+        self.__closed: bool = False
+        self.__created: int = 0
+        self.__destroyed: int = 0
+        self.__checkouts: int = 0
+        self.__waits: int = 0
+        self.__timeouts: int = 0
+        self.__failed_pings: int = 0
+
+        for i in range(0, config.min_size):
+            self.__size += 1
+            self.__idle.append(self.__create_entry())
+
+    @property
+    def config(self) -> PoolConfig:
+        return self.__config
+
+    @property
+    def stats(self) -> PoolStats:
+        with self.__cond:
+            return PoolStats( \
+                    self.__created, \
+                    self.__destroyed, \
+                    self.__checkouts, \
+                    self.__waits, \
+                    self.__timeouts, \
+                    self.__failed_pings, \
+                    len(self.__idle), \
+                    len(self.__in_use) \
+            )
+
+    def __create_entry(self) -> _PoolEntry:
+        try:
+            entry: _PoolEntry = _PoolEntry(self.__factory(), self.__clock())
+        except BaseException as x:
+            with self.__cond:
+                self.__size -= 1
+                self.__cond.notify()
+            raise x
+        with self.__cond:
+            self.__created += 1
+        return entry
+
+    def __destroy(self, entry: _PoolEntry) -> None:
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self.__cond:
+            self.__destroyed += 1
+
+    def __expired(self, entry: _PoolEntry, now: float) -> bool:
+        lifetime: float | None = self.__config.max_lifetime
+        return lifetime is not None and now - entry.created_at >= lifetime
+
+    def __evict_idle(self, now: float) -> list[_PoolEntry]:
+        # Deve ser chamado com o lock obtido. As conexões devolvidas devem ser fechadas após o lock ser liberado.
+        max_idle: float | None = self.__config.max_idle
+        keep: list[_PoolEntry] = []
+        evicted: list[_PoolEntry] = []
+        for entry in self.__idle:
+            too_old: bool = self.__expired(entry, now)
+            too_idle: bool = max_idle is not None and now - entry.last_used >= max_idle and self.__size - len(evicted) > self.__config.min_size
+            if too_old or too_idle:
+                evicted.append(entry)
+            else:
+                keep.append(entry)
+        self.__idle = keep
+        self.__size -= len(evicted)
+        return evicted
+
+    def __healthy(self, entry: _PoolEntry) -> bool:
+        if self.__expired(entry, self.__clock()): return False
+        if not self.__config.ping_on_checkout: return True
+        try:
+            entry.conn.ping()
+            return True
+        except Exception:
+            with self.__cond:
+                self.__failed_pings += 1
+            return False
+
+    def __reserve(self) -> _PoolEntry | None:
+        timeout: float | None = self.__config.checkout_timeout
+        deadline: float | None = None if timeout is None else self.__clock() + timeout
+        waited: bool = False
+        evicted: list[_PoolEntry] = []
+        try:
+            with self.__cond:
+                while True:
+                    if self.__closed: raise PoolClosedException("The connection pool is closed.")
+                    evicted.extend(self.__evict_idle(self.__clock()))
+                    if len(self.__idle) > 0:
+                        return self.__idle.pop()
+                    if self.__size < self.__config.max_size:
+                        self.__size += 1
+                        return None
+                    if not waited:
+                        waited = True
+                        self.__waits += 1
+                    remaining: float | None = None if deadline is None else deadline - self.__clock()
+                    if remaining is not None and remaining <= 0:
+                        self.__timeouts += 1
+                        raise PoolTimeoutException(f"Timed out after {timeout} seconds waiting for a connection.")
+                    self.__cond.wait(remaining)
+        finally:
+            for entry in evicted:
+                self.__destroy(entry)
+
+    def acquire(self) -> SimpleConnection:
+        """
+        Obtém uma conexão do pool, criando uma nova se não houver nenhuma ociosa e o tamanho máximo ainda não tiver sido atingido.
+        Caso o pool esteja cheio, aguarda até checkout_timeout segundos por uma devolução antes de lançar PoolTimeoutException.
+        """
+        reserved: _PoolEntry | None = self.__reserve()
+        while reserved is not None and not self.__healthy(reserved):
+            # A vaga da conexão ruim é reaproveitada pela próxima conexão ociosa ou por uma conexão nova.
+            self.__destroy(reserved)
+            with self.__cond:
+                if len(self.__idle) > 0:
+                    reserved = self.__idle.pop()
+                    self.__size -= 1
+                else:
+                    reserved = None
+        entry: _PoolEntry = self.__create_entry() if reserved is None else reserved
+        with self.__cond:
+            self.__checkouts += 1
+            self.__in_use[id(entry.conn)] = entry
+        return entry.conn
+
+    def release(self, conn: SimpleConnection) -> None:
+        """
+        Devolve ao pool uma conexão obtida por meio do método acquire. Qualquer transação pendente é desfeita.
+        """
+        with self.__cond:
+            entry: _PoolEntry = self.__in_use.pop(id(conn))
+        discard: bool = self.__closed or self.__expired(entry, self.__clock())
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self.__destroy(entry)
+        with self.__cond:
+            if discard:
+                self.__size -= 1
+            else:
+                entry.last_used = self.__clock()
+                self.__idle.append(entry)
+            self.__cond.notify()
+
+    def close(self) -> None:
+        """
+        Fecha todas as conexões ociosas. As conexões em uso são fechadas quando forem devolvidas.
+        """
+        with self.__cond:
+            self.__closed = True
+            idle: list[_PoolEntry] = self.__idle
+            self.__idle = []
+            self.__size -= len(idle)
+            self.__cond.notify_all()
+        for entry in idle:
+            self.__destroy(entry)
+
+class ReplicaStrategy(Enum):
+    ROUND_ROBIN = "ROUND_ROBIN"
+    LEAST_LOADED = "LEAST_LOADED"
+
+@dataclass_validate
+@dataclass(frozen = True)
+class ReplicaStatus:
+    index   : int
+    healthy : bool
+    failures: int
+    in_use  : int
+
+class _Replica:
+
+    def __init__(self, index: int, pool: ConnectionPool) -> None:
+        self.index: int = index
+        self.pool: ConnectionPool = pool
+        self.down_until: float | None = None
+        self.failures: int = 0
+
+class ReplicaSet:
+    """
+    Distribui as conexões de leitura entre os pools de várias réplicas, escolhidas em rodízio ou pela menor quantidade de conexões em uso.
+    Uma réplica que falha ao fornecer uma conexão (inclusive no ping feito pelo pool) é dada como fora do ar e só volta a ser tentada após recheck_interval segundos.
+    Se nenhuma réplica puder ser usada, lança NoReplicaAvailableException, e a TransactedConnection recorre então ao primário.
+    """
+
+    def __init__( \
+            self, \
+            replicas: Sequence[ConnectionPool], \
+            strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN, \
+            *, \
+            recheck_interval: float = 10.0, \
+            clock: Callable[[], float] = time.monotonic \
+    ) -> None:
+        self.__replicas: list[_Replica] = [_Replica(i, pool) for i, pool in enumerate(replicas)]
+        self.__strategy: ReplicaStrategy = strategy
+        self.__recheck_interval: float = recheck_interval
+        self.__clock: Callable[[], float] = clock
+        self.__lock: threading.Lock = threading.Lock()
+        self.__next: int = 0
+        self.__owners: dict[int, ConnectionPool] = {}
+
+    @property
+    def strategy(self) -> ReplicaStrategy:
+        return self.__strategy
+
+    @property
+    def status(self) -> list[ReplicaStatus]:
+        now: float = self.__clock()
+        with self.__lock:
+            return [ReplicaStatus(r.index, self.__up(r, now), r.failures, r.pool.stats.in_use) for r in self.__replicas]
+
+    def __up(self, replica: _Replica, now: float) -> bool:
+        return replica.down_until is None or now >= replica.down_until
+
+    def __candidates(self) -> list[_Replica]:
+        now: float = self.__clock()
+        with self.__lock:
+            up: list[_Replica] = [r for r in self.__replicas if self.__up(r, now)]
+            if self.__strategy == ReplicaStrategy.LEAST_LOADED:
+                return sorted(up, key = lambda r: r.pool.stats.in_use)
+            if len(up) == 0: return up
+            start: int = self.__next % len(up)
+            self.__next += 1
+            return up[start:] + up[:start]
+
+    def __mark(self, replica: _Replica, healthy: bool) -> None:
+        with self.__lock:
+            if healthy:
+                replica.down_until = None
+            else:
+                replica.down_until = self.__clock() + self.__recheck_interval
+                replica.failures += 1
+
+    def acquire(self) -> SimpleConnection:
+        for replica in self.__candidates():
+            try:
+                conn: SimpleConnection = replica.pool.acquire()
+            except PoolTimeoutException:
+                # A réplica está apenas ocupada, e não fora do ar.
+                continue
+            except Exception:
+                self.__mark(replica, False)
+                continue
+            self.__mark(replica, True)
+            with self.__lock:
+                self.__owners[id(conn)] = replica.pool
+            return conn
+        raise NoReplicaAvailableException("No replica is available.")
+
+    def release(self, conn: SimpleConnection) -> None:
+        with self.__lock:
+            pool: ConnectionPool = self.__owners.pop(id(conn))
+        pool.release(conn)
+
+    def check_health(self) -> list[ReplicaStatus]:
+        """
+        Tenta obter e devolver uma conexão de cada réplica, inclusive das que estão fora do ar, e atualiza a situação de cada uma.
+        Pode ser chamado periodicamente para que uma réplica recuperada volte a ser usada antes de recheck_interval.
+        """
+        for replica in self.__replicas:
+            try:
+                replica.pool.release(replica.pool.acquire())
+            except PoolTimeoutException:
+                continue
+            except Exception:
+                self.__mark(replica, False)
+                continue
+            self.__mark(replica, True)
+        return self.status
+
+    def close(self) -> None:
+        for replica in self.__replicas:
+            replica.pool.close()
+
+def _close(conn: SimpleConnection) -> None:
+    conn.close()
+
 class TransactedConnection(SimpleConnection):
 
-    def __init__(self, activate: Callable[[], SimpleConnection]) -> None:
+    def __init__(self, activate: Callable[[], SimpleConnection], deactivate: Callable[[SimpleConnection], None] = _close) -> None:
         self.__activate: Callable[[], SimpleConnection] = activate
+        self.__deactivate: Callable[[SimpleConnection], None] = deactivate
+        self.__pool: ConnectionPool | None = None
+        self.__readers: ConnectionPool | None = None
+        self.__replicas: ReplicaSet | None = None
+        self.__read_your_writes: float = 0.0
+        # É de quem escreveu (thread ou tarefa), e não da conexão toda: a escrita de um cliente não deve mandar a leitura dos outros para o primário.
+        self.__last_write: ContextVar[float | None] = ContextVar("last_write", default = None)
+        self.__observers: tuple[QueryObserver, ...] = ()
+        self.__retry: RetryPolicy | None = None
+        # A conexão e o contador de reentrada são de cada thread.
         self.__local: threading.local = threading.local()
-        self.__count: int = 0
+
+    @staticmethod
+    def create(activate: Callable[[], SimpleConnection], pool: PoolConfig | None = None) -> "TransactedConnection":
+        if pool is None: return TransactedConnection(activate)
+        return TransactedConnection.pooled(ConnectionPool(activate, pool))
+
+    @staticmethod
+    def pooled(pool: ConnectionPool) -> "TransactedConnection":
+        t: TransactedConnection = TransactedConnection(pool.acquire, pool.release)
+        t.__pool = pool
+        return t
+
+    @property
+    def pool(self) -> ConnectionPool | None:
+        return self.__pool
+
+    def with_readers(self, readers: ConnectionPool) -> Self:
+        """
+        Define um conjunto separado de conexões de onde as transações somente leitura obtêm suas conexões.
+        """
+        self.__readers = readers
+        return self
+
+    @property
+    def readers(self) -> ConnectionPool | None:
+        return self.__readers
+
+    def with_replicas(self, replicas: ReplicaSet, read_your_writes: float = 0.0) -> Self:
+        """
+        Faz as transações somente leitura usarem as réplicas ao invés do primário ou do conjunto de leitores.
+        Durante read_your_writes segundos após efetivar uma transação que tenha escrito algo, as transações somente leitura da mesma thread ou tarefa continuam no primário,
+        para que não deixem de enxergar o que acabou de ser escrito enquanto as réplicas ainda estiverem atrasadas.
+        Quando um mesmo cliente é atendido por threads diferentes, quem o atende leva o instante da escrita adiante com last_write e remember_write.
+        """
+        self.__replicas = replicas
+        self.__read_your_writes = read_your_writes
+        return self
+
+    @property
+    def replicas(self) -> ReplicaSet | None:
+        return self.__replicas
+
+    @property
+    def read_your_writes(self) -> float:
+        return self.__read_your_writes
+
+    @property
+    def last_write(self) -> float | None:
+        """
+        Instante (segundo time.monotonic, portanto válido apenas dentro deste processo) da última transação efetivada com escrita pela thread ou tarefa corrente.
+        """
+        return self.__last_write.get()
+
+    def remember_write(self, when: float | None) -> None:
+        """
+        Faz a thread ou tarefa corrente considerar a escrita feita no instante obtido de last_write, possivelmente por outra thread que atendeu o mesmo cliente.
+        """
+        self.__last_write.set(when)
+
+    def add_observer(self, observer: QueryObserver) -> Self:
+        """
+        Passa a avisar o observador a cada instrução executada. Vale para as transações iniciadas a partir de então.
+        Enquanto não houver observadores, as conexões não são instrumentadas e nada é medido.
+        """
+        self.__observers = (*self.__observers, observer)
+        return self
+
+    def remove_observer(self, observer: QueryObserver) -> Self:
+        self.__observers = tuple(o for o in self.__observers if o is not observer)
+        return self
+
+    @property
+    def observers(self) -> tuple[QueryObserver, ...]:
+        return self.__observers
 
     def __enter__(self) -> Self:
+        return self.__enter(False)
+
+    def __enter(self, read_only: bool) -> Self:
         if self.__count == 0:
-            self.__local.con = self.__activate()
-        self.__count += 1
+            observers: tuple[QueryObserver, ...] = self.__observers
+            con, deactivate = self.__open(read_only)
+            self.__local.raw = con
+            self.__local.con = con if len(observers) == 0 else InstrumentedConnection(con, observers)
+            self.__local.deactivate = deactivate
+            self.__local.read_only = read_only
+            self.__local.wrote = False
+        self.__local.count = self.__count + 1
         return self
 
+    def __open(self, read_only: bool) -> tuple[SimpleConnection, Callable[[SimpleConnection], None]]:
+        if read_only and self.__replicas is not None:
+            if not self.__wrote_recently():
+                try:
+                    return self.__replicas.acquire(), self.__replicas.release
+                except NoReplicaAvailableException:
+                    pass
+        elif read_only and self.__readers is not None:
+            return self.__readers.acquire(), self.__readers.release
+        return self.__activate(), self.__deactivate
+
+    def __wrote_recently(self) -> bool:
+        last: float | None = self.__last_write.get()
+        return last is not None and time.monotonic() - last < self.__read_your_writes
+
     def close(self) -> None:
-        self.__count -= 1
+        self.__local.count = self.__count - 1
         if self.__count == 0:
-            self.__wrapped.close()
+            con: SimpleConnection = self.__local.raw
+            deactivate: Callable[[SimpleConnection], None] = self.__local.deactivate
             del self.__local.con
+            del self.__local.raw
+            del self.__local.deactivate
+            del self.__local.read_only
+            try:
+                deactivate(con)
+            finally:
+                self.__finish()
 
     def __exit__( \
             self, \
@@ -35,6 +563,10 @@ class TransactedConnection(SimpleConnection):
         self.close()
         return False
 
+    @property
+    def __count(self) -> int:
+        return cast(int, getattr(self.__local, "count", 0))
+
     @property
     def reenter_count(self) -> int:
         return self.__count
@@ -43,23 +575,91 @@ class TransactedConnection(SimpleConnection):
     def is_active(self) -> bool:
         return self.__count > 0
 
-    def transact(self, operation: _TRANS) -> _TRANS:
+    @property
+    def is_read_only(self) -> bool:
+        return self.is_active and cast(bool, self.__local.read_only)
+
+    def with_retry(self, retry: RetryPolicy | None) -> Self:
+        """
+        Define a política de novas tentativas usada por padrão por transact e transact_readonly.
+        """
+        self.__retry = retry
+        return self
+
+    @property
+    def retry(self) -> RetryPolicy | None:
+        return self.__retry
+
+    def __retrying(self, retry: RetryPolicy | None, attempt: Callable[[], _T]) -> _T:
+        # Apenas a transação mais externa é repetida, pois um deadlock ou bloqueio pode ter derrubado a transação inteira, e não só o ponto de salvamento.
+        policy: RetryPolicy | None = self.__retry if retry is None else retry
+        if policy is None or self.is_active: return attempt()
+        return policy.run(attempt)
+
+    def transact(self, operation: _TRANS, retry: RetryPolicy | None = None) -> _TRANS:
         @wraps(operation)
         def transacted_operation(*args: Any, **kwargs: Any) -> Any:
-            with self as xxx:
-                ok: bool = True
-                try:
-                    return operation(*args, **kwargs)
-                except BaseException as x:
-                    ok = False
-                    raise x
-                finally:
-                    if ok:
-                        self.commit()
-                    else:
-                        self.rollback()
+            return self.__retrying(retry, lambda: self.__transact_once(operation, args, kwargs))
+        return cast(_TRANS, transacted_operation)
+
+    def __transact_once(self, operation: Callable[..., _T], args: tuple[Any, ...], kwargs: dict[str, Any]) -> _T:
+        if self.is_active: return self.__transact_nested(operation, args, kwargs)
+        with self as xxx:
+            ok: bool = True
+            try:
+                return operation(*args, **kwargs)
+            except BaseException as x:
+                ok = False
+                raise x
+            finally:
+                if ok:
+                    self.commit()
+                else:
+                    self.rollback()
+
+    def __transact_nested(self, operation: Callable[..., _T], args: tuple[Any, ...], kwargs: dict[str, Any]) -> _T:
+        # Uma transação aninhada é um ponto de salvamento: se falhar, desfaz apenas o seu próprio trabalho, e se der certo, não efetiva nada até que a mais externa termine.
+        with self as xxx:
+            name: str = f"savepoint_{self.__count}"
+            self.__wrapped.savepoint(name)
+            try:
+                result: _T = operation(*args, **kwargs)
+            except BaseException as x:
+                self.__rollback_nested(name)
+                raise x
+            self.__wrapped.release_savepoint(name)
+            return result
+
+    def __rollback_nested(self, name: str) -> None:
+        try:
+            self.rollback_to_savepoint(name)
+        except BaseException:
+            # Um deadlock no MariaDB ou no MySQL já desfez a transação inteira junto com os pontos de salvamento.
+            # O erro original é o que deve chegar à transação mais externa, para que ela possa ser tentada novamente.
+            pass
+
+    def transact_readonly(self, operation: _TRANS, retry: RetryPolicy | None = None) -> _TRANS:
+        """
+        Executa a operação em uma transação somente leitura, usando uma conexão do conjunto de leitores se houver um.
+        Se já houver uma transação ativa, a operação simplesmente participa dela.
+        """
+        @wraps(operation)
+        def transacted_operation(*args: Any, **kwargs: Any) -> Any:
+            if self.is_active: return operation(*args, **kwargs)
+            return self.__retrying(retry, lambda: self.__read_once(operation, args, kwargs))
         return cast(_TRANS, transacted_operation)
 
+    def __read_once(self, operation: Callable[..., _T], args: tuple[Any, ...], kwargs: dict[str, Any]) -> _T:
+        self.__enter(True)
+        try:
+            self.__wrapped.begin_read_only()
+            try:
+                return operation(*args, **kwargs)
+            finally:
+                self.__wrapped.end_read_only()
+        finally:
+            self.close()
+
     @property
     def __wrapped(self) -> SimpleConnection:
         try:
@@ -67,14 +667,86 @@ class TransactedConnection(SimpleConnection):
         except AttributeError as x:
             raise TransactionNotActiveException()
 
+    def ping(self) -> None:
+        self.__wrapped.ping()
+
+    def in_list(self, values: Sequence[RAW_DATA]) -> InList:
+        return self.__wrapped.in_list(values)
+
+    def begin_read_only(self) -> None:
+        self.__wrapped.begin_read_only()
+
+    def end_read_only(self) -> None:
+        self.__wrapped.end_read_only()
+
+    def savepoint(self, name: str) -> None:
+        self.__wrapped.savepoint(name)
+
+    def release_savepoint(self, name: str) -> None:
+        self.__wrapped.release_savepoint(name)
+
+    def rollback_to_savepoint(self, name: str) -> None:
+        self.__wrapped.rollback_to_savepoint(name)
+        # O que foi guardado depois do ponto de salvamento pode refletir linhas que acabaram de ser desfeitas.
+        self.__discard_locals()
+
     def force_close(self) -> None:
         self.__wrapped.close()
 
+    def after_transaction(self, callback: Callable[[], None]) -> None:
+        """
+        Agenda o callback para quando a transação terminar, seja com commit, com rollback ou com o fechamento da conexão.
+        Callbacks agendados dentro de um ponto de salvamento desfeito continuam agendados.
+        """
+        if not self.is_active: raise TransactionNotActiveException()
+        pending: list[Callable[[], None]] | None = getattr(self.__local, "after", None)
+        if pending is None:
+            pending = []
+            self.__local.after = pending
+        pending.append(callback)
+
+    def transaction_local(self, name: str, factory: Callable[[], _T]) -> _T:
+        """
+        Devolve o valor guardado com o nome na transação corrente, criando-o com a fábrica na primeira vez.
+        Os valores são descartados quando a transação termina ou quando um ponto de salvamento é desfeito.
+        """
+        if not self.is_active: raise TransactionNotActiveException()
+        values: dict[str, Any] | None = getattr(self.__local, "values", None)
+        if values is None:
+            values = {}
+            self.__local.values = values
+        if name not in values: values[name] = factory()
+        return cast(_T, values[name])
+
+    def __discard_locals(self) -> None:
+        if hasattr(self.__local, "values"): del self.__local.values
+
+    def __finish(self) -> None:
+        self.__discard_locals()
+        pending: list[Callable[[], None]] | None = getattr(self.__local, "after", None)
+        if pending is None: return
+        del self.__local.after
+        for callback in pending:
+            callback()
+
     def commit(self) -> None:
         self.__wrapped.commit()
+        if self.__wrote: self.__last_write.set(time.monotonic())
+        self.__local.wrote = False
+        self.__finish()
 
     def rollback(self) -> None:
         self.__wrapped.rollback()
+        self.__local.wrote = False
+        self.__finish()
+
+    @property
+    def __wrote(self) -> bool:
+        return cast(bool, getattr(self.__local, "wrote", False))
+
+    def __writing(self, sql: str) -> None:
+        # Só serve para escolher entre o primário e as réplicas.
+        if self.__replicas is not None and _is_write(sql): self.__local.wrote = True
 
     def fetchone(self) -> tuple[Any, ...] | None:
         return self.__wrapped.fetchone()
@@ -86,18 +758,32 @@ class TransactedConnection(SimpleConnection):
         return self.__wrapped.fetchmany(size)
 
     def callproc(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        # Não há como saber o que o procedimento faz.
+        self.__local.wrote = True
         self.__wrapped.callproc(sql, parameters)
         return self
 
     def execute(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__writing(sql)
         self.__wrapped.execute(sql, parameters)
         return self
 
+    def execute_streaming(self, sql: str, parameters: Sequence[RAW_DATA] = ()) -> Self:
+        self.__writing(sql)
+        self.__wrapped.execute_streaming(sql, parameters)
+        return self
+
     def executemany(self, sql: str, parameters: Sequence[Sequence[RAW_DATA]] = ()) -> Self:
+        self.__writing(sql)
         self.__wrapped.executemany(sql, parameters)
         return self
 
+    def execute_batch(self, statements: Sequence[BATCH_STATEMENT]) -> list[ResultSet]:
+        if self.__replicas is not None and any(_is_write(sql) for sql, parameters in statements): self.__local.wrote = True
+        return self.__wrapped.execute_batch(statements)
+
     def executescript(self, sql: str) -> Self:
+        self.__local.wrote = True
         self.__wrapped.executescript(sql)
         return self
 
@@ -128,6 +814,27 @@ class TransactedConnection(SimpleConnection):
     def fetchmany_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> list[_T]:
         return self.__wrapped.fetchmany_class_lambda(ctor, size)
 
+    def fetchall_columns(self, use_numpy: bool = False) -> dict[str, Any]:
+        return self.__wrapped.fetchall_columns(use_numpy)
+
+    def fetchmany_columns(self, size: int = 0, use_numpy: bool = False) -> dict[str, Any]:
+        return self.__wrapped.fetchmany_columns(size, use_numpy)
+
+    def iter_rows(self, size: int = 0) -> Iterator[tuple[RAW_DATA, ...]]:
+        return self.__wrapped.iter_rows(size)
+
+    def iter_dicts(self, size: int = 0) -> Iterator[dict[str, Any]]:
+        return self.__wrapped.iter_dicts(size)
+
+    def iter_class(self, klass: type[_T], size: int = 0) -> Iterator[_T]:
+        return self.__wrapped.iter_class(klass, size)
+
+    def iter_class_lambda(self, ctor: Callable[[dict[str, RAW_DATA]], _T], size: int = 0) -> Iterator[_T]:
+        return self.__wrapped.iter_class_lambda(ctor, size)
+
+    def __iter__(self) -> Iterator[tuple[RAW_DATA, ...]]:
+        return self.__wrapped.iter_rows()
+
     @property
     def arraysize(self) -> int:
         return self.__wrapped.arraysize
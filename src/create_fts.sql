@@ -0,0 +1,67 @@
+-- Índice de texto completo para a pesquisa de segredos. Cada linha tem o rowid igual ao pk_segredo.
+-- Só os nomes dos campos são indexados, nunca os seus valores.
+CREATE VIEW IF NOT EXISTS segredo_fts_fonte AS
+    SELECT
+        s.pk_segredo,
+        s.nome,
+        s.descricao,
+        COALESCE((SELECT GROUP_CONCAT(c.pk_nome, ' ') FROM campo_segredo c WHERE c.pfk_segredo = s.pk_segredo), '') AS campos,
+        COALESCE((SELECT GROUP_CONCAT(c.nome, ' ') FROM categoria_segredo cs INNER JOIN categoria c ON c.pk_categoria = cs.pfk_categoria WHERE cs.pfk_segredo = s.pk_segredo), '') AS categorias
+    FROM segredo s;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS segredo_fts USING fts5 (
+    nome,
+    descricao,
+    campos,
+    categorias,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix   = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_segredo_ai AFTER INSERT ON segredo BEGIN
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = NEW.pk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_segredo_au AFTER UPDATE ON segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid IN (OLD.pk_segredo, NEW.pk_segredo);
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = NEW.pk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_segredo_ad AFTER DELETE ON segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid = OLD.pk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_campo_ai AFTER INSERT ON campo_segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid = NEW.pfk_segredo;
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = NEW.pfk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_campo_au AFTER UPDATE OF pfk_segredo, pk_nome ON campo_segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid IN (OLD.pfk_segredo, NEW.pfk_segredo);
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo IN (OLD.pfk_segredo, NEW.pfk_segredo);
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_campo_ad AFTER DELETE ON campo_segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid = OLD.pfk_segredo;
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = OLD.pfk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_categoria_segredo_ai AFTER INSERT ON categoria_segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid = NEW.pfk_segredo;
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = NEW.pfk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_categoria_segredo_ad AFTER DELETE ON categoria_segredo BEGIN
+    DELETE FROM segredo_fts WHERE rowid = OLD.pfk_segredo;
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias) SELECT * FROM segredo_fts_fonte WHERE pk_segredo = OLD.pfk_segredo;
+END;
+
+CREATE TRIGGER IF NOT EXISTS segredo_fts_categoria_au AFTER UPDATE OF nome ON categoria BEGIN
+    DELETE FROM segredo_fts WHERE rowid IN (SELECT pfk_segredo FROM categoria_segredo WHERE pfk_categoria = NEW.pk_categoria);
+    INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias)
+        SELECT * FROM segredo_fts_fonte WHERE pk_segredo IN (SELECT pfk_segredo FROM categoria_segredo WHERE pfk_categoria = NEW.pk_categoria);
+END;
+
+-- Indexa os segredos que ainda não estão no índice, como os de um banco de dados criado antes dele. Pode ser executado quantas vezes for preciso.
+INSERT INTO segredo_fts (rowid, nome, descricao, campos, categorias)
+    SELECT * FROM segredo_fts_fonte WHERE pk_segredo NOT IN (SELECT rowid FROM segredo_fts);
\ No newline at end of file
@@ -0,0 +1 @@
+MULTI_STATEMENTS = 65536
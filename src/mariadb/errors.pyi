@@ -1,3 +1,8 @@
 class IntegrityError(Exception):
+    def __init__(self, msg: str) -> None:
+        ...
+
+class DatabaseError(Exception):
+    errno: int
     def __init__(self, msg: str) -> None:
         ...
\ No newline at end of file
@@ -0,0 +1,264 @@
+import asyncio
+import sqlite3
+import time
+from typing import Any, Sequence
+from connection.asyncconn import AsyncTransactedConnection, TransactionOwnedByAnotherTaskException
+from connection.conn import IntegrityViolationException, TransactionNotActiveException
+from connection.trans import ConnectionPool, PoolConfig
+from connection.sqlite3conn import ConnectionData, _Sqlite3ConnectionWrapper
+from pytest import raises
+from dataclasses import dataclass
+from validator import dataclass_validate
+from .db_test_util import DbTestConfig
+
+db: DbTestConfig = DbTestConfig("test/fruits-ok.db", "test/fruits.db")
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Fruit:
+    pk_fruit: int
+    name: str
+
+def new_connection() -> AsyncTransactedConnection:
+    return ConnectionData.create(file_name = "test/fruits.db").connect_async()
+
+@db.decorator
+def test_async_fetch() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    async def run() -> None:
+        async with conn as c:
+            await c.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+            assert await c.fetchone() == (1, "orange")
+            assert await c.fetchall() == [(2, "strawberry"), (3, "lemon")]
+            await c.execute("SELECT pk_fruit, name FROM fruit WHERE pk_fruit = 2")
+            assert await c.fetchone_class(Fruit) == Fruit(2, "strawberry")
+            await c.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+            assert await c.fetchall_dict() == [{"pk_fruit": 1, "name": "orange"}, {"pk_fruit": 2, "name": "strawberry"}, {"pk_fruit": 3, "name": "lemon"}]
+        assert not conn.is_active
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_iter() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    async def run() -> None:
+        async with conn as c:
+            await c.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+            assert [f async for f in c.iter_class(Fruit, 2)] == [Fruit(1, "orange"), Fruit(2, "strawberry"), Fruit(3, "lemon")]
+            await c.execute("SELECT name FROM fruit ORDER BY pk_fruit")
+            assert [r async for r in c] == [("orange", ), ("strawberry", ), ("lemon", )]
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_transact_commit_and_rollback() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    @conn.transact
+    async def inserir(name: str) -> int:
+        await conn.execute("INSERT INTO fruit (name) VALUES (?)", [name])
+        return conn.asserted_lastrowid
+
+    @conn.transact
+    async def listar() -> Sequence[tuple[Any, ...]]:
+        await conn.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+        return await conn.fetchall()
+
+    async def run() -> None:
+        assert await inserir("grape") == 4
+        with raises(IntegrityViolationException):
+            await inserir("grape")
+        assert await listar() == [(1, "orange"), (2, "strawberry"), (3, "lemon"), (4, "grape")]
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_transact_nested() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    @conn.transact
+    async def inner() -> object:
+        assert conn.reenter_count == 2
+        return conn.raw_connection
+
+    @conn.transact
+    async def outer() -> None:
+        assert conn.reenter_count == 1
+        assert await inner() is conn.raw_connection
+        await conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        raise KeyError()
+
+    async def run() -> None:
+        with raises(KeyError):
+            await outer()
+        async with conn as c:
+            await c.execute("SELECT COUNT(*) FROM fruit")
+            assert await c.fetchone() == (3, )
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_transact_nested_rolls_back_alone() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    @conn.transact
+    async def inner() -> None:
+        await conn.execute("INSERT INTO fruit (name) VALUES ('melon')")
+        raise KeyError()
+
+    @conn.transact
+    async def outer() -> None:
+        await conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        with raises(KeyError):
+            await inner()
+
+    @conn.transact
+    async def listar() -> Sequence[tuple[Any, ...]]:
+        await conn.execute("SELECT name FROM fruit WHERE pk_fruit > 3")
+        return await conn.fetchall()
+
+    async def run() -> None:
+        await outer()
+        assert await listar() == [("grape", )]
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_transaction_per_task() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+    seen: list[object] = []
+
+    @conn.transact
+    async def work() -> None:
+        mine: object = conn.raw_connection
+        seen.append(mine)
+        await asyncio.sleep(0.01)
+        assert conn.raw_connection is mine
+        assert conn.reenter_count == 1
+
+    async def run() -> None:
+        await asyncio.gather(work(), work(), work())
+
+    asyncio.run(run())
+    conn.shutdown()
+    assert len(set(seen)) == 3
+
+@db.decorator
+def test_async_concurrent_writers() -> None:
+    conn: AsyncTransactedConnection = ConnectionData.create(file_name = "test/fruits.db", busy_timeout = 2000).connect_async()
+
+    @conn.transact
+    async def inserir(name: str) -> None:
+        await conn.execute("INSERT INTO fruit (name) VALUES (?)", [name])
+        await asyncio.sleep(0.01)
+        await conn.execute("UPDATE fruit SET name = ? WHERE name = ?", [name + "!", name])
+
+    @conn.transact
+    async def listar() -> Sequence[tuple[Any, ...]]:
+        await conn.execute("SELECT name FROM fruit WHERE pk_fruit > 3 ORDER BY name")
+        return await conn.fetchall()
+
+    async def run() -> None:
+        await asyncio.wait_for(asyncio.gather(inserir("grape"), inserir("melon")), 1.0)
+        assert await listar() == [("grape!", ), ("melon!", )]
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_child_task_can_not_use_transaction() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    async def filha() -> None:
+        await conn.execute("INSERT INTO fruit (name) VALUES ('melon')")
+
+    @conn.transact
+    async def inserir() -> None:
+        await conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        with raises(TransactionOwnedByAnotherTaskException):
+            await asyncio.create_task(filha())
+        with raises(TransactionOwnedByAnotherTaskException):
+            await asyncio.create_task(conn.transact(filha)())
+        assert conn.reenter_count == 1
+
+    @conn.transact
+    async def listar() -> Sequence[tuple[Any, ...]]:
+        await conn.execute("SELECT name FROM fruit WHERE pk_fruit > 3")
+        return await conn.fetchall()
+
+    async def run() -> None:
+        await inserir()
+        assert await listar() == [("grape", )]
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_cancel_while_opening_closes_connection() -> None:
+    opened: list[sqlite3.Connection] = []
+
+    def activate() -> _Sqlite3ConnectionWrapper:
+        time.sleep(0.1)
+        raw: sqlite3.Connection = sqlite3.connect("test/fruits.db", check_same_thread = False)
+        opened.append(raw)
+        return _Sqlite3ConnectionWrapper(raw)
+
+    conn: AsyncTransactedConnection = AsyncTransactedConnection.dedicated(activate)
+
+    @conn.transact
+    async def contar() -> Any:
+        await conn.execute("SELECT COUNT(*) FROM fruit")
+        return await conn.fetchone()
+
+    async def run() -> None:
+        task: asyncio.Task[Any] = asyncio.create_task(contar())
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with raises(asyncio.CancelledError):
+            await task
+        assert await contar() == (3, )
+
+    asyncio.run(run())
+    conn.shutdown()
+    assert len(opened) == 2
+    for raw in opened:
+        with raises(sqlite3.ProgrammingError):
+            raw.execute("SELECT 1")
+
+def test_async_no_transaction() -> None:
+    conn: AsyncTransactedConnection = new_connection()
+
+    async def run() -> None:
+        with raises(TransactionNotActiveException):
+            await conn.execute("SELECT 1")
+
+    asyncio.run(run())
+    conn.shutdown()
+
+@db.decorator
+def test_async_pooled() -> None:
+    def make() -> _Sqlite3ConnectionWrapper:
+        return _Sqlite3ConnectionWrapper(sqlite3.connect("test/fruits.db", check_same_thread = False))
+
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(max_size = 2))
+    conn: AsyncTransactedConnection = AsyncTransactedConnection.pooled(pool)
+
+    @conn.transact
+    async def contar() -> Any:
+        await conn.execute("SELECT COUNT(*) FROM fruit")
+        return await conn.fetchone()
+
+    async def run() -> None:
+        assert list(await asyncio.gather(contar(), contar(), contar(), contar())) == [(3, )] * 4
+
+    asyncio.run(run())
+    conn.shutdown()
+    assert pool.stats.checkouts == 4
+    assert pool.stats.created <= 2
\ No newline at end of file
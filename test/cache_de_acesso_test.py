@@ -0,0 +1,134 @@
+from .fixtures import *
+from cofre_de_senhas.bd.raiz import Raiz
+from cofre_de_senhas.erro import PermissaoNegadaException
+from cofre_de_senhas.service import ChaveUsuario, NivelAcesso, TrocaSenha, UsuarioComNivel
+from cofre_de_senhas.usuario.cache_de_acesso import CacheDeAcesso
+from cofre_de_senhas.usuario.usuario import Usuario
+from cofre_de_senhas.usuario.usuario_dao_impl import UsuarioDAOImpl
+from pytest import raises
+from typing import Callable
+import sqlite3
+import threading
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_guardar_e_buscar() -> None:
+    cache: CacheDeAcesso[int, str] = CacheDeAcesso(10.0)
+    assert cache.buscar(1) is None
+    cache.guardar(1, "um", cache.versao)
+    assert cache.buscar(1) == "um"
+
+def test_expirar() -> None:
+    relogio: FakeClock = FakeClock()
+    cache: CacheDeAcesso[int, str] = CacheDeAcesso(10.0, relogio = relogio)
+    cache.guardar(1, "um", cache.versao)
+    relogio.now = 9.9
+    assert cache.buscar(1) == "um"
+    relogio.now = 10.0
+    assert cache.buscar(1) is None
+
+def test_versao_antiga_nao_e_guardada() -> None:
+    cache: CacheDeAcesso[int, str] = CacheDeAcesso(10.0)
+    versao: int = cache.versao
+    cache.invalidar(2)
+    cache.liberar(2)
+    cache.guardar(1, "um", versao)
+    assert cache.buscar(1) is None
+
+def test_nao_guarda_enquanto_em_alteracao() -> None:
+    cache: CacheDeAcesso[int, str] = CacheDeAcesso(10.0)
+    cache.guardar(1, "um", cache.versao)
+    cache.invalidar(1)
+    assert cache.buscar(1) is None
+    cache.guardar(1, "um", cache.versao)
+    assert cache.buscar(1) is None
+    cache.liberar(1)
+    cache.guardar(1, "um", cache.versao)
+    assert cache.buscar(1) == "um"
+
+def test_tamanho_maximo() -> None:
+    cache: CacheDeAcesso[int, str] = CacheDeAcesso(10.0, tamanho_maximo = 2)
+    cache.guardar(1, "um", cache.versao)
+    cache.guardar(2, "dois", cache.versao)
+    cache.guardar(3, "três", cache.versao)
+    assert [cache.buscar(1), cache.buscar(2), cache.buscar(3)] == [None, "dois", "três"]
+
+def em_outra_thread(teste: Callable[[], None]) -> None:
+    # As instâncias do Single são fixadas por thread na primeira vez em que são pedidas. Com uma thread só para o teste, os demais testes não são afetados.
+    erros: list[BaseException] = []
+    def rodar() -> None:
+        try:
+            Raiz.register_sqlite("test/cofre-teste-run.db")
+            UsuarioDAOImpl()
+            Usuario.cache_de_acesso().limpar()
+            teste()
+        except BaseException as x:
+            erros.append(x)
+    t: threading.Thread = threading.Thread(target = rodar)
+    t.start()
+    t.join()
+    if len(erros) > 0: raise erros[0]
+
+def verificar_hermione() -> Usuario:
+    return Raiz.transact(lambda: Usuario.verificar_acesso(ChaveUsuario(hermione.pk_usuario)))()
+
+@db.decorator
+def test_verificar_acesso_usa_cache() -> None:
+    def teste() -> None:
+        assert verificar_hermione().login == hermione.login
+        assert Usuario.cache_de_acesso().buscar(ChaveUsuario(hermione.pk_usuario)) is not None
+    em_outra_thread(teste)
+
+@db.decorator
+def test_banimento_vale_imediatamente() -> None:
+    @Raiz.transact
+    def banir() -> None:
+        Usuario.servicos().alterar_nivel_por_login(ChaveUsuario(dumbledore.pk_usuario), UsuarioComNivel(hermione.login, NivelAcesso.DESATIVADO))
+
+    def teste() -> None:
+        verificar_hermione()
+        banir()
+        with raises(PermissaoNegadaException):
+            verificar_hermione()
+    em_outra_thread(teste)
+
+@db.decorator
+def test_troca_de_senha_nao_desfaz_banimento() -> None:
+    @Raiz.transact
+    def trocar_senha() -> None:
+        Usuario.servicos().trocar_senha_por_chave(ChaveUsuario(hermione.pk_usuario), TrocaSenha("expelliarmus", "wingardium leviosa"))
+
+    def teste() -> None:
+        verificar_hermione()
+        # O banimento vem de outro processo, que não tem como invalidar este cache.
+        outro: sqlite3.Connection = sqlite3.connect("test/cofre-teste-run.db")
+        outro.execute("UPDATE usuario SET fk_nivel_acesso = 0 WHERE pk_usuario = ?", [hermione.pk_usuario])
+        outro.commit()
+        outro.close()
+        assert verificar_hermione().nivel_acesso != NivelAcesso.DESATIVADO
+        with raises(PermissaoNegadaException):
+            trocar_senha()
+        banida: Usuario = Raiz.transact(lambda: Usuario._encontrar_existente_por_chave(ChaveUsuario(hermione.pk_usuario)))()
+        assert banida.nivel_acesso == NivelAcesso.DESATIVADO
+        assert banida.hash_com_sal == hermione.hash_com_sal
+    em_outra_thread(teste)
+
+@db.decorator
+def test_alteracao_desfeita_nao_fica_no_cache() -> None:
+    @Raiz.transact
+    def promover_e_desistir() -> None:
+        Usuario.servicos().alterar_nivel_por_login(ChaveUsuario(dumbledore.pk_usuario), UsuarioComNivel(hermione.login, NivelAcesso.CHAVEIRO_DEUS_SUPREMO))
+        assert verificar_hermione().is_admin
+        raise KeyError()
+
+    def teste() -> None:
+        with raises(KeyError):
+            promover_e_desistir()
+        assert not verificar_hermione().is_admin
+    em_outra_thread(teste)
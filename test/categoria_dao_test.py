@@ -1,6 +1,6 @@
 from .fixtures import *
 from connection.conn import IntegrityViolationException
-from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria
+from cofre_de_senhas.dao import CategoriaDAO, CategoriaPK, DadosCategoria, DadosCategoriaSemPK, SegredoPK, NomeCategoria, Pagina
 from cofre_de_senhas.bd.raiz import Raiz
 from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
 from pytest import raises
@@ -135,6 +135,13 @@ def test_listar_tudo_apos_insercao() -> None:
     esperado.append(millenium_falcon)
     assert lido == esperado
 
+@db.transacted
+def test_listar_paginado() -> None:
+    dao: CategoriaDAOImpl = CategoriaDAOImpl()
+    assert dao.listar(Pagina.primeira(4)) == todas_categorias[0:4]
+    assert dao.listar(Pagina(api.pk_categoria, 4)) == todas_categorias[4:8]
+    assert dao.listar(Pagina(qa.pk_categoria, 4)) == [integracao]
+
 @db.transacted
 def test_excluir_categoria_por_pk() -> None:
     dao: CategoriaDAOImpl = CategoriaDAOImpl()
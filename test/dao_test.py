@@ -7,4 +7,29 @@ def test_instanciar() -> None:
     from cofre_de_senhas.dao import CofreDeSenhasDAO
     from cofre_de_senhas.bd.bd_dao_impl import CofreDeSenhasDAOImpl
     f: CofreDeSenhasDAO = CofreDeSenhasDAOImpl()
-    assert f == CofreDeSenhasDAO.instance()
\ No newline at end of file
+    assert f == CofreDeSenhasDAO.instance()
+
+@db.decorator
+def test_atualizar_bd_indexa_segredos() -> None:
+    from cofre_de_senhas.bd.bd_dao_impl import CofreDeSenhasDAOImpl
+    from cofre_de_senhas.bd.raiz import Raiz
+    from typing import Any
+    Raiz.register_sqlite("test/cofre-teste-run.db")
+    f: CofreDeSenhasDAOImpl = CofreDeSenhasDAOImpl()
+
+    # Simula um banco de dados criado antes do índice de texto completo.
+    @Raiz.transact
+    def remover_indice() -> None:
+        Raiz.instance().executescript("DROP TABLE segredo_fts;")
+
+    @Raiz.transact
+    def contar() -> Any:
+        Raiz.instance().execute("SELECT (SELECT COUNT(*) FROM segredo_fts), (SELECT COUNT(*) FROM segredo)")
+        return Raiz.instance().fetchone()
+
+    remover_indice()
+    Raiz.transact(f.atualizar_bd)()
+    indexados, segredos = contar()
+    assert indexados == segredos
+    Raiz.transact(f.atualizar_bd)()
+    assert contar() == (segredos, segredos)
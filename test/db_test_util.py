@@ -19,11 +19,13 @@ class DbTestConfig:
                 import os
                 import shutil
 
+                # Bancos de dados em modo WAL deixam os arquivos -wal e -shm para trás.
                 def clear() -> None:
-                    try:
-                        os.remove(self.__sandbox)
-                    except FileNotFoundError as x:
-                        pass
+                    for f in [self.__sandbox, self.__sandbox + "-wal", self.__sandbox + "-shm"]:
+                        try:
+                            os.remove(f)
+                        except FileNotFoundError as x:
+                            pass
 
                 clear()
                 shutil.copy2(self.__pristine, self.__sandbox)
@@ -31,7 +33,7 @@ class DbTestConfig:
                 try:
                     call_this()
                 finally:
-                    os.remove(self.__sandbox)
+                    clear()
 
             return inner
         return middle
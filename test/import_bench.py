@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from statistics import median
+from timeit import default_timer
+
+# Uso: python -m test.import_bench
+
+_SRC: str = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+# O que era importado antes do registro (todos os drivers, cada um trazendo o asyncio junto), e o que um processo que usa apenas o SQLite importa agora.
+_CASES: list[tuple[str, str]] = [
+    ("Nada (só o interpretador)", "pass"),
+    ("Todos os drivers e o asyncio", "import connection.sqlite3conn, connection.mysqlconn, connection.asyncconn"),
+    ("Apenas o registro", "import connection.registry"),
+    ("Registro e SQLite em uso", "import connection.registry\nconnection.registry.connect('sqlite:///cofre.db')"),
+]
+
+def _run(code: str) -> float:
+    start: float = default_timer()
+    subprocess.run([sys.executable, "-c", code], check = True, cwd = os.path.dirname(_SRC), env = {**os.environ, "PYTHONPATH": _SRC})
+    return default_timer() - start
+
+def main() -> None:
+    repeat: int = 15
+    base: float = 0.0
+    for name, code in _CASES:
+        elapsed: float = median(_run(code) for i in range(repeat))
+        if code == "pass": base = elapsed
+        print(f"{name:<30}: {elapsed * 1000:8.1f} ms - {(elapsed - base) * 1000:8.1f} ms além do interpretador")
+
+if __name__ == "__main__":
+    main()
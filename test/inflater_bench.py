@@ -0,0 +1,33 @@
+from typing import Any, Callable
+from timeit import timeit
+from connection.conn import ColumnDescriptor, Descriptor
+from connection.inflater import ColumnNames, row_to_class_dacite, rows_to_classes
+from cofre_de_senhas.dao import DadosSegredo
+
+# Uso: python -m test.inflater_bench
+
+def _columns() -> ColumnNames:
+    names: list[str] = ["pk_segredo", "nome", "descricao", "fk_tipo_segredo"]
+    return Descriptor([ColumnDescriptor.create(name = n) for n in names]).column_names
+
+def _rows(quantity: int) -> list[tuple[Any, ...]]:
+    return [(i, f"Segredo {i}", f"Descrição do segredo {i}.", 1 + i % 3) for i in range(0, quantity)]
+
+def _dacite(columns: ColumnNames, rows: list[tuple[Any, ...]]) -> Callable[[], list[DadosSegredo]]:
+    return lambda: [row_to_class_dacite(DadosSegredo, columns, row) for row in rows]
+
+def _mapper(columns: ColumnNames, rows: list[tuple[Any, ...]]) -> Callable[[], list[DadosSegredo]]:
+    return lambda: rows_to_classes(DadosSegredo, columns, rows)
+
+def main() -> None:
+    columns: ColumnNames = _columns()
+    for quantity in [10, 1000, 5000]:
+        rows: list[tuple[Any, ...]] = _rows(quantity)
+        assert _dacite(columns, rows)() == _mapper(columns, rows)()
+        repeat: int = max(1, 20000 // quantity)
+        old: float = timeit(_dacite(columns, rows), number = repeat) / repeat
+        new: float = timeit(_mapper(columns, rows), number = repeat) / repeat
+        print(f"{quantity:>5} linhas: dacite {old * 1000:9.3f} ms - mapeador {new * 1000:9.3f} ms - {old / new:6.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,4 +1,5 @@
 from typing import Any
+from enum import Enum
 from pytest import raises
 from connection.conn import ColumnDescriptor, Descriptor, NullStatus, TypeCode
 from dataclasses import dataclass
@@ -261,4 +262,64 @@ def test_row_to_class_lambda_opt_none() -> None:
     columns: ColumnNames = make_columns(["lemon", "strawberry", "grape"])
     def make(t: dict[str, Any]) -> FruitSalad:
         assert False
-    assert None == row_to_class_lambda_opt(make, columns, None)
\ No newline at end of file
+    assert None == row_to_class_lambda_opt(make, columns, None)
+
+# ---------------
+
+class Flavor(Enum):
+    SWEET = 1
+    SOUR = 2
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Juice:
+    name: str
+    flavor: Flavor
+    sugar: float | None
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Basket:
+    name: str
+    fruits: list[str]
+
+def test_row_mapper_is_cached() -> None:
+    m1: RowMapper[FruitSalad] = row_mapper(FruitSalad, make_columns(["lemon", "strawberry", "grape"]))
+    m2: RowMapper[FruitSalad] = row_mapper(FruitSalad, make_columns(["lemon", "strawberry", "grape"]))
+    m3: RowMapper[FruitSalad] = row_mapper(FruitSalad, make_columns(["grape", "strawberry", "lemon"]))
+    assert m1 is m2
+    assert m1 is not m3
+
+def test_row_mapper_column_order() -> None:
+    columns: ColumnNames = make_columns(["grape", "lemon", "strawberry"])
+    assert row_to_class(FruitSalad, columns, (27, 1, "xyz")) == FruitSalad(1, "xyz", 27)
+
+def test_row_mapper_enum_and_optional() -> None:
+    columns: ColumnNames = make_columns(["name", "flavor", "sugar"])
+    assert row_to_class(Juice, columns, ("lemonade", 2, None)) == Juice("lemonade", Flavor.SOUR, None)
+    assert row_to_class(Juice, columns, ("grape juice", 1, 3.5)) == Juice("grape juice", Flavor.SWEET, 3.5)
+
+def test_row_mapper_bad_enum() -> None:
+    columns: ColumnNames = make_columns(["name", "flavor", "sugar"])
+    with raises(WrongTypeError):
+        row_to_class(Juice, columns, ("lemonade", 3, None))
+
+def test_row_mapper_bad_optional() -> None:
+    columns: ColumnNames = make_columns(["name", "flavor", "sugar"])
+    with raises(WrongTypeError):
+        row_to_class(Juice, columns, ("lemonade", 1, "a lot"))
+
+def test_row_mapper_complex_types_fall_back_to_dacite() -> None:
+    columns: ColumnNames = make_columns(["name", "fruits"])
+    assert row_to_class(Basket, columns, ("mixed", ["lemon", "grape"])) == Basket("mixed", ["lemon", "grape"])
+    with raises(WrongTypeError):
+        row_to_class(Basket, columns, ("mixed", "lemon"))
+
+def test_row_mapper_agrees_with_dacite() -> None:
+    columns: ColumnNames = make_columns(["lemon", "strawberry", "grape"])
+    rows: list[tuple[Any, ...]] = [(i, f"s{i}", i * 2) for i in range(0, 50)]
+    assert rows_to_classes(FruitSalad, columns, rows) == [row_to_class_dacite(FruitSalad, columns, row) for row in rows]
+
+def test_rows_to_classes_empty_does_not_check_columns() -> None:
+    columns: ColumnNames = make_columns(["orange"])
+    assert rows_to_classes(FruitSalad, columns, []) == []
@@ -0,0 +1,120 @@
+from connection.conn import IntegrityViolationException
+from connection.instrument import LATENCY_BUCKETS_MS, LatencyHistogram, QueryEvent, QueryObserver, QueryStats, SlowQueryLog, TopQueries
+from connection.trans import TransactedConnection
+from dataclasses import dataclass
+from validator import dataclass_validate
+from pytest import raises
+from .db_test_util import DbTestConfig
+
+db: DbTestConfig = DbTestConfig("test/fruits-ok.db", "test/fruits.db")
+
+@dataclass_validate
+@dataclass(frozen = True)
+class Fruit:
+    pk_fruit: int
+    name: str
+
+class Recorder(QueryObserver):
+
+    def __init__(self) -> None:
+        self.events: list[QueryEvent] = []
+
+    def observe(self, event: QueryEvent) -> None:
+        self.events.append(event)
+
+def event(operation: str, sql: str, elapsed_ms: float, rows: int = 0) -> QueryEvent:
+    return QueryEvent(operation, sql, 0, int(elapsed_ms * 1_000_000), rows, None)
+
+@db.decorator
+def test_observer_sees_statements() -> None:
+    conn: TransactedConnection = db.new_connection()
+    r: Recorder = Recorder()
+    conn.add_observer(r)
+    sql: str = "SELECT pk_fruit, name FROM fruit WHERE pk_fruit >= ?"
+
+    with conn as c:
+        c.execute(sql, [2])
+        assert c.fetchall_class(Fruit) == [Fruit(2, "strawberry"), Fruit(3, "lemon")]
+        c.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    assert [(e.operation, e.sql, e.parameter_count, e.rows) for e in r.events] == [
+        ("execute", sql, 1, -1),
+        ("fetchall", sql, 0, 2),
+        ("execute", "INSERT INTO fruit (name) VALUES ('grape')", 0, 1)
+    ]
+    assert all(e.elapsed_ns > 0 and e.error is None for e in r.events)
+
+@db.decorator
+def test_observer_sees_errors() -> None:
+    conn: TransactedConnection = db.new_connection()
+    r: Recorder = Recorder()
+    conn.add_observer(r)
+
+    with conn as c:
+        with raises(IntegrityViolationException):
+            c.execute("INSERT INTO fruit (name) VALUES ('lemon')")
+
+    assert len(r.events) == 1
+    assert isinstance(r.events[0].error, IntegrityViolationException)
+
+@db.decorator
+def test_observer_removed() -> None:
+    conn: TransactedConnection = db.new_connection()
+    r: Recorder = Recorder()
+    conn.add_observer(r).remove_observer(r)
+    assert conn.observers == ()
+
+    with conn as c:
+        c.execute("SELECT COUNT(*) FROM fruit")
+        assert c.fetchone() == (3, )
+
+    assert r.events == []
+
+@db.decorator
+def test_slow_query_log() -> None:
+    conn: TransactedConnection = db.new_connection()
+    slow: list[str] = []
+    conn.add_observer(SlowQueryLog(0, slow.append))
+    conn.add_observer(SlowQueryLog(60000, slow.append))
+
+    with conn as c:
+        c.execute("SELECT COUNT(*) FROM fruit")
+
+    assert len(slow) == 1
+    assert slow[0].startswith("Slow execute (")
+    assert slow[0].endswith(" ms, 0 parameters, -1 rows, ok): SELECT COUNT(*) FROM fruit")
+
+def test_latency_histogram() -> None:
+    h: LatencyHistogram = LatencyHistogram()
+    h.observe(event("execute", "A", 0.05))
+    h.observe(event("execute", "A", 0.7))
+    h.observe(event("execute", "A", 0.9))
+    h.observe(event("fetchall", "A", 30))
+    h.observe(event("execute", "B", 5000))
+
+    assert h.statements == ["A", "B"]
+    a: list[tuple[float | None, int]] = h.histogram("A")
+    assert len(a) == len(LATENCY_BUCKETS_MS) + 1
+    assert a[0] == (0.1, 1)
+    assert a[3] == (1.0, 2)
+    assert sum(n for b, n in a) == 3
+    assert h.histogram("B")[-1] == (None, 1)
+    assert sum(n for b, n in h.histogram("C")) == 0
+
+def test_top_queries() -> None:
+    t: TopQueries = TopQueries(2)
+    t.observe(event("execute", "A", 1))
+    t.observe(event("fetchall", "A", 2, 10))
+    t.observe(event("execute", "B", 10))
+    t.observe(event("execute", "C", 0.5))
+    t.observe(event("execute", "A", 1))
+
+    assert t.report() == [
+        QueryStats("B", 1, 10_000_000, 10_000_000, 0, 0),
+        QueryStats("A", 2, 4_000_000, 2_000_000, 10, 0)
+    ]
+
+    lines: list[str] = []
+    t.print_report(lines.append)
+    assert len(lines) == 2
+    assert lines[0].endswith(": B")
\ No newline at end of file
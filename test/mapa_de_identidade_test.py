@@ -0,0 +1,99 @@
+from .fixtures import *
+from .cache_de_acesso_test import em_outra_thread
+from cofre_de_senhas.bd.raiz import Raiz
+from cofre_de_senhas.erro import CategoriaNaoExisteException
+from cofre_de_senhas.service import ChaveUsuario, NivelAcesso, RenomeCategoria, UsuarioComNivel
+from cofre_de_senhas.mapa_de_identidade import MapaDeIdentidade
+from cofre_de_senhas.categoria.categoria import Categoria
+from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
+from cofre_de_senhas.usuario.usuario import Usuario
+from pytest import raises
+
+def test_guardar_buscar_e_remover() -> None:
+    mapa: MapaDeIdentidade = MapaDeIdentidade()
+    assert mapa.buscar(str, ("pk", 1)) is None
+    assert mapa.guardar("um", ("pk", 1), ("nome", "um")) == "um"
+    assert mapa.buscar(str, ("pk", 1)) == "um"
+    assert mapa.buscar(str, ("nome", "um")) == "um"
+    assert mapa.buscar(int, ("pk", 1)) is None
+    mapa.remover(str, ("pk", 1))
+    assert mapa.buscar(str, ("pk", 1)) is None
+    assert len(mapa) == 1
+    mapa.limpar()
+    assert len(mapa) == 0
+
+@db.decorator
+def test_mesma_instancia_na_transacao() -> None:
+    @Raiz.transact
+    def carregar() -> tuple[Usuario, dict[str, Usuario]]:
+        quem_eh: Usuario = Usuario.verificar_acesso(ChaveUsuario(hermione.pk_usuario))
+        return quem_eh, Usuario.listar_por_logins({hermione.login, harry_potter.login})
+
+    def teste() -> None:
+        quem_eh, todos = carregar()
+        assert todos[hermione.login] is quem_eh
+        assert todos[harry_potter.login].pk_usuario == harry_potter.pk_usuario
+        # Quem faz a requisição pode vir do cache de acesso, mas os demais são lidos de novo em outra transação.
+        _, outros = carregar()
+        assert outros[harry_potter.login] is not todos[harry_potter.login]
+    em_outra_thread(teste)
+
+@db.decorator
+def test_cache_de_acesso_fica_fora_do_mapa() -> None:
+    @Raiz.transact
+    def verificar() -> Usuario:
+        return Usuario.verificar_acesso(ChaveUsuario(hermione.pk_usuario))
+
+    @Raiz.transact
+    def verificar_e_listar() -> tuple[Usuario, Usuario, Usuario | None]:
+        quem_eh: Usuario = Usuario.verificar_acesso(ChaveUsuario(hermione.pk_usuario))
+        no_mapa: Usuario | None = MapaDeIdentidade.atual().buscar(Usuario, ("pk", hermione.pk_usuario))
+        return quem_eh, Usuario.listar_por_logins({hermione.login})[hermione.login], no_mapa
+
+    def teste() -> None:
+        guardado: Usuario = verificar()
+        quem_eh, lido, no_mapa = verificar_e_listar()
+        assert quem_eh is guardado
+        assert no_mapa is None
+        assert lido is not guardado
+        assert lido == guardado
+    em_outra_thread(teste)
+
+@db.decorator
+def test_alteracao_vale_na_mesma_transacao() -> None:
+    @Raiz.transact
+    def promover() -> None:
+        Usuario.servicos().alterar_nivel_por_login(ChaveUsuario(dumbledore.pk_usuario), UsuarioComNivel(hermione.login, NivelAcesso.CHAVEIRO_DEUS_SUPREMO))
+        assert Usuario.verificar_acesso_admin(ChaveUsuario(hermione.pk_usuario)).is_admin
+        assert Usuario.listar_por_logins({hermione.login})[hermione.login].is_admin
+        raise KeyError()
+
+    @Raiz.transact
+    def verificar() -> Usuario:
+        return Usuario.verificar_acesso(ChaveUsuario(hermione.pk_usuario))
+
+    def teste() -> None:
+        with raises(KeyError):
+            promover()
+        assert not verificar().is_admin
+    em_outra_thread(teste)
+
+@db.decorator
+def test_categoria_renomeada_na_mesma_transacao() -> None:
+    @Raiz.transact
+    def renomear() -> None:
+        Categoria.servicos().renomear_por_nome(ChaveUsuario(dumbledore.pk_usuario), RenomeCategoria(qa.nome, "Testes"))
+        assert Categoria.listar_por_nomes({"Testes"})["Testes"].pk_categoria == qa.pk_categoria
+        with raises(CategoriaNaoExisteException):
+            Categoria.listar_por_nomes({qa.nome})
+
+    def teste() -> None:
+        CategoriaDAOImpl()
+        renomear()
+    em_outra_thread(teste)
+
+def test_fora_de_transacao_nao_guarda() -> None:
+    def teste() -> None:
+        MapaDeIdentidade.atual().guardar("um", ("pk", 1))
+        assert MapaDeIdentidade.atual().buscar(str, ("pk", 1)) is None
+    em_outra_thread(teste)
@@ -0,0 +1,94 @@
+from typing import Any, Sequence
+from connection.conn import ResultSet
+from connection.inflater import ColumnNames
+from pytest import importorskip
+
+# O diretório src/mariadb só tem os stubs de tipos; o conector de verdade pode não estar instalado.
+importorskip("mariadb.cursors")
+
+from connection.mariadbconn import _MariaDBConnectionWrapper
+
+class FakeCursor:
+
+    def __init__(self, buffered: bool) -> None:
+        self.buffered: bool = buffered
+        self.executed: list[str] = []
+        self.closed: bool = False
+        self.rows: list[tuple[Any, ...]] = []
+        self.description: list[tuple[Any, ...]] | None = None
+        self.parameters: list[Any] = []
+        self.pending_sets: int = 0
+        self.rowcount: int = -1
+        self.lastrowid: int | None = None
+
+    def execute(self, sql: str, parameters: Sequence[Any] = ()) -> None:
+        self.executed.append(sql)
+        self.parameters = list(parameters)
+        self.pending_sets = sql.count(";")
+        # Apenas as consultas produzem linhas e descrição.
+        if sql.startswith("SELECT"):
+            self.rows = [(1, ), (2, ), (3, )]
+            self.description = [("n", 3, 11, 11, 0, 0, 1, 0, "a", "n", "a")]
+            self.rowcount = 3
+        else:
+            self.rows = []
+            self.description = None
+            self.rowcount = 1
+            self.lastrowid = 7
+
+    def nextset(self) -> bool | None:
+        # Cada comando adicional produz mais um resultado.
+        if self.pending_sets == 0: return None
+        self.pending_sets -= 1
+        self.rows = [(10 + self.pending_sets, )]
+        return True
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        r: list[tuple[Any, ...]] = self.rows
+        self.rows = []
+        return r
+
+    def close(self) -> None:
+        self.closed = True
+
+class FakeConnection:
+
+    def __init__(self) -> None:
+        self.cursors: list[FakeCursor] = []
+
+    def cursor(self, buffered: bool) -> FakeCursor:
+        c: FakeCursor = FakeCursor(buffered)
+        self.cursors.append(c)
+        return c
+
+def test_statement_without_result_has_empty_description() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MariaDBConnectionWrapper = _MariaDBConnectionWrapper(fake) # type: ignore
+    w.execute("INSERT INTO a (n) VALUES (?)", [5])
+    assert len(w.description.columns) == 0
+    result: ResultSet = w.fetch_result_set()
+    assert result.rows == []
+    assert result.rowcount == 1
+    assert result.lastrowid == 7
+
+def test_execute_batch_without_multi_statements_runs_one_by_one() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MariaDBConnectionWrapper = _MariaDBConnectionWrapper(fake) # type: ignore
+    main: FakeCursor = fake.cursors[0]
+
+    results: list[ResultSet] = w.execute_batch([("INSERT INTO a (n) VALUES (?)", [5]), ("SELECT n FROM a WHERE n > ?", [1])])
+    assert main.executed == ["INSERT INTO a (n) VALUES (?)", "SELECT n FROM a WHERE n > ?"]
+    assert [r.rows for r in results] == [[], [(1, ), (2, ), (3, )]]
+    assert results[0].lastrowid == 7
+    assert results[1].column_names == ColumnNames(["n"])
+
+def test_execute_batch_with_multi_statements_sends_one_request() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MariaDBConnectionWrapper = _MariaDBConnectionWrapper(fake, multi_statements = True) # type: ignore
+    main: FakeCursor = fake.cursors[0]
+
+    results: list[ResultSet] = w.execute_batch([("SELECT n FROM a WHERE x = ?", [1]), ("SELECT n FROM b", [])])
+    assert main.executed == ["SELECT n FROM a WHERE x = ?;\nSELECT n FROM b"]
+    assert main.parameters == [1]
+    assert [r.rows for r in results] == [[(1, ), (2, ), (3, )], [(10, )]]
+    assert w.execute_batch([]) == []
@@ -0,0 +1,105 @@
+from typing import Any, Sequence
+from connection.conn import ResultSet
+from connection.inflater import ColumnNames
+from connection.mysqlconn import ConnectionData, _MySQLConnectionWrapper
+
+class FakeCursor:
+
+    def __init__(self, buffered: bool) -> None:
+        self.buffered: bool = buffered
+        self.executed: list[str] = []
+        self.closed: bool = False
+        self.rows: list[tuple[Any, ...]] = []
+        self.description: list[tuple[Any, ...]] | None = None
+        self.parameters: list[Any] = []
+        self.pending_sets: int = 0
+        self.rowcount: int = -1
+        self.lastrowid: int | None = None
+
+    def execute(self, sql: str, parameters: Sequence[Any] = ()) -> None:
+        self.executed.append(sql)
+        self.parameters = list(parameters)
+        self.rows = [(1, ), (2, ), (3, )]
+        # Cada comando adicional produz mais um resultado.
+        self.pending_sets = sql.count(";")
+
+    def nextset(self) -> bool | None:
+        if self.pending_sets == 0: return None
+        self.pending_sets -= 1
+        self.rows = [(10 + self.pending_sets, )]
+        return True
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        r: list[tuple[Any, ...]] = self.rows
+        self.rows = []
+        self.rowcount = len(r)
+        return r
+
+    def fetchmany(self, size: int = 0) -> list[tuple[Any, ...]]:
+        r: list[tuple[Any, ...]] = self.rows[:size]
+        self.rows = self.rows[size:]
+        return r
+
+    def close(self) -> None:
+        self.closed = True
+
+class FakeConnection:
+
+    def __init__(self) -> None:
+        self.cursors: list[FakeCursor] = []
+        self.unread_result: bool = False
+        self.consumed: int = 0
+
+    def cursor(self, buffered: bool) -> FakeCursor:
+        c: FakeCursor = FakeCursor(buffered)
+        self.cursors.append(c)
+        return c
+
+    def consume_results(self) -> None:
+        self.consumed += 1
+        self.unread_result = False
+
+def test_buffered_by_default() -> None:
+    data: ConnectionData = ConnectionData.create(user = "x", password = "y", host = "z", database = "w")
+    assert data.buffered
+
+def test_streaming_uses_unbuffered_cursor() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MySQLConnectionWrapper = _MySQLConnectionWrapper(fake) # type: ignore
+    main: FakeCursor = fake.cursors[0]
+    assert main.buffered
+
+    w.execute_streaming("SELECT a FROM b")
+    assert len(fake.cursors) == 2
+    streaming: FakeCursor = fake.cursors[1]
+    assert not streaming.buffered
+    assert w.fetchmany(2) == [(1, ), (2, )]
+
+    # A próxima instrução descarta o que não foi lido e volta ao cursor principal.
+    fake.unread_result = True
+    w.execute("SELECT c FROM d")
+    assert fake.consumed == 1
+    assert streaming.closed
+    assert main.executed == ["SELECT c FROM d"]
+    assert w.fetchmany(5) == [(1, ), (2, ), (3, )]
+
+def test_unbuffered_connection_data() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MySQLConnectionWrapper = _MySQLConnectionWrapper(fake, False) # type: ignore
+    w.execute_streaming("SELECT a FROM b")
+    assert len(fake.cursors) == 1
+    assert not fake.cursors[0].buffered
+
+def test_execute_batch_sends_one_request() -> None:
+    fake: FakeConnection = FakeConnection()
+    w: _MySQLConnectionWrapper = _MySQLConnectionWrapper(fake) # type: ignore
+    main: FakeCursor = fake.cursors[0]
+    main.description = [("n", 3, None, None, None, None, 1, 0, 0)]
+
+    results: list[ResultSet] = w.execute_batch([("SELECT n FROM a WHERE x = %s", [1]), ("SELECT n FROM b WHERE y = %s;", ["z"]), ("SELECT n FROM c", [])])
+    assert main.executed == ["SELECT n FROM a WHERE x = %s;\nSELECT n FROM b WHERE y = %s;\nSELECT n FROM c"]
+    assert main.parameters == [1, "z"]
+    assert [r.rows for r in results] == [[(1, ), (2, ), (3, )], [(11, )], [(10, )]]
+    assert results[0].column_names == ColumnNames(["n"])
+    assert w.execute_batch([]) == []
+
@@ -0,0 +1,42 @@
+from cofre_de_senhas.dao import Pagina
+from cofre_de_senhas.erro import ValorIncorretoException
+from cofre_de_senhas.paginacao import _codificar, pagina_dao, paginar, TAMANHO_MAXIMO_PAGINA
+from cofre_de_senhas.service import Paginacao
+from pytest import raises
+
+def test_primeira_pagina() -> None:
+    assert pagina_dao(Paginacao(None, 10)) == Pagina.primeira(11)
+
+def test_tamanho_fora_dos_limites() -> None:
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao(None, 0))
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao(None, TAMANHO_MAXIMO_PAGINA + 1))
+
+def test_continuacao_invalida() -> None:
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao("não é base64", 10))
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao("YWJj", 10)) # "abc" em base64.
+
+def test_continuacao_fora_dos_64_bits() -> None:
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao(_codificar(2 ** 63), 10))
+    with raises(ValorIncorretoException):
+        pagina_dao(Paginacao(_codificar(-2 ** 63 - 1), 10))
+    assert pagina_dao(Paginacao(_codificar(2 ** 63 - 1), 10)) == Pagina(2 ** 63 - 1, 11)
+
+def test_ultima_pagina_sem_continuacao() -> None:
+    assert paginar([1, 2, 3], Paginacao(None, 3), lambda x: x) == ([1, 2, 3], None)
+
+def test_percorrer_todas_as_paginas() -> None:
+    itens: list[int] = [-1, 1, 2, 5, 8, 13, 21]
+    lidos: list[int] = []
+    paginacao: Paginacao = Paginacao(None, 3)
+    while True:
+        p: Pagina = pagina_dao(paginacao)
+        pagina, continuacao = paginar([i for i in itens if i > p.apos][:p.limite], paginacao, lambda x: x)
+        lidos.extend(pagina)
+        if continuacao is None: break
+        paginacao = Paginacao(continuacao, 3)
+    assert lidos == itens
@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+from typing import Any, Callable, Sequence
+from connection.conn import SimpleConnection
+from connection.trans import ConnectionPool, PoolClosedException, PoolConfig, PoolStats, PoolTimeoutException, TransactedConnection
+from connection.sqlite3conn import ConnectionData, _Sqlite3ConnectionWrapper
+from validator import TypeValidationError
+from pytest import raises
+from .db_test_util import DbTestConfig
+
+db: DbTestConfig = DbTestConfig("test/fruits-ok.db", "test/fruits.db")
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def counting_factory() -> tuple[Callable[[], SimpleConnection], list[SimpleConnection]]:
+    made: list[SimpleConnection] = []
+    def make() -> SimpleConnection:
+        c: SimpleConnection = _Sqlite3ConnectionWrapper(sqlite3.connect("test/fruits.db", check_same_thread = False))
+        made.append(c)
+        return c
+    return make, made
+
+def test_pool_config_defaults() -> None:
+    c: PoolConfig = PoolConfig.create()
+    assert c.min_size == 0
+    assert c.max_size == 10
+    assert c.ping_on_checkout
+
+def test_pool_config_bad_sizes() -> None:
+    with raises(ValueError):
+        PoolConfig.create(max_size = 0)
+    with raises(ValueError):
+        PoolConfig.create(min_size = -1)
+    with raises(ValueError):
+        PoolConfig.create(min_size = 5, max_size = 4)
+
+def test_pool_config_is_strong_typed() -> None:
+    with raises(TypeValidationError):
+        PoolConfig(0, "x", None, None, None, True) # type: ignore
+
+@db.decorator
+def test_pool_reuses_connection() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make)
+    conn: TransactedConnection = TransactedConnection.pooled(pool)
+    assert conn.pool is pool
+
+    for i in range(0, 5):
+        with conn as c:
+            c.execute("SELECT pk_fruit, name FROM fruit WHERE pk_fruit = 2")
+            assert c.fetchone() == (2, "strawberry")
+
+    assert len(made) == 1
+    assert pool.stats == PoolStats(1, 0, 5, 0, 0, 0, 1, 0)
+
+@db.decorator
+def test_pool_from_connection_data() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db").connect(PoolConfig.create(max_size = 2))
+    pool: ConnectionPool | None = conn.pool
+    assert pool is not None
+
+    @conn.transact
+    def x() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    x()
+
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        all: Sequence[tuple[Any, ...]] = c.fetchall()
+        assert all == [(1, "orange"), (2, "strawberry"), (3, "lemon"), (4, "grape")]
+
+    assert pool.stats.created == 1
+    assert pool.stats.checkouts == 2
+
+@db.decorator
+def test_pool_unpooled_connection_data() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db").connect()
+    assert conn.pool is None
+
+@db.decorator
+def test_pool_min_size() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(min_size = 3, max_size = 5))
+    assert len(made) == 3
+    assert pool.stats.idle == 3
+
+@db.decorator
+def test_pool_release_rolls_back() -> None:
+    make, made = counting_factory()
+    conn: TransactedConnection = TransactedConnection.pooled(ConnectionPool(make))
+
+    with conn as c:
+        c.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        all: Sequence[tuple[Any, ...]] = c.fetchall()
+        assert all == [(1, "orange"), (2, "strawberry"), (3, "lemon")]
+
+    assert len(made) == 1
+
+@db.decorator
+def test_pool_timeout() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(max_size = 1, checkout_timeout = 0.01))
+    first: SimpleConnection = pool.acquire()
+
+    with raises(PoolTimeoutException):
+        pool.acquire()
+
+    pool.release(first)
+    second: SimpleConnection = pool.acquire()
+    assert second is first
+    assert pool.stats == PoolStats(1, 0, 2, 1, 1, 0, 0, 1)
+
+@db.decorator
+def test_pool_waiter_is_woken_up() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(max_size = 1, checkout_timeout = 5.0))
+    first: SimpleConnection = pool.acquire()
+    got: list[SimpleConnection] = []
+
+    def wait_for_it() -> None:
+        got.append(pool.acquire())
+
+    t: threading.Thread = threading.Thread(target = wait_for_it)
+    t.start()
+    while pool.stats.waits == 0: pass
+    pool.release(first)
+    t.join()
+
+    assert got == [first]
+    assert pool.stats.waits == 1
+    assert pool.stats.timeouts == 0
+
+@db.decorator
+def test_pool_idle_eviction() -> None:
+    make, made = counting_factory()
+    clock: FakeClock = FakeClock()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(min_size = 1, max_size = 3, max_idle = 10.0, max_lifetime = None), clock = clock)
+    a: SimpleConnection = pool.acquire()
+    b: SimpleConnection = pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    assert pool.stats.idle == 2
+
+    clock.now += 11.0
+    c: SimpleConnection = pool.acquire()
+
+    # Ambas expiraram, mas uma é mantida por causa do min_size.
+    assert pool.stats.destroyed == 1
+    assert len(made) == 2
+    pool.release(c)
+
+@db.decorator
+def test_pool_max_lifetime() -> None:
+    make, made = counting_factory()
+    clock: FakeClock = FakeClock()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(max_idle = None, max_lifetime = 60.0), clock = clock)
+    a: SimpleConnection = pool.acquire()
+    pool.release(a)
+
+    clock.now += 30.0
+    b: SimpleConnection = pool.acquire()
+    assert b is a
+
+    clock.now += 31.0
+    pool.release(b)
+    assert pool.stats.destroyed == 1
+
+    c: SimpleConnection = pool.acquire()
+    assert c is not a
+    assert len(made) == 2
+
+@db.decorator
+def test_pool_failed_ping() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make)
+    a: SimpleConnection = pool.acquire()
+    pool.release(a)
+    a.close()
+
+    b: SimpleConnection = pool.acquire()
+    assert b is not a
+    b.execute("SELECT COUNT(*) FROM fruit")
+    assert b.fetchone() == (3, )
+    assert pool.stats == PoolStats(2, 1, 2, 0, 0, 1, 0, 1)
+
+@db.decorator
+def test_pool_close() -> None:
+    make, made = counting_factory()
+    pool: ConnectionPool = ConnectionPool(make, PoolConfig.create(min_size = 2))
+    a: SimpleConnection = pool.acquire()
+    pool.close()
+    assert pool.stats.destroyed == 1
+
+    pool.release(a)
+    assert pool.stats.destroyed == 2
+
+    with raises(PoolClosedException):
+        pool.acquire()
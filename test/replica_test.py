@@ -0,0 +1,236 @@
+import sqlite3
+import threading
+from typing import Callable
+from connection.conn import SimpleConnection
+from connection.trans import ConnectionPool, NoReplicaAvailableException, PoolConfig, ReplicaSet, ReplicaStatus, ReplicaStrategy, TransactedConnection
+from connection.sqlite3conn import _Sqlite3ConnectionWrapper
+from pytest import raises
+from .db_test_util import DbTestConfig
+
+db: DbTestConfig = DbTestConfig("test/fruits-ok.db", "test/fruits.db")
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class Server:
+    """
+    Simula um servidor de banco de dados que pode ser derrubado e religado. Todos usam o mesmo arquivo, mas cada um sabe quais conexões abriu.
+    """
+
+    def __init__(self) -> None:
+        self.up: bool = True
+        self.opened: list[object] = []
+
+    def open(self) -> SimpleConnection:
+        if not self.up: raise ConnectionError("The server is down.")
+        raw: sqlite3.Connection = sqlite3.connect("test/fruits.db", check_same_thread = False)
+        self.opened.append(raw)
+        return _Sqlite3ConnectionWrapper(raw)
+
+    def owns(self, conn: TransactedConnection) -> bool:
+        return any(conn.raw_connection is raw for raw in self.opened)
+
+def replica_set(servers: list[Server], strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN, clock: Callable[[], float] = FakeClock()) -> ReplicaSet:
+    return ReplicaSet([ConnectionPool(s.open, PoolConfig.create(max_size = 2, checkout_timeout = 0.0)) for s in servers], strategy, recheck_interval = 10.0, clock = clock)
+
+def who(conn: TransactedConnection, servers: list[Server]) -> list[int]:
+    return [i for i, s in enumerate(servers) if s.owns(conn)]
+
+@db.decorator
+def test_round_robin() -> None:
+    servers: list[Server] = [Server(), Server()]
+    rs: ReplicaSet = replica_set(servers)
+    c1: SimpleConnection = rs.acquire()
+    c2: SimpleConnection = rs.acquire()
+    c3: SimpleConnection = rs.acquire()
+    assert [len(s.opened) for s in servers] == [2, 1]
+    for c in [c1, c2, c3]:
+        rs.release(c)
+    assert [s.in_use for s in rs.status] == [0, 0]
+    rs.close()
+
+@db.decorator
+def test_least_loaded() -> None:
+    servers: list[Server] = [Server(), Server()]
+    rs: ReplicaSet = replica_set(servers, ReplicaStrategy.LEAST_LOADED)
+    c1: SimpleConnection = rs.acquire()
+    c2: SimpleConnection = rs.acquire()
+    rs.release(c1)
+    c3: SimpleConnection = rs.acquire()
+    assert [s.in_use for s in rs.status] == [1, 1]
+    rs.release(c2)
+    rs.release(c3)
+    rs.close()
+
+@db.decorator
+def test_busy_replica_is_skipped_but_not_down() -> None:
+    servers: list[Server] = [Server()]
+    rs: ReplicaSet = ReplicaSet([ConnectionPool(servers[0].open, PoolConfig.create(max_size = 1, checkout_timeout = 0.0))])
+    c1: SimpleConnection = rs.acquire()
+    with raises(NoReplicaAvailableException):
+        rs.acquire()
+    assert rs.status == [ReplicaStatus(0, True, 0, 1)]
+    rs.release(c1)
+    rs.close()
+
+@db.decorator
+def test_replica_down_and_recheck() -> None:
+    clock: FakeClock = FakeClock()
+    servers: list[Server] = [Server(), Server()]
+    rs: ReplicaSet = replica_set(servers, clock = clock)
+    servers[0].up = False
+
+    for i in range(3):
+        rs.release(rs.acquire())
+    assert [len(s.opened) for s in servers] == [0, 1]
+    assert [(s.healthy, s.failures) for s in rs.status] == [(False, 1), (True, 0)]
+
+    servers[0].up = True
+    clock.now = 9.0
+    assert [s.healthy for s in rs.status] == [False, True]
+    clock.now = 10.0
+    rs.release(rs.acquire())
+    rs.release(rs.acquire())
+    assert [len(s.opened) for s in servers] == [1, 1]
+    assert [s.healthy for s in rs.status] == [True, True]
+    rs.close()
+
+@db.decorator
+def test_check_health() -> None:
+    servers: list[Server] = [Server(), Server()]
+    rs: ReplicaSet = replica_set(servers)
+    servers[1].up = False
+    assert [s.healthy for s in rs.check_health()] == [True, False]
+    servers[1].up = True
+    assert [s.healthy for s in rs.check_health()] == [True, True]
+    rs.close()
+
+@db.decorator
+def test_reads_go_to_replicas_and_writes_to_primary() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server(), Server()]
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas))
+    seen: list[str] = []
+
+    @conn.transact_readonly
+    def read() -> None:
+        seen.append("primary" if primary.owns(conn) else f"replica {who(conn, replicas)}")
+
+    @conn.transact
+    def write() -> None:
+        seen.append("primary" if primary.owns(conn) else "replica")
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    read()
+    write()
+    read()
+    read()
+    assert seen == ["replica [0]", "primary", "replica [1]", "replica [0]"]
+
+@db.decorator
+def test_read_your_writes() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server()]
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas), read_your_writes = 60.0)
+    seen: list[tuple[bool, object]] = []
+
+    @conn.transact_readonly
+    def read() -> None:
+        conn.execute("SELECT COUNT(*) FROM fruit")
+        seen.append((primary.owns(conn), conn.fetchone()))
+
+    @conn.transact
+    def write() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    read()
+    write()
+    read()
+    assert seen == [(False, (3, )), (True, (4, ))]
+
+@db.decorator
+def test_read_your_writes_in_other_thread() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server()]
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas), read_your_writes = 60.0)
+    seen: list[bool] = []
+
+    @conn.transact_readonly
+    def read() -> None:
+        seen.append(primary.owns(conn))
+
+    @conn.transact
+    def write() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    write()
+    t: threading.Thread = threading.Thread(target = read)
+    t.start()
+    t.join()
+    read()
+    assert seen == [False, True]
+
+@db.decorator
+def test_read_your_writes_carried_to_other_thread() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server()]
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas), read_your_writes = 60.0)
+    seen: list[bool] = []
+
+    @conn.transact_readonly
+    def read() -> None:
+        seen.append(primary.owns(conn))
+
+    @conn.transact
+    def write() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    def read_as_same_client(when: float | None) -> None:
+        conn.remember_write(when)
+        read()
+
+    assert conn.last_write is None
+    write()
+    t: threading.Thread = threading.Thread(target = read_as_same_client, args = (conn.last_write, ))
+    t.start()
+    t.join()
+    assert seen == [True]
+
+@db.decorator
+def test_read_your_writes_ignores_transactions_without_writes() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server()]
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas), read_your_writes = 60.0)
+    seen: list[bool] = []
+
+    @conn.transact_readonly
+    def read() -> None:
+        seen.append(primary.owns(conn))
+
+    @conn.transact
+    def select() -> None:
+        conn.execute("SELECT COUNT(*) FROM fruit")
+
+    select()
+    read()
+    assert seen == [False]
+
+@db.decorator
+def test_fallback_to_primary() -> None:
+    primary: Server = Server()
+    replicas: list[Server] = [Server()]
+    replicas[0].up = False
+    conn: TransactedConnection = TransactedConnection(primary.open).with_replicas(replica_set(replicas))
+
+    @conn.transact_readonly
+    def read() -> bool:
+        return primary.owns(conn)
+
+    assert read()
+    assert read()
+    assert len(replicas[0].opened) == 0
@@ -0,0 +1,161 @@
+import sqlite3
+from typing import Any, Callable
+from connection.conn import RetryableException
+from connection.trans import RetryPolicy, TransactedConnection
+from connection.sqlite3conn import ConnectionData
+from pytest import raises
+from .db_test_util import DbTestConfig
+
+db: DbTestConfig = DbTestConfig("test/fruits-ok.db", "test/fruits.db")
+
+class FakeTime:
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def failing(times: int, result: Any = "ok") -> Callable[[], Any]:
+    calls: list[int] = []
+    def attempt() -> Any:
+        calls.append(1)
+        if len(calls) <= times: raise RetryableException("database is locked")
+        return result
+    return attempt
+
+def test_retry_policy_bad_attempts() -> None:
+    with raises(ValueError):
+        RetryPolicy.create(max_attempts = 0)
+
+def test_retry_policy_delay() -> None:
+    p: RetryPolicy = RetryPolicy.create(base_delay = 0.01, max_delay = 0.05)
+    assert [p.delay(n, 1.0) for n in range(1, 6)] == [0.01, 0.02, 0.04, 0.05, 0.05]
+    assert p.delay(3, 0.5) == 0.02
+
+def test_retry_until_success() -> None:
+    t: FakeTime = FakeTime()
+    p: RetryPolicy = RetryPolicy.create(max_attempts = 3, base_delay = 0.01)
+    assert p.run(failing(2), sleep = t.sleep, clock = t.clock, jitter = lambda: 1.0) == "ok"
+    assert t.sleeps == [0.01, 0.02]
+
+def test_retry_gives_up_after_max_attempts() -> None:
+    t: FakeTime = FakeTime()
+    p: RetryPolicy = RetryPolicy.create(max_attempts = 3)
+    with raises(RetryableException):
+        p.run(failing(3), sleep = t.sleep, clock = t.clock, jitter = lambda: 1.0)
+    assert len(t.sleeps) == 2
+
+def test_retry_gives_up_after_deadline() -> None:
+    t: FakeTime = FakeTime()
+    p: RetryPolicy = RetryPolicy.create(max_attempts = 100, base_delay = 1.0, max_delay = 1.0, deadline = 2.5)
+    with raises(RetryableException):
+        p.run(failing(50), sleep = t.sleep, clock = t.clock, jitter = lambda: 1.0)
+    assert t.sleeps == [1.0, 1.0]
+
+def test_retry_ignores_other_errors() -> None:
+    t: FakeTime = FakeTime()
+    def attempt() -> None:
+        raise KeyError()
+    with raises(KeyError):
+        RetryPolicy.create().run(attempt, sleep = t.sleep, clock = t.clock)
+    assert t.sleeps == []
+
+@db.decorator
+def test_sqlite_busy_is_retryable() -> None:
+    blocker: sqlite3.Connection = sqlite3.connect("test/fruits.db")
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db", busy_timeout = 0).connect()
+        with conn as c:
+            with raises(RetryableException):
+                c.execute("INSERT INTO fruit (name) VALUES ('grape')")
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+@db.decorator
+def test_transact_retries_whole_operation() -> None:
+    conn: TransactedConnection = db.new_connection().with_retry(RetryPolicy.create(base_delay = 0.001))
+    calls: list[int] = []
+
+    @conn.transact
+    def x() -> None:
+        calls.append(1)
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"grape {len(calls)}"])
+        if len(calls) < 3: raise RetryableException("database is locked")
+
+    x()
+    assert len(calls) == 3
+
+    with conn as c:
+        c.execute("SELECT name FROM fruit WHERE pk_fruit > 3")
+        assert c.fetchall() == [("grape 3", )]
+
+@db.decorator
+def test_transact_retries_nested_operation() -> None:
+    conn: TransactedConnection = db.new_connection().with_retry(RetryPolicy.create(base_delay = 0.001))
+    calls: list[int] = []
+
+    @conn.transact
+    def inner() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"grape {len(calls)}"])
+        if len(calls) < 3: raise RetryableException("database is locked")
+
+    @conn.transact
+    def outer() -> None:
+        calls.append(1)
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"melon {len(calls)}"])
+        inner()
+
+    outer()
+    assert len(calls) == 3
+
+    with conn as c:
+        c.execute("SELECT name FROM fruit WHERE pk_fruit > 3 ORDER BY pk_fruit")
+        assert c.fetchall() == [("melon 3", ), ("grape 3", )]
+
+@db.decorator
+def test_transact_retries_nested_operation_without_savepoint() -> None:
+    conn: TransactedConnection = db.new_connection().with_retry(RetryPolicy.create(base_delay = 0.001))
+    calls: list[int] = []
+
+    @conn.transact
+    def inner() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"grape {len(calls)}"])
+        if len(calls) < 2:
+            # Como em um deadlock do MariaDB, o ponto de salvamento some antes que o ROLLBACK TO SAVEPOINT seja executado.
+            conn.release_savepoint(f"savepoint_{conn.reenter_count}")
+            raise RetryableException("deadlock")
+
+    @conn.transact
+    def outer() -> None:
+        calls.append(1)
+        inner()
+
+    outer()
+    assert len(calls) == 2
+
+    with conn as c:
+        c.execute("SELECT name FROM fruit WHERE pk_fruit > 3")
+        assert c.fetchall() == [("grape 2", )]
+
+@db.decorator
+def test_transact_without_retry() -> None:
+    conn: TransactedConnection = db.new_connection()
+    assert conn.retry is None
+    calls: list[int] = []
+
+    @conn.transact
+    def x() -> None:
+        calls.append(1)
+        raise RetryableException("database is locked")
+
+    with raises(RetryableException):
+        x()
+    assert len(calls) == 1
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import tempfile
+from typing import Any, Callable
+from timeit import timeit
+from cofre_de_senhas.bd.raiz import Raiz
+from cofre_de_senhas.dao import CategoriaDAO, DadosSegredoCompleto, SegredoDAO, SegredoPK, UsuarioDAO
+from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
+from cofre_de_senhas.segredo.segredo_dao_impl import SegredoDAOImpl
+from cofre_de_senhas.usuario.usuario_dao_impl import UsuarioDAOImpl
+
+# Uso: python -m test.segredo_bench
+
+_SEGREDOS: int = 2000
+_USUARIOS: int = 200
+_CAMPOS: int = 8
+_PERMISSOES: int = 6
+_CATEGORIAS: int = 3
+
+def _popular(arquivo: str) -> None:
+    # Um cofre de tamanho realista: cada segredo tem alguns campos, alguns usuários com permissão e algumas categorias.
+    sql: str = open(os.path.join(os.path.dirname(__file__), "../src/create.sql"), encoding = "utf-8").read()
+    conn: sqlite3.Connection = sqlite3.connect(arquivo)
+    conn.executescript(sql)
+    conn.executemany("INSERT INTO usuario (pk_usuario, login, fk_nivel_acesso, hash_com_sal) VALUES (?, ?, 1, ?)", \
+            [(u, f"usuario{u:04}", "x" * 144) for u in range(1, _USUARIOS + 1)])
+    conn.executemany("INSERT INTO segredo (pk_segredo, nome, descricao, fk_tipo_segredo) VALUES (?, ?, ?, ?)", \
+            [(s, f"Segredo {s}", f"Descrição do segredo {s}.", 1 + s % 3) for s in range(1, _SEGREDOS + 1)])
+    conn.executemany("INSERT INTO campo_segredo (pfk_segredo, pk_nome, valor) VALUES (?, ?, ?)", \
+            [(s, f"Campo {c}", f"valor {s}-{c} " + "*" * 40) for s in range(1, _SEGREDOS + 1) for c in range(_CAMPOS)])
+    conn.executemany("INSERT INTO permissao (pfk_usuario, pfk_segredo, fk_tipo_permissao) VALUES (?, ?, ?)", \
+            [(1 + (s * 7 + p * 31) % _USUARIOS, s, 1 + p % 3) for s in range(1, _SEGREDOS + 1) for p in range(_PERMISSOES)])
+    conn.executemany("INSERT INTO categoria_segredo (pfk_segredo, pfk_categoria) VALUES (?, ?)", \
+            [(s, 1 + (s + c * 3) % 9) for s in range(1, _SEGREDOS + 1) for c in range(_CATEGORIAS)])
+    conn.commit()
+    conn.close()
+
+def _quatro_consultas(pk: SegredoPK) -> tuple[Any, ...]:
+    return ( \
+        SegredoDAO.instance().buscar_por_pk(pk), \
+        SegredoDAO.instance().ler_campos_segredo(pk), \
+        UsuarioDAO.instance().listar_por_permissao(pk), \
+        CategoriaDAO.instance().listar_por_segredo(pk) \
+    )
+
+def _uma_consulta(pk: SegredoPK) -> DadosSegredoCompleto | None:
+    return SegredoDAO.instance().buscar_completo_por_pk(pk)
+
+def _carregar_todos(carregar: Callable[[SegredoPK], Any]) -> Callable[[], None]:
+    @Raiz.transact
+    def todos() -> None:
+        for s in range(1, _SEGREDOS + 1):
+            carregar(SegredoPK(s))
+    return todos
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo: str = os.path.join(pasta, "cofre-bench.db")
+        _popular(arquivo)
+        Raiz.register_url(f"sqlite:///{arquivo}?profile=wal")
+        CategoriaDAOImpl()
+        SegredoDAOImpl()
+        UsuarioDAOImpl()
+
+        @Raiz.transact
+        def conferir() -> None:
+            for s in [1, _SEGREDOS // 2, _SEGREDOS]:
+                pk: SegredoPK = SegredoPK(s)
+                velho: tuple[Any, ...] = _quatro_consultas(pk)
+                novo: DadosSegredoCompleto | None = _uma_consulta(pk)
+                assert novo is not None
+                assert (novo.cabecalho, novo.campos, novo.usuarios, novo.categorias) == velho
+        conferir()
+
+        repeat: int = 5
+        old: float = timeit(_carregar_todos(_quatro_consultas), number = repeat) / repeat / _SEGREDOS
+        new: float = timeit(_carregar_todos(_uma_consulta), number = repeat) / repeat / _SEGREDOS
+        print(f"{_SEGREDOS} segredos, {_CAMPOS} campos, {_PERMISSOES} permissões e {_CATEGORIAS} categorias cada")
+        print(f"Quatro consultas: {old * 1_000_000:8.1f} µs por segredo")
+        print(f"Uma consulta    : {new * 1_000_000:8.1f} µs por segredo - {old / new:5.2f}x")
+
+if __name__ == "__main__":
+    main()
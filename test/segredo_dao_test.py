@@ -2,7 +2,7 @@ from .fixtures import *
 from connection.conn import IntegrityViolationException
 from cofre_de_senhas.dao import \
     BuscaPermissaoPorLogin, SegredoDAO, SegredoPK, DadosSegredo, DadosSegredoSemPK, CampoDeSegredo, PermissaoDeSegredo, \
-    DadosCategoria, CategoriaDAO, CategoriaDeSegredo
+    DadosCategoria, CategoriaDAO, CategoriaDeSegredo, DadosSegredoCompleto, DadosUsuarioComPermissao, AcessoSegredo, BuscaSegredos, Pagina
 from cofre_de_senhas.bd.raiz import Raiz
 from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
 from cofre_de_senhas.segredo.segredo_dao_impl import SegredoDAOImpl
@@ -45,6 +45,32 @@ def test_ler_segredo_por_pk_nao_existe() -> None:
     lido: DadosSegredo | None = dao.buscar_por_pk(SegredoPK(666))
     assert lido is None
 
+@db.transacted
+def test_buscar_completo_por_pk() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    lido: DadosSegredoCompleto | None = dao.buscar_completo_por_pk(SegredoPK(star_wars.pk_segredo))
+    assert lido == DadosSegredoCompleto(
+        star_wars,
+        [
+            CampoDeSegredo(star_wars.pk_segredo, "Nome do cara vestido de preto", "Darth Vader"),
+            CampoDeSegredo(star_wars.pk_segredo, "Nome do imperador", "Palpatine"),
+            CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "C3PO")
+        ],
+        [DadosUsuarioComPermissao(harry_potter.pk_usuario, harry_potter.login, harry_potter.fk_nivel_acesso, harry_potter.hash_com_sal, 3)],
+        [producao]
+    )
+
+@db.transacted
+def test_buscar_completo_por_pk_vazio() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    pk: SegredoPK = dao.criar(star_trek_sem_pk)
+    assert dao.buscar_completo_por_pk(pk) == DadosSegredoCompleto(star_trek, [], [], [])
+
+@db.transacted
+def test_buscar_completo_por_pk_nao_existe() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.buscar_completo_por_pk(SegredoPK(666)) is None
+
 @db.transacted
 def test_listar_segredos_por_pk() -> None:
     dao: SegredoDAOImpl = SegredoDAOImpl()
@@ -90,6 +116,20 @@ def test_listar_tudo_apos_insercao() -> None:
     esperado.append(star_trek)
     assert lido == esperado
 
+@db.transacted
+def test_listar_paginado() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.listar(Pagina.primeira(2)) == [segredo_m1, dbz]
+    assert dao.listar(Pagina(dbz.pk_segredo, 2)) == [lotr, star_wars]
+    assert dao.listar(Pagina(star_wars.pk_segredo, 2)) == []
+
+@db.transacted
+def test_listar_segredos_visiveis_paginado() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.listar_visiveis(login_hermione, Pagina.primeira(2)) == [segredo_m1, lotr]
+    assert dao.listar_visiveis(login_hermione, Pagina(lotr.pk_segredo, 2)) == [star_wars]
+    assert dao.listar_visiveis(login_harry_potter, Pagina(segredo_m1.pk_segredo, 2)) == [dbz, lotr]
+
 @db.transacted
 def test_listar_segredos_visiveis_1() -> None:
     dao: SegredoDAOImpl = SegredoDAOImpl()
@@ -120,6 +160,79 @@ def test_listar_segredos_visiveis_5() -> None:
     lido: list[DadosSegredo] = dao.listar_visiveis(login_snape)
     assert lido == visiv_segredos
 
+def busca(texto: str, categorias: list[str] = [], limite: int = 20, deslocamento: int = 0) -> BuscaSegredos:
+    return BuscaSegredos(texto, categorias, limite, deslocamento)
+
+@db.transacted
+def test_pesquisar_por_prefixo() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca("estre")) == [star_wars]
+    assert dao.pesquisar(busca("drag ball")) == [dbz]
+    assert dao.pesquisar(busca("drag wars")) == []
+
+@db.transacted
+def test_pesquisar_sem_acentos() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca("aneis")) == [lotr]
+    assert dao.pesquisar(busca("INTEGRACAO")) == [lotr]
+
+@db.transacted
+def test_pesquisar_nomes_de_campos_mas_nao_valores() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca("imperador")) == [star_wars]
+    assert dao.pesquisar(busca("Palpatine")) == []
+
+@db.transacted
+def test_pesquisar_ignora_operadores() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca('"star" -wars: (')) == [star_wars]
+    assert dao.pesquisar(busca(' "*: ')) == todos_segredos
+
+@db.transacted
+def test_pesquisar_ordena_por_relevancia() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    pk: SegredoPK = dao.criar(DadosSegredoSemPK("Estrelas cadentes", "Nada a declarar.", 1))
+    assert dao.pesquisar(busca("estrelas")) == [DadosSegredo(pk.pk_segredo, "Estrelas cadentes", "Nada a declarar.", 1), star_wars]
+
+@db.transacted
+def test_pesquisar_por_categorias() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca("", ["Aplicação"])) == [segredo_m1, lotr]
+    assert dao.pesquisar(busca("", ["Aplicação", "Integração"])) == [lotr]
+    assert dao.pesquisar(busca("senhor", ["Aplicação"])) == [lotr]
+    assert dao.pesquisar(busca("", [nao_existe.nome])) == []
+
+@db.transacted
+def test_pesquisar_paginado() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar(busca("", [], 2, 0)) == [segredo_m1, dbz]
+    assert dao.pesquisar(busca("", [], 2, 2)) == [lotr, star_wars]
+    assert dao.pesquisar(busca("", [], 2, 4)) == []
+
+@db.transacted
+def test_pesquisar_visiveis() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.pesquisar_visiveis(login_harry_potter, busca("dragon")) == [dbz]
+    assert dao.pesquisar_visiveis(login_hermione, busca("dragon")) == []
+    assert dao.pesquisar_visiveis(login_hermione, busca("")) == visiv_segredos
+
+@db.transacted
+def test_pesquisar_acompanha_alteracoes() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.salvar_com_pk(DadosSegredo(star_wars.pk_segredo, "Guerra Galáctica", star_wars.descricao, star_wars.fk_tipo_segredo))
+    assert dao.pesquisar(busca("galactica")) == [DadosSegredo(star_wars.pk_segredo, "Guerra Galáctica", star_wars.descricao, star_wars.fk_tipo_segredo)]
+
+    dao.criar_campos_segredo([CampoDeSegredo(star_wars.pk_segredo, "Mestre Jedi", "Yoda")])
+    assert [s.pk_segredo for s in dao.pesquisar(busca("jedi"))] == [star_wars.pk_segredo]
+    dao.deletar_campos_segredo([CampoDeSegredo(star_wars.pk_segredo, "Mestre Jedi", "Yoda")])
+    assert dao.pesquisar(busca("jedi")) == []
+
+    dao.criar_categorias_segredo([CategoriaDeSegredo(star_wars.pk_segredo, qa.pk_categoria)])
+    assert [s.pk_segredo for s in dao.pesquisar(busca("qa"))] == [dbz.pk_segredo, star_wars.pk_segredo]
+
+    dao.deletar_por_pk(SegredoPK(star_wars.pk_segredo))
+    assert dao.pesquisar(busca("galactica")) == []
+
 @db.transacted
 def test_excluir_segredo_por_pk() -> None:
     dao: SegredoDAOImpl = SegredoDAOImpl()
@@ -218,6 +331,67 @@ def test_criar_campo_segredo_duplicado() -> None:
         CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "C3PO") \
     ]
 
+@db.transacted
+def test_criar_campos_segredo() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.criar_campos_segredo([
+        CampoDeSegredo(star_wars.pk_segredo, "Pequeno, mas poderoso", "Yoda"),
+        CampoDeSegredo(star_wars.pk_segredo, "Caçador de recompensas", "Boba Fett")
+    ])
+    pk: SegredoPK = SegredoPK(star_wars.pk_segredo)
+    campos: list[CampoDeSegredo] = dao.ler_campos_segredo(pk)
+    assert campos == [
+        CampoDeSegredo(star_wars.pk_segredo, "Caçador de recompensas", "Boba Fett"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do cara vestido de preto", "Darth Vader"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do imperador", "Palpatine"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Pequeno, mas poderoso", "Yoda"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "C3PO") \
+    ]
+
+@db.transacted
+def test_criar_campos_segredo_vazio() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.criar_campos_segredo([])
+    pk: SegredoPK = SegredoPK(star_wars.pk_segredo)
+    assert len(dao.ler_campos_segredo(pk)) == 3
+
+@db.transacted
+def test_criar_campos_segredo_duplicado() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+
+    with raises(IntegrityViolationException):
+        dao.criar_campos_segredo([
+            CampoDeSegredo(star_wars.pk_segredo, "Pequeno, mas poderoso", "Yoda"),
+            CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "R2D2")
+        ])
+
+@db.transacted
+def test_alterar_campos_segredo() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.alterar_campos_segredo([
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do imperador", "Sheev Palpatine"),
+        CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "R2D2")
+    ])
+    pk: SegredoPK = SegredoPK(star_wars.pk_segredo)
+    campos: list[CampoDeSegredo] = dao.ler_campos_segredo(pk)
+    assert campos == [
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do cara vestido de preto", "Darth Vader"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do imperador", "Sheev Palpatine"), \
+        CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "R2D2") \
+    ]
+
+@db.transacted
+def test_deletar_campos_segredo() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.deletar_campos_segredo([
+        CampoDeSegredo(star_wars.pk_segredo, "Nome do imperador", "Palpatine"),
+        CampoDeSegredo(star_wars.pk_segredo, "Robô chato e falastrão", "C3PO")
+    ])
+    dao.deletar_campos_segredo([])
+    pk: SegredoPK = SegredoPK(star_wars.pk_segredo)
+    campos: list[CampoDeSegredo] = dao.ler_campos_segredo(pk)
+    assert campos == [CampoDeSegredo(star_wars.pk_segredo, "Nome do cara vestido de preto", "Darth Vader")]
+
 @db.transacted
 def test_criar_permissao() -> None:
     dao: SegredoDAOImpl = SegredoDAOImpl()
@@ -278,6 +452,40 @@ def test_criar_permissao_ja_existe() -> None:
     perm2: PermissaoDeSegredo | None = dao.buscar_permissao(busca)
     assert perm2 == PermissaoDeSegredo(harry_potter.pk_usuario, dbz.pk_segredo, 1)
 
+@db.transacted
+def test_criar_permissoes() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    perm1: PermissaoDeSegredo = PermissaoDeSegredo(hermione.pk_usuario, dbz.pk_segredo, 2)
+    perm2: PermissaoDeSegredo = PermissaoDeSegredo(hermione.pk_usuario, lotr.pk_segredo, 3)
+    dao.criar_permissoes([perm1, perm2])
+
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(dbz.pk_segredo, "Hermione")) == perm1
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(lotr.pk_segredo, "Hermione")) == perm2
+
+@db.transacted
+def test_alterar_permissoes() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    perm1: PermissaoDeSegredo = PermissaoDeSegredo(harry_potter.pk_usuario, dbz.pk_segredo, 3)
+    perm2: PermissaoDeSegredo = PermissaoDeSegredo(harry_potter.pk_usuario, lotr.pk_segredo, 1)
+    dao.alterar_permissoes([perm1, perm2])
+
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(dbz.pk_segredo, "Harry Potter")) == perm1
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(lotr.pk_segredo, "Harry Potter")) == perm2
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(star_wars.pk_segredo, "Harry Potter")) == PermissaoDeSegredo(harry_potter.pk_usuario, star_wars.pk_segredo, 3)
+
+@db.transacted
+def test_deletar_permissoes() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    dao.deletar_permissoes([
+        PermissaoDeSegredo(harry_potter.pk_usuario, dbz.pk_segredo, 1),
+        PermissaoDeSegredo(harry_potter.pk_usuario, lotr.pk_segredo, 2)
+    ])
+    dao.deletar_permissoes([])
+
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(dbz.pk_segredo, "Harry Potter")) is None
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(lotr.pk_segredo, "Harry Potter")) is None
+    assert dao.buscar_permissao(BuscaPermissaoPorLogin(star_wars.pk_segredo, "Harry Potter")) is not None
+
 @db.transacted
 def test_buscar_permissao_1() -> None:
     dao: SegredoDAOImpl = SegredoDAOImpl()
@@ -313,6 +521,23 @@ def test_buscar_permissao_segredo_nao_existe() -> None:
     perm: PermissaoDeSegredo | None = dao.buscar_permissao(busca)
     assert perm is None
 
+@db.transacted
+def test_verificar_leitura() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.verificar_leitura(BuscaPermissaoPorLogin(dbz.pk_segredo, "Harry Potter")) == AcessoSegredo(True, True)
+    assert dao.verificar_leitura(BuscaPermissaoPorLogin(dbz.pk_segredo, "Hermione")) == AcessoSegredo(True, False)
+    assert dao.verificar_leitura(BuscaPermissaoPorLogin(dbz.pk_segredo, "Dollynho")) == AcessoSegredo(True, False)
+    assert dao.verificar_leitura(BuscaPermissaoPorLogin(lixo1, "Harry Potter")) == AcessoSegredo(False, False)
+
+@db.transacted
+def test_verificar_escrita() -> None:
+    dao: SegredoDAOImpl = SegredoDAOImpl()
+    assert dao.verificar_escrita(BuscaPermissaoPorLogin(dbz.pk_segredo, "Harry Potter")) == AcessoSegredo(True, False)
+    assert dao.verificar_escrita(BuscaPermissaoPorLogin(lotr.pk_segredo, "Harry Potter")) == AcessoSegredo(True, True)
+    assert dao.verificar_escrita(BuscaPermissaoPorLogin(star_wars.pk_segredo, "Harry Potter")) == AcessoSegredo(True, True)
+    assert dao.verificar_escrita(BuscaPermissaoPorLogin(star_wars.pk_segredo, "Hermione")) == AcessoSegredo(True, False)
+    assert dao.verificar_escrita(BuscaPermissaoPorLogin(lixo1, "Harry Potter")) == AcessoSegredo(False, False)
+
 @db.transacted
 def test_criar_categoria_segredo() -> None:
     dao1: SegredoDAOImpl = SegredoDAOImpl()
@@ -367,6 +592,30 @@ def test_criar_categoria_segredo_ja_existe() -> None:
 
     assert dados == [qa]
 
+@db.transacted
+def test_criar_categorias_segredo() -> None:
+    dao1: SegredoDAOImpl = SegredoDAOImpl()
+    dao1.criar_categorias_segredo([
+        CategoriaDeSegredo(star_wars.pk_segredo, api.pk_categoria),
+        CategoriaDeSegredo(star_wars.pk_segredo, qa.pk_categoria)
+    ])
+
+    dao2: CategoriaDAOImpl = CategoriaDAOImpl()
+    spk: SegredoPK = SegredoPK(star_wars.pk_segredo)
+    dados: list[DadosCategoria] = dao2.listar_por_segredo(spk)
+
+    assert dados == [api, producao, qa]
+
+@db.transacted
+def test_deletar_categorias_segredo() -> None:
+    dao1: SegredoDAOImpl = SegredoDAOImpl()
+    dao1.deletar_categorias_segredo([CategoriaDeSegredo(lotr.pk_segredo, aplicacao.pk_categoria)])
+    dao1.deletar_categorias_segredo([])
+
+    dao2: CategoriaDAOImpl = CategoriaDAOImpl()
+    assert dao2.listar_por_segredo(SegredoPK(lotr.pk_segredo)) == [integracao]
+    assert dao2.listar_por_segredo(SegredoPK(star_wars.pk_segredo)) == [producao]
+
 @db.transacted
 def test_buscar_categoria_segredo() -> None:
     dao2: CategoriaDAOImpl = CategoriaDAOImpl()
@@ -0,0 +1,39 @@
+from .fixtures import *
+from .cache_de_acesso_test import em_outra_thread
+from .instrument_test import Recorder
+from cofre_de_senhas.bd.raiz import Raiz
+from cofre_de_senhas.service import ChaveSegredo, ChaveUsuario, SegredoComChave
+from cofre_de_senhas.categoria.categoria_dao_impl import CategoriaDAOImpl
+from cofre_de_senhas.segredo.segredo import Segredo
+from cofre_de_senhas.segredo.segredo_dao_impl import SegredoDAOImpl
+from dataclasses import replace
+
+@db.decorator
+def test_alterar_um_campo_grava_apenas_o_campo() -> None:
+    quem_faz: ChaveUsuario = ChaveUsuario(dumbledore.pk_usuario)
+    chave: ChaveSegredo = ChaveSegredo(dbz.pk_segredo)
+
+    @Raiz.transact
+    def buscar() -> SegredoComChave:
+        return Segredo.servicos().buscar(quem_faz, chave)
+
+    @Raiz.transact
+    def alterar(dados: SegredoComChave) -> None:
+        Segredo.servicos().alterar_por_chave(quem_faz, dados)
+
+    def teste() -> None:
+        CategoriaDAOImpl()
+        SegredoDAOImpl()
+        antes: SegredoComChave = buscar()
+        campo: str = sorted(antes.campos.keys())[0]
+        depois: SegredoComChave = replace(antes, campos = {**antes.campos, campo: "Kamehameha"})
+
+        r: Recorder = Recorder()
+        Raiz.instance().add_observer(r)
+        alterar(depois)
+        Raiz.instance().remove_observer(r)
+
+        escritas: list[str] = [e.sql for e in r.events if not e.is_fetch and not e.sql.lstrip().upper().startswith("SELECT")]
+        assert escritas == ["UPDATE campo_segredo SET valor = ? WHERE pfk_segredo = ? AND pk_nome = ?"]
+        assert buscar() == depois
+    em_outra_thread(teste)
@@ -1,8 +1,11 @@
+import array
 import sqlite3
-from typing import Any, Callable, Sequence
-from connection.conn import IntegrityViolationException, TransactionNotActiveException
-from connection.trans import TransactedConnection
-from pytest import raises
+import threading
+from typing import Any, Callable, Iterator, Sequence
+from connection.conn import batch_sql, ColumnDescriptor, Descriptor, InList, IntegrityViolationException, padded_in_list, ResultSet, rows_to_columns, SimpleConnection, TransactionNotActiveException, TypeCode
+from connection.trans import ConnectionPool, PoolConfig, TransactedConnection
+from connection.sqlite3conn import ConnectionData, JournalMode, Synchronous, _Sqlite3ConnectionWrapper
+from pytest import importorskip, raises
 from dataclasses import dataclass
 from validator import dataclass_validate
 from .db_test_util import DbTestConfig
@@ -121,12 +124,233 @@ def test_transact_2() -> None:
         all: Sequence[tuple[Any, ...]] = c.fetchall()
         assert all == [(1, "orange"), (2, "strawberry"), (3, "lemon"), (4, "grape")]
 
+@db.decorator
+def test_transact_nested_many_threads() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db", profile = "wal").connect(PoolConfig.create(max_size = 8))
+    threads: int = 8
+    rounds: int = 25
+    start: threading.Barrier = threading.Barrier(threads)
+    errors: list[BaseException] = []
+
+    @conn.transact
+    def inner(t: int, i: int, outer_con: object) -> None:
+        assert conn.reenter_count == 2
+        assert conn.raw_connection is outer_con
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"fruit {t} {i}"])
+
+    @conn.transact
+    def outer(t: int, i: int) -> None:
+        assert conn.reenter_count == 1
+        inner(t, i, conn.raw_connection)
+        assert conn.reenter_count == 1
+
+    def work(t: int) -> None:
+        try:
+            start.wait()
+            for i in range(0, rounds):
+                outer(t, i)
+                assert not conn.is_active
+        except BaseException as x:
+            errors.append(x)
+
+    ts: list[threading.Thread] = [threading.Thread(target = work, args = [t]) for t in range(0, threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+
+    assert errors == []
+    assert not conn.is_active
+    with conn as c:
+        c.execute("SELECT COUNT(*) FROM fruit")
+        assert c.fetchone() == (3 + threads * rounds, )
+
+def fruit_names(conn: TransactedConnection) -> list[Any]:
+    with conn as c:
+        c.execute("SELECT name FROM fruit ORDER BY pk_fruit")
+        return [row[0] for row in c.fetchall()]
+
+@db.decorator
+def test_transact_nested_is_not_committed_alone() -> None:
+    conn: TransactedConnection = db.new_connection()
+
+    @conn.transact
+    def inner() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    @conn.transact
+    def outer() -> None:
+        conn.execute("SELECT COUNT(*) FROM fruit")
+        assert conn.fetchone() == (3, )
+        inner()
+        raise KeyError()
+
+    with raises(KeyError):
+        outer()
+    assert fruit_names(conn) == ["orange", "strawberry", "lemon"]
+
+@db.decorator
+def test_transact_nested_rolls_back_alone() -> None:
+    conn: TransactedConnection = db.new_connection()
+
+    @conn.transact
+    def inner(name: str, fail: bool) -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [name])
+        if fail: raise KeyError()
+
+    @conn.transact
+    def outer() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        with raises(KeyError):
+            inner("melon", True)
+        inner("peach", False)
+
+    outer()
+    assert fruit_names(conn) == ["orange", "strawberry", "lemon", "grape", "peach"]
+
+@db.decorator
+def test_transact_nested_many_levels() -> None:
+    conn: TransactedConnection = db.new_connection()
+
+    @conn.transact
+    def level(n: int) -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES (?)", [f"fruit {n}"])
+        if n < 3: level(n + 1)
+        if n == 3: raise KeyError()
+
+    @conn.transact
+    def outer() -> None:
+        with raises(KeyError):
+            level(1)
+        level(4)
+
+    outer()
+    assert fruit_names(conn) == ["orange", "strawberry", "lemon", "fruit 4"]
+
 @db.decorator
 def test_no_transaction() -> None:
     conn: TransactedConnection = db.new_connection()
     with raises(TransactionNotActiveException):
         conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
 
+@db.decorator
+def test_after_transaction_runs_once_after_commit() -> None:
+    conn: TransactedConnection = db.new_connection()
+    calls: list[str] = []
+
+    @conn.transact
+    def inner() -> None:
+        conn.after_transaction(lambda: calls.append("inner"))
+
+    @conn.transact
+    def outer() -> None:
+        conn.after_transaction(lambda: calls.append("outer"))
+        inner()
+        assert calls == []
+
+    outer()
+    assert calls == ["outer", "inner"]
+    with conn:
+        pass
+    assert calls == ["outer", "inner"]
+
+@db.decorator
+def test_after_transaction_runs_after_rollback() -> None:
+    conn: TransactedConnection = db.new_connection()
+    calls: list[str] = []
+
+    @conn.transact
+    def x() -> None:
+        conn.after_transaction(lambda: calls.append("x"))
+        raise KeyError()
+
+    with raises(KeyError):
+        x()
+    assert calls == ["x"]
+
+    with conn:
+        conn.after_transaction(lambda: calls.append("closed"))
+    assert calls == ["x", "closed"]
+
+@db.decorator
+def test_transaction_finished_even_if_deactivate_fails() -> None:
+    failures: list[str] = ["boom"]
+
+    def deactivate(con: SimpleConnection) -> None:
+        con.close()
+        if len(failures) > 0: raise KeyError(failures.pop())
+
+    conn: TransactedConnection = TransactedConnection(lambda: _Sqlite3ConnectionWrapper(sqlite3.connect("test/fruits.db")), deactivate)
+    calls: list[str] = []
+
+    with raises(KeyError):
+        with conn:
+            values: list[str] = conn.transaction_local("x", list)
+            values.append("stale")
+            conn.after_transaction(lambda: calls.append("after"))
+    assert calls == ["after"]
+    assert not conn.is_active
+
+    with conn:
+        assert conn.transaction_local("x", list) == []
+
+def test_after_transaction_without_transaction() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with raises(TransactionNotActiveException):
+        conn.after_transaction(lambda: None)
+
+@db.decorator
+def test_transaction_local_discarded_after_transaction() -> None:
+    conn: TransactedConnection = db.new_connection()
+
+    @conn.transact
+    def inner() -> list[str]:
+        return conn.transaction_local("x", list)
+
+    @conn.transact
+    def outer() -> list[str]:
+        first: list[str] = conn.transaction_local("x", list)
+        first.append("a")
+        assert inner() is first
+        return first
+
+    first: list[str] = outer()
+    assert outer() is not first
+
+    @conn.transact
+    def fail() -> None:
+        values: list[str] = conn.transaction_local("x", list)
+        values.append("b")
+        raise KeyError()
+
+    with raises(KeyError):
+        fail()
+    with conn:
+        assert conn.transaction_local("x", list) == []
+
+@db.decorator
+def test_transaction_local_discarded_on_savepoint_rollback() -> None:
+    conn: TransactedConnection = db.new_connection()
+
+    @conn.transact
+    def inner() -> None:
+        values: list[str] = conn.transaction_local("x", list)
+        values.append("inner")
+        raise KeyError()
+
+    @conn.transact
+    def outer() -> None:
+        values: list[str] = conn.transaction_local("x", list)
+        values.append("outer")
+        with raises(KeyError):
+            inner()
+        assert conn.transaction_local("x", list) == []
+
+    outer()
+
+def test_transaction_local_without_transaction() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with raises(TransactionNotActiveException):
+        conn.transaction_local("x", list)
+
 @db.decorator
 def test_check_constraint_1() -> None:
     conn: TransactedConnection = db.new_connection()
@@ -222,4 +446,333 @@ def test_foreign_key_constraint_on_delete_restrict() -> None:
     with conn as c:
         c.execute("SELECT a.pk_fruit FROM juice_2 a INNER JOIN fruit b ON a.pk_fruit = b.pk_fruit WHERE a.pk_fruit = 1")
         t: tuple[Any, ...] | None = c.fetchone()
-        assert t == (1, )
\ No newline at end of file
+        assert t == (1, )
+
+@db.decorator
+def test_iter_rows() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        assert list(c.iter_rows()) == [(1, "orange"), (2, "strawberry"), (3, "lemon")]
+
+@db.decorator
+def test_iter_rows_is_lazy() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.executemany("INSERT INTO fruit (name) VALUES (?)", [[f"fruit {i}"] for i in range(0, 1000)])
+        c.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+        it: Iterator[tuple[Any, ...]] = c.iter_rows(7)
+        assert next(it) == (1, "orange")
+        assert len(c.fetchall()) == 1003 - 7
+        assert len(list(it)) == 6
+
+@db.decorator
+def test_iter_rows_batches() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.executemany("INSERT INTO fruit (name) VALUES (?)", [[f"fruit {i}"] for i in range(0, 1000)])
+        c.execute("SELECT pk_fruit FROM fruit ORDER BY pk_fruit")
+        assert [t[0] for t in c.iter_rows(7)] == list(range(1, 1004))
+
+@db.decorator
+def test_iter_dunder() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        assert [row for row in c] == [(1, "orange"), (2, "strawberry"), (3, "lemon")]
+
+@db.decorator
+def test_execute_streaming() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute_streaming("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+        assert list(c.iter_rows(2)) == [(1, "orange"), (2, "strawberry"), (3, "lemon")]
+
+@db.decorator
+def test_fetchall_columns() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name, pk_fruit * 0.5 AS half, NULLIF(pk_fruit, 2) AS holes FROM fruit ORDER BY pk_fruit")
+        columns: dict[str, Any] = c.fetchall_columns()
+        assert list(columns.keys()) == ["pk_fruit", "name", "half", "holes"]
+        assert columns["pk_fruit"] == array.array("q", [1, 2, 3])
+        assert columns["name"] == ["orange", "strawberry", "lemon"]
+        assert columns["half"] == array.array("d", [0.5, 1.0, 1.5])
+        assert columns["holes"] == [1, None, 3]
+
+@db.decorator
+def test_fetchmany_columns() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit ORDER BY pk_fruit")
+        assert c.fetchmany_columns(2) == {"pk_fruit": array.array("q", [1, 2]), "name": ["orange", "strawberry"]}
+        assert c.fetchmany_columns(2) == {"pk_fruit": array.array("q", [3]), "name": ["lemon"]}
+        assert c.fetchmany_columns(2) == {"pk_fruit": [], "name": []}
+
+@db.decorator
+def test_execute_batch() -> None:
+
+    @dataclass_validate
+    @dataclass(frozen = True)
+    class Fruit:
+        pk_fruit: int
+        name: str
+
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        results: list[ResultSet] = c.execute_batch([
+            ("SELECT pk_fruit, name FROM fruit WHERE pk_fruit = ?", [2]),
+            ("INSERT INTO fruit (name) VALUES (?)", ["grape"]),
+            ("SELECT pk_fruit, name FROM fruit WHERE pk_fruit > ? ORDER BY pk_fruit", [1])
+        ])
+        assert len(results) == 3
+        assert results[0].fetchone_class(Fruit) == Fruit(2, "strawberry")
+        assert len(results[1].column_names) == 0 and results[1].rows == []
+        assert results[1].rowcount == 1 and results[1].lastrowid == 4
+        assert results[2].fetchall_class(Fruit) == [Fruit(2, "strawberry"), Fruit(3, "lemon"), Fruit(4, "grape")]
+        assert results[2].fetchall_dict()[0] == {"pk_fruit": 2, "name": "strawberry"}
+        assert c.execute_batch([]) == []
+
+@db.decorator
+def test_execute_batch_failure() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        with raises(IntegrityViolationException):
+            c.execute_batch([("SELECT 1", []), ("INSERT INTO fruit (name) VALUES (?)", ["lemon"])])
+
+def test_batch_sql() -> None:
+    assert batch_sql([("SELECT a FROM b WHERE c = ?;", [1]), ("  DELETE FROM d WHERE e IN (?, ?)  ", ["x", 2])]) \
+            == ("SELECT a FROM b WHERE c = ?;\nDELETE FROM d WHERE e IN (?, ?)", [1, "x", 2])
+
+def test_rows_to_columns_uses_type_codes() -> None:
+    d: Descriptor = Descriptor([
+        ColumnDescriptor.create(name = "a", type_code = TypeCode.FLOAT),
+        ColumnDescriptor.create(name = "b", type_code = TypeCode.STRING),
+        ColumnDescriptor.create(name = "c", type_code = TypeCode.INTEGER)
+    ])
+    columns: dict[str, Any] = rows_to_columns(d, [(1, 2, 3), (4, 5, 2 ** 70)])
+    assert columns["a"] == array.array("d", [1.0, 4.0])
+    assert columns["b"] == [2, 5]
+    assert columns["c"] == [3, 2 ** 70]
+
+def test_rows_to_columns_numpy() -> None:
+    numpy: Any = importorskip("numpy")
+    d: Descriptor = Descriptor([ColumnDescriptor.create(name = "a", type_code = TypeCode.INTEGER), ColumnDescriptor.create(name = "b")])
+    columns: dict[str, Any] = rows_to_columns(d, [(1, "x"), (2, "y")], use_numpy = True)
+    assert columns["a"].dtype == numpy.int64
+    assert list(columns["a"]) == [1, 2]
+    assert list(columns["b"]) == ["x", "y"]
+
+@db.decorator
+def test_iter_dicts() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        assert list(c.iter_dicts(2)) == [{"pk_fruit": 1, "name": "orange"}, {"pk_fruit": 2, "name": "strawberry"}, {"pk_fruit": 3, "name": "lemon"}]
+
+@db.decorator
+def test_iter_class() -> None:
+
+    @dataclass_validate
+    @dataclass(frozen = True)
+    class Fruit:
+        pk_fruit: int
+        name: str
+
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        assert list(c.iter_class(Fruit)) == [Fruit(1, "orange"), Fruit(2, "strawberry"), Fruit(3, "lemon")]
+
+@db.decorator
+def test_iter_class_empty() -> None:
+
+    @dataclass_validate
+    @dataclass(frozen = True)
+    class Fruit:
+        pk_fruit: int
+        name: str
+
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit WHERE pk_fruit = 666")
+        assert list(c.iter_class(Fruit)) == []
+
+@db.decorator
+def test_description_is_cached_per_statement() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        c.execute("SELECT pk_fruit, name FROM fruit")
+        d1: Descriptor = c.description
+        assert d1 is c.description
+        assert c.column_names is d1.column_names
+        assert [d1.column_names[i] for i in range(0, len(d1.column_names))] == ["pk_fruit", "name"]
+
+        c.execute("SELECT name FROM fruit")
+        d2: Descriptor = c.description
+        assert d2 is not d1
+        assert len(d2.columns) == 1
+        assert d2.columns[0].name == "name"
+
+def test_padded_in_list() -> None:
+    assert padded_in_list([]) == InList("(NULL)", [])
+    assert padded_in_list([5]) == InList("(?)", [5])
+    assert padded_in_list([5, 6, 7]) == InList("(?, ?, ?, ?)", [5, 6, 7, 7])
+    assert padded_in_list(["a", "b", "c", "d"]) == InList("(?, ?, ?, ?)", ["a", "b", "c", "d"])
+    assert len(padded_in_list(list(range(0, 600))).parameters) == 1024
+    assert len(padded_in_list(list(range(0, 1500))).parameters) == 2048
+    assert len(padded_in_list(list(range(0, 3000))).parameters) == 3072
+
+@db.decorator
+def test_in_list() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        w: InList = c.in_list(["lemon", "orange", "banana"])
+        c.execute(f"SELECT pk_fruit, name FROM fruit WHERE name IN {w.sql} ORDER BY pk_fruit", w.parameters)
+        assert c.fetchall() == [(1, "orange"), (3, "lemon")]
+
+@db.decorator
+def test_in_list_same_shape() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        assert c.in_list([1]).sql == c.in_list(list(range(0, 5000))).sql
+
+@db.decorator
+def test_in_list_empty() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        w: InList = c.in_list([])
+        c.execute(f"SELECT pk_fruit, name FROM fruit WHERE pk_fruit IN {w.sql}", w.parameters)
+        assert c.fetchall() == []
+
+@db.decorator
+def test_in_list_huge() -> None:
+    conn: TransactedConnection = db.new_connection()
+    with conn as c:
+        w: InList = c.in_list(list(range(2, 300000)))
+        c.execute(f"SELECT pk_fruit, name FROM fruit WHERE pk_fruit IN {w.sql} ORDER BY pk_fruit", w.parameters)
+        assert c.fetchall() == [(2, "strawberry"), (3, "lemon")]
+
+def pragma(c: TransactedConnection, name: str) -> Any:
+    c.execute(f"PRAGMA {name}")
+    t: tuple[Any, ...] | None = c.fetchone()
+    assert t is not None
+    return t[0]
+
+@db.decorator
+def test_profile_default() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db").connect()
+    with conn as c:
+        assert pragma(c, "foreign_keys") == 1
+        assert pragma(c, "journal_mode") == "delete"
+        assert pragma(c, "busy_timeout") == 5000
+
+@db.decorator
+def test_profile_wal() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db", profile = "wal").connect()
+    with conn as c:
+        assert pragma(c, "foreign_keys") == 1
+        assert pragma(c, "journal_mode") == "wal"
+        assert pragma(c, "synchronous") == 1
+        assert pragma(c, "cache_size") == -20000
+        assert pragma(c, "temp_store") == 2
+
+@db.decorator
+def test_profile_overrides() -> None:
+    data: ConnectionData = ConnectionData.create(file_name = "test/fruits.db", profile = "wal", synchronous = Synchronous.FULL, busy_timeout = 1234, foreign_keys = False)
+    assert data.profile.journal_mode == JournalMode.WAL
+    conn: TransactedConnection = data.connect()
+    with conn as c:
+        assert pragma(c, "foreign_keys") == 0
+        assert pragma(c, "synchronous") == 2
+        assert pragma(c, "busy_timeout") == 1234
+
+def test_profile_unknown() -> None:
+    with raises(ValueError, match = "^Unknown SQLite profile turbo.$"):
+        ConnectionData.create(file_name = "test/fruits.db", profile = "turbo")
+
+@db.decorator
+def test_read_only() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db", profile = "wal", read_only = True).connect()
+    with conn as c:
+        c.execute("SELECT COUNT(*) FROM fruit")
+        assert c.fetchone() == (3, )
+        with raises(sqlite3.OperationalError):
+            c.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+@db.decorator
+def test_transact_readonly() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db").connect()
+
+    @conn.transact_readonly
+    def ler() -> Any:
+        assert conn.is_read_only
+        conn.execute("SELECT COUNT(*) FROM fruit")
+        return conn.fetchone()
+
+    @conn.transact_readonly
+    def escrever() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    assert ler() == (3, )
+    with raises(sqlite3.OperationalError):
+        escrever()
+    assert not conn.is_active
+
+    # A conexão volta a aceitar escritas depois da transação somente leitura.
+    with conn as c:
+        assert not c.is_read_only
+        c.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        c.execute("SELECT COUNT(*) FROM fruit")
+        assert c.fetchone() == (4, )
+
+@db.decorator
+def test_begin_read_only_failure_keeps_writes_allowed() -> None:
+    raw: sqlite3.Connection = sqlite3.connect("test/fruits.db")
+    raw.execute("BEGIN")
+    wrapper: _Sqlite3ConnectionWrapper = _Sqlite3ConnectionWrapper(raw)
+    try:
+        with raises(sqlite3.OperationalError):
+            wrapper.begin_read_only()
+        assert raw.execute("PRAGMA query_only").fetchone() == (0, )
+    finally:
+        raw.rollback()
+        raw.close()
+
+@db.decorator
+def test_transact_readonly_joins_active_transaction() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db").connect()
+
+    @conn.transact_readonly
+    def contar() -> Any:
+        conn.execute("SELECT COUNT(*) FROM fruit")
+        return conn.fetchone()
+
+    @conn.transact
+    def inserir_e_contar() -> Any:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+        assert not conn.is_read_only
+        return contar()
+
+    assert inserir_e_contar() == (4, )
+
+@db.decorator
+def test_transact_readonly_uses_readers() -> None:
+    conn: TransactedConnection = ConnectionData.create(file_name = "test/fruits.db", profile = "wal").connect(readers = PoolConfig.create(max_size = 2))
+    readers: ConnectionPool | None = conn.readers
+    assert readers is not None
+
+    @conn.transact_readonly
+    def contar() -> Any:
+        conn.execute("SELECT COUNT(*) FROM fruit")
+        return conn.fetchone()
+
+    @conn.transact
+    def inserir() -> None:
+        conn.execute("INSERT INTO fruit (name) VALUES ('grape')")
+
+    assert contar() == (3, )
+    inserir()
+    assert contar() == (4, )
+    assert readers.stats.created == 1
+    assert readers.stats.checkouts == 2
\ No newline at end of file
@@ -1,6 +1,6 @@
 from .fixtures import *
 from connection.conn import IntegrityViolationException
-from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioSemPK, SegredoPK, LoginUsuario
+from cofre_de_senhas.dao import UsuarioDAO, UsuarioPK, DadosUsuario, DadosUsuarioSemPK, SegredoPK, LoginUsuario, Pagina
 from cofre_de_senhas.bd.raiz import Raiz
 from cofre_de_senhas.usuario.usuario_dao_impl import UsuarioDAOImpl
 from pytest import raises
@@ -131,6 +131,13 @@ def test_listar_tudo_apos_insercao() -> None:
     esperado.append(snape)
     assert lido == esperado
 
+@db.transacted
+def test_listar_paginado() -> None:
+    dao: UsuarioDAOImpl = UsuarioDAOImpl()
+    assert dao.listar(Pagina.primeira(3)) == [harry_potter, voldemort, dumbledore]
+    assert dao.listar(Pagina(dumbledore.pk_usuario, 3)) == [hermione]
+    assert dao.listar(Pagina(hermione.pk_usuario, 3)) == []
+
 @db.transacted
 def test_excluir_usuario_por_pk() -> None:
     dao: UsuarioDAOImpl = UsuarioDAOImpl()